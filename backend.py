@@ -6,7 +6,7 @@ backend.py - 数据加载、标定计算及文件操作
 import os
 import json
 import numpy as np
-from typing import List, Tuple, Optional, Dict
+from typing import List, Tuple, Optional, Dict, Iterable
 from datetime import datetime
 
 
@@ -19,6 +19,15 @@ class DataManager:
         self.current_batch: int = 0
         self.current_image_path: str = ""
         self.current_radar_data: dict = {}
+        # Columns of current_radar_data['targets']: (N, 2) float64 [x, y],
+        # target ids and their "R{id}" labels
+        self.current_radar_xy: np.ndarray = np.empty((0, 2))
+        self.current_radar_ids: List = []
+        self.current_radar_labels: List[str] = []
+        # Last parsed radar JSON: (path, (mtime_ns, size), data, (xy, ids, labels))
+        self._radar_cache: Optional[Tuple[str, Tuple[int, int], dict, tuple]] = None
+        # Parsed point_pairs_*.txt files: path -> ((mtime_ns, size), pairs)
+        self._pairs_cache: Dict[str, Tuple[Tuple[int, int], List[dict]]] = {}
     
     def load_sync_json(self, path: str) -> int:
         """Load sync JSON file. Returns number of batches."""
@@ -35,58 +44,109 @@ class DataManager:
         batch = self.sync_data[idx]
         
         # Image
-        img_rel = batch.get('image_path', batch.get('image', ''))
-        img_path = os.path.join(self.data_root, img_rel) if img_rel else ""
+        img_path = self.image_path(idx)
         
         # Radar
         radar_rel = batch.get('radar_json', batch.get('radar', ''))
         radar_data = {}
+        columns = (np.empty((0, 2)), [], [])
         if radar_rel:
             radar_path = os.path.join(self.data_root, radar_rel)
             try:
-                with open(radar_path, 'r', encoding='utf-8') as f:
-                    radar_data = json.load(f)
+                st = os.stat(radar_path)
+                sig = (st.st_mtime_ns, st.st_size)
+                cached = self._radar_cache
+                if cached and cached[0] == radar_path and cached[1] == sig:
+                    _, _, radar_data, columns = cached
+                else:
+                    with open(radar_path, 'r', encoding='utf-8') as f:
+                        radar_data = json.load(f)
+                    columns = self._target_columns(radar_data.get('targets', []))
+                    self._radar_cache = (radar_path, sig, radar_data, columns)
             except:
                 pass
         
         self.current_batch = idx
         self.current_image_path = img_path
         self.current_radar_data = radar_data
+        self.current_radar_xy, self.current_radar_ids, self.current_radar_labels = columns
         return img_path, radar_data
     
+    @staticmethod
+    def _target_columns(targets: List[dict]) -> Tuple[np.ndarray, List, List[str]]:
+        """Split radar target dicts into ([x, y] array, ids, "R{id}" labels) in one pass."""
+        xy = np.array([(t.get('x', 0), t.get('y', 0)) for t in targets],
+                      dtype=np.float64).reshape(-1, 2)
+        ids = [t.get('id') for t in targets]
+        return xy, ids, [f"R{i}" for i in ids]
+    
+    def image_path(self, idx: int) -> str:
+        """Image path of a batch without loading it ("" if none)."""
+        if not 0 <= idx < len(self.sync_data):
+            return ""
+        batch = self.sync_data[idx]
+        img_rel = batch.get('image_path', batch.get('image', ''))
+        return os.path.join(self.data_root, img_rel) if img_rel else ""
+    
     @property
     def num_batches(self) -> int:
         return len(self.sync_data)
 
     def load_all_point_pairs(self, directory: str) -> List[dict]:
-        """Load all point_pairs_*.txt files from directory."""
+        """
+        Load all point_pairs_*.txt files from directory.
+        Files are only re-parsed when their mtime/size changed since the last call.
+        """
         all_pairs = []
         if not os.path.exists(directory):
             return []
-            
-        for fname in os.listdir(directory):
-            if fname.startswith("point_pairs_") and fname.endswith(".txt"):
-                path = os.path.join(directory, fname)
+        
+        seen = set()
+        with os.scandir(directory) as it:
+            for entry in it:
+                fname = entry.name
+                if not (fname.startswith("point_pairs_") and fname.endswith(".txt")):
+                    continue
+                path = entry.path
+                seen.add(path)
                 try:
-                    with open(path, 'r', encoding='utf-8') as f:
-                        for line in f:
-                            if line.startswith("#") or not line.strip():
-                                continue
-                            parts = [p.strip() for p in line.split(',')]
-                            if len(parts) >= 5:
-                                # Format: pixel_u, pixel_v, radar_id, radar_x, radar_y, ...
-                                pair = {
-                                    'pixel_u': float(parts[0]),
-                                    'pixel_v': float(parts[1]),
-                                    'radar_id': parts[2], # String or int
-                                    'radar_x': float(parts[3]),
-                                    'radar_y': float(parts[4]),
-                                    'batch': int(parts[-1]) if len(parts) > 8 else 0
-                                }
-                                all_pairs.append(pair)
+                    st = entry.stat()
+                    key = (st.st_mtime_ns, st.st_size)
+                    cached = self._pairs_cache.get(path)
+                    if cached is None or cached[0] != key:
+                        cached = (key, self._parse_point_pairs(path))
+                        self._pairs_cache[path] = cached
+                    all_pairs.extend(cached[1])
                 except Exception as e:
                     print(f"Error loading {fname}: {e}")
+        
+        # Drop entries for files removed from this directory
+        for path in [p for p in self._pairs_cache
+                     if os.path.dirname(p) == directory and p not in seen]:
+            del self._pairs_cache[path]
         return all_pairs
+    
+    @staticmethod
+    def _parse_point_pairs(path: str) -> List[dict]:
+        """Parse one point_pairs_*.txt file."""
+        pairs = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith("#") or not line.strip():
+                    continue
+                parts = [p.strip() for p in line.split(',')]
+                if len(parts) >= 5:
+                    # Format: pixel_u, pixel_v, radar_id, radar_x, radar_y, ...
+                    pair = {
+                        'pixel_u': float(parts[0]),
+                        'pixel_v': float(parts[1]),
+                        'radar_id': parts[2], # String or int
+                        'radar_x': float(parts[3]),
+                        'radar_y': float(parts[4]),
+                        'batch': int(parts[-1]) if len(parts) > 8 else 0
+                    }
+                    pairs.append(pair)
+        return pairs
 
 
 class Calibration:
@@ -157,18 +217,19 @@ class DataExporter:
     """Handles exporting data to files."""
     
     @staticmethod
-    def save_point_pairs(pairs: List[dict], directory: str) -> str:
-        """Save point pairs to file. Returns file path."""
+    def save_point_pairs(pairs: Iterable[dict], directory: str) -> str:
+        """Save point pairs (any iterable, consumed once) to file. Returns file path."""
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
         path = os.path.join(directory, f"point_pairs_{ts}.txt")
         
         with open(path, 'w', encoding='utf-8') as f:
             f.write("# pixel_u, pixel_v, radar_id, radar_x, radar_y, range, velocity, rcs, batch\n")
-            for p in pairs:
-                f.write(f"{p['pixel_u']:.2f}, {p['pixel_v']:.2f}, "
-                        f"{p['radar_id']}, {p['radar_x']:.2f}, {p['radar_y']:.2f}, "
-                        f"{p.get('radar_range', 0):.2f}, {p.get('radar_velocity', 0):.2f}, "
-                        f"{p.get('radar_rcs', 0):.2f}, {p['batch']}\n")
+            f.writelines(
+                f"{p['pixel_u']:.2f}, {p['pixel_v']:.2f}, "
+                f"{p['radar_id']}, {p['radar_x']:.2f}, {p['radar_y']:.2f}, "
+                f"{p.get('radar_range', 0):.2f}, {p.get('radar_velocity', 0):.2f}, "
+                f"{p.get('radar_rcs', 0):.2f}, {p['batch']}\n"
+                for p in pairs)
         return path
     
     @staticmethod
@@ -225,15 +286,15 @@ class DataExporter:
         return all_pairs
     
     @staticmethod
-    def save_all_lanes(lanes: List[List[Tuple[float, float]]], directory: str) -> str:
-        """Save all lanes to a single file."""
+    def save_all_lanes(lanes: Iterable[List[Tuple[float, float]]], directory: str) -> str:
+        """Save all lanes (any iterable, consumed once) to a single file."""
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
         path = os.path.join(directory, f"all_lanes_{ts}.txt")
         
         with open(path, 'w', encoding='utf-8') as f:
             f.write("# Lane lines: lane_id, start_u, start_v, end_u, end_v\n")
-            for i, lane in enumerate(lanes):
-                if len(lane) >= 2:
-                    f.write(f"{i+1}, {lane[0][0]:.2f}, {lane[0][1]:.2f}, "
-                            f"{lane[1][0]:.2f}, {lane[1][1]:.2f}\n")
+            f.writelines(
+                f"{i+1}, {lane[0][0]:.2f}, {lane[0][1]:.2f}, "
+                f"{lane[1][0]:.2f}, {lane[1][1]:.2f}\n"
+                for i, lane in enumerate(lanes) if len(lane) >= 2)
         return path
@@ -4,10 +4,22 @@ CalibrationManager - Wrapper for calibration functionality
 Combines VanishingPointCalibrator and CoordinateTransformer.
 """
 
+import copy
+from functools import lru_cache
+
 from calibration import CameraParams, RadarParams, VanishingPointCalibrator, CoordinateTransformer
 from typing import Optional, Tuple, List
 
 
+@lru_cache(maxsize=64)
+def _pitch_from_lane_key(lane_key: Tuple, cy: float, fy: float) -> Optional[float]:
+    """Solve pitch for a frozen ((x1, y1, x2, y2), ...) lane set; memoized."""
+    vc = VanishingPointCalibrator()
+    for x1, y1, x2, y2 in lane_key:
+        vc.add_line(x1, y1, x2, y2)
+    return vc.compute_pitch(cy, fy)
+
+
 class CalibrationManager:
     """Manages camera and radar calibration for BEV projection."""
     
@@ -15,9 +27,19 @@ class CalibrationManager:
         self.camera = CameraParams()
         self.radar = RadarParams()
         self.v_calibrator = VanishingPointCalibrator()
-        self.transformer = CoordinateTransformer(self.camera, self.radar)
+        self._reset_transformer()
         self.vanishing_lines = []
     
+    def _reset_transformer(self):
+        """Recreate transformer and the param-specialized projection functions."""
+        self.transformer = CoordinateTransformer(self.camera, self.radar)
+        self._bev_to_image = self.transformer.make_bev_to_image_fn()
+        self._image_to_bev = self.transformer.make_image_to_bev_fn()
+    
+    def detached_transformer(self) -> CoordinateTransformer:
+        """Transformer over copies of the current params (safe to use off the UI thread)."""
+        return CoordinateTransformer(copy.copy(self.camera), copy.copy(self.radar))
+    
     @property
     def is_calibrated(self) -> bool:
         return len(self.vanishing_lines) >= 2 or self.camera.pitch != 0
@@ -33,14 +55,14 @@ class CalibrationManager:
             if hasattr(self.camera, key):
                 setattr(self.camera, key, val)
         # Recreate transformer with updated params
-        self.transformer = CoordinateTransformer(self.camera, self.radar)
+        self._reset_transformer()
     
     def update_radar_params(self, **kwargs):
         """Update radar parameters."""
         for key, val in kwargs.items():
             if hasattr(self.radar, key):
                 setattr(self.radar, key, val)
-        self.transformer = CoordinateTransformer(self.camera, self.radar)
+        self._reset_transformer()
     
     def add_vanishing_line(self, x1, y1, x2, y2):
         """Add a vanishing line."""
@@ -65,7 +87,7 @@ class CalibrationManager:
         pitch = self.v_calibrator.compute_pitch(self.camera.cy, self.camera.fy)
         if pitch is not None:
             self.camera.pitch = pitch
-            self.transformer = CoordinateTransformer(self.camera, self.radar)
+            self._reset_transformer()
         return pitch
     
     def compute_pitch_from_lanes(self, lanes: List) -> Optional[float]:
@@ -81,6 +103,7 @@ class CalibrationManager:
         """
         self.v_calibrator.clear()
         
+        lane_key = []
         for lane in lanes:
             # Handle different lane formats
             if hasattr(lane, 'start') and hasattr(lane, 'end'):
@@ -94,15 +117,21 @@ class CalibrationManager:
                 continue
             
             self.v_calibrator.add_line(x1, y1, x2, y2)
+            lane_key.append((float(x1), float(y1), float(x2), float(y2)))
         
-        # Compute pitch
-        pitch = self.v_calibrator.compute_pitch(self.camera.cy, self.camera.fy)
+        # Compute pitch (undo + redraw of the same lane set hits the cache)
+        pitch = _pitch_from_lane_key(tuple(lane_key), self.camera.cy, self.camera.fy)
         if pitch is not None:
             self.camera.pitch = pitch
-            self.transformer = CoordinateTransformer(self.camera, self.radar)
+            self._reset_transformer()
         
         return pitch
     
+    @staticmethod
+    def clear_pitch_cache():
+        """Drop memoized lane-set pitch solutions."""
+        _pitch_from_lane_key.cache_clear()
+    
     def get_vanishing_point(self) -> Optional[Tuple[float, float]]:
         """Get vanishing point."""
         return self.v_calibrator.compute_vanishing_point()
@@ -111,13 +140,33 @@ class CalibrationManager:
         """Transform radar to BEV."""
         return self.transformer.radar_to_bev(x_radar, y_radar)
     
+    def radar_to_bev_batch(self, xy):
+        """Transform (N, 2) radar points to BEV."""
+        return self.transformer.radar_to_bev_batch(xy)
+    
     def image_to_bev(self, u, v):
         """Project image pixel to BEV."""
-        return self.transformer.image_to_bev(u, v)
+        return self._image_to_bev(u, v)
+    
+    def image_to_bev_batch(self, uv):
+        """Project (N, 2) image pixels to BEV. Returns (bev, valid)."""
+        return self.transformer.image_to_bev_batch(uv)
     
     def bev_to_image(self, x_bev, y_bev):
         """Project BEV point to image."""
-        return self.transformer.bev_to_image(x_bev, y_bev)
+        return self._bev_to_image(x_bev, y_bev)
+    
+    def radar_to_image(self, x_radar, y_radar):
+        """Project radar point to image (cached composed matrix)."""
+        return self.transformer.radar_to_image(x_radar, y_radar)
+    
+    def radar_to_image_batch(self, xy):
+        """Project (N, 2) radar points to image. Returns (uv, valid)."""
+        return self.transformer.radar_to_image_batch(xy)
+    
+    def radar_to_bev_image_batch(self, xy):
+        """Project (N, 2) radar points to BEV and image at once. Returns (bev, uv, valid)."""
+        return self.transformer.radar_to_bev_image_batch(xy)
     
     def load_ground_truth(self, gt_data: dict):
         """Load ground truth parameters."""
@@ -131,6 +180,7 @@ class CalibrationManager:
         new_pitch = self.transformer.optimize_pitch(pairs, search_range)
         # Update camera pitch if optimized
         self.camera.pitch = new_pitch
+        self._reset_transformer()
         return new_pitch
 
     def get_radar_bev_homography(self) -> List[List[float]]:
@@ -16,10 +16,16 @@ Author: caiusy
 Date: 2026-01-13
 """
 
+import math
 import numpy as np
 from dataclasses import dataclass
 from typing import List, Tuple, Optional
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 
 @dataclass
 class CameraParams:
@@ -98,41 +104,12 @@ class VanishingPointCalibrator:
         if self._vanishing_point is not None:
             return self._vanishing_point
         
-        # Convert lines to homogeneous representation (ax + by + c = 0)
-        homo_lines = []
-        for x1, y1, x2, y2 in self.lines:
-            # Line through two points: (y1-y2)x + (x2-x1)y + (x1*y2-x2*y1) = 0
-            a = y1 - y2
-            b = x2 - x1
-            c = x1 * y2 - x2 * y1
-            # Normalize
-            norm = np.sqrt(a*a + b*b)
-            if norm > 1e-6:
-                homo_lines.append([a/norm, b/norm, c/norm])
-        
-        if len(homo_lines) < 2:
+        lines = np.array(self.lines, dtype=np.float64).reshape(-1, 4)
+        kernel = _vanishing_point if _vanishing_point is not None else _vanishing_point_numpy
+        ok, vp_x, vp_y = kernel(lines)
+        if not ok:
             return None
         
-        # Least squares: find point minimizing sum of squared distances to lines
-        # For 2 lines, just find intersection
-        if len(homo_lines) == 2:
-            l1, l2 = homo_lines
-            # Cross product gives intersection in homogeneous coordinates
-            vp_homo = np.cross(l1, l2)
-            if abs(vp_homo[2]) < 1e-9:
-                return None  # Parallel lines
-            vp_x = vp_homo[0] / vp_homo[2]
-            vp_y = vp_homo[1] / vp_homo[2]
-        else:
-            # For more lines, use least squares
-            A = np.array([[l[0], l[1]] for l in homo_lines])
-            b = np.array([-l[2] for l in homo_lines])
-            try:
-                result = np.linalg.lstsq(A, b, rcond=None)
-                vp_x, vp_y = result[0]
-            except:
-                return None
-        
         self._vanishing_point = (vp_x, vp_y)
         return self._vanishing_point
     
@@ -179,6 +156,12 @@ class CoordinateTransformer:
     def __init__(self, camera: CameraParams = None, radar: RadarParams = None):
         self.camera = camera or CameraParams()
         self.radar = radar or RadarParams()
+        # Radar->BEV and composed radar->image matrices, each keyed on the
+        # params it was built from (pitch may be written in place)
+        self._H_rb = None
+        self._H_rb_key = None
+        self._H_r2i = None
+        self._H_r2i_key = None
     
     def radar_to_bev(self, x_radar: float, y_radar: float) -> Tuple[float, float]:
         """
@@ -194,25 +177,23 @@ class CoordinateTransformer:
         Returns:
             (x_bev, y_bev) in vehicle frame (X=Right, Y=Forward)
         """
-        # 1. Rotate Radar Frame
-        # Radar standard: x=Forward, y=Left.
-        # Yaw is rotation around Z (Up). Positive = Left.
-        cos_yaw = np.cos(self.radar.yaw)
-        sin_yaw = np.sin(self.radar.yaw)
-        
-        # Rotated coordinates (still Forward/Left convention)
-        x_rot_fwd = x_radar * cos_yaw - y_radar * sin_yaw
-        y_rot_left = x_radar * sin_yaw + y_radar * cos_yaw
-        
-        # 2. Map to BEV (Y=Forward, X=Right)
-        # BEV Y = Forward + Offset Y (User Expectation)
-        # BEV X = Right = -Left + Offset X (User Expectation)
-        
-        y_bev = x_rot_fwd + self.radar.y_offset
-        x_bev = -y_rot_left + self.radar.x_offset
+        # Rotate by yaw (Radar: x=Forward, y=Left, positive yaw = Left), then
+        # map to BEV (X=Right = -Left + Offset X, Y=Forward + Offset Y).
+        # Same rounding as the explicit rotation: -s*x - c*y == -(x*s + y*c).
+        H = self.get_radar_bev_matrix()
+        x_bev = H[0, 0] * x_radar + H[0, 1] * y_radar + H[0, 2]
+        y_bev = H[1, 0] * x_radar + H[1, 1] * y_radar + H[1, 2]
         
         return (x_bev, y_bev)
     
+    def radar_to_bev_batch(self, xy: np.ndarray) -> np.ndarray:
+        """
+        Vectorized radar_to_bev: (N, 2) radar (x, y) -> (N, 2) BEV (x, y).
+        """
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        H = self.get_radar_bev_matrix()
+        return xy @ H[:2, :2].T + H[:2, 2]
+    
     def bev_to_radar(self, x_bev: float, y_bev: float) -> Tuple[float, float]:
         """
         Transform BEV (Y=Forward) to Radar (x=Forward, y=Left).
@@ -367,6 +348,156 @@ class CoordinateTransformer:
         
         return (u, v)
     
+    def get_radar_image_matrix(self) -> np.ndarray:
+        """
+        Get the composed Radar -> Image matrix H = K @ M_cam @ H_rb.
+        
+        Radar->BEV is affine and BEV(Z=0)->Camera is linear in (x_bev, y_bev, 1),
+        so the whole chain is one 3x3 matrix; the third row of H @ [x, y, 1]
+        is z_cam. Cached until any camera/radar parameter changes (pitch is
+        also written in place by optimize_pitch, so the key covers it).
+        """
+        cam, radar = self.camera, self.radar
+        key = (cam.fx, cam.fy, cam.cx, cam.cy, cam.height, cam.pitch,
+               radar.yaw, radar.x_offset, radar.y_offset)
+        if self._H_r2i is not None and key == self._H_r2i_key:
+            return self._H_r2i
+        
+        H_rb = self.get_radar_bev_matrix()
+        
+        # BEV (x, y, 1) -> Camera (x_cam, y_cam, z_cam); camera at (0, 3.5, height)
+        cos_p = np.cos(cam.pitch)
+        sin_p = np.sin(cam.pitch)
+        h = cam.height
+        cam_y_pos = 3.5
+        M_cam = np.array([
+            [1.0, 0.0, 0.0],
+            [0.0, -sin_p, h * cos_p + cam_y_pos * sin_p],
+            [0.0, cos_p, h * sin_p - cam_y_pos * cos_p]
+        ])
+        
+        self._H_r2i = cam.K @ M_cam @ H_rb
+        self._H_r2i_key = key
+        return self._H_r2i
+    
+    def radar_to_image(self, x_radar: float, y_radar: float) -> Optional[Tuple[float, float]]:
+        """
+        Project radar point straight to image (radar_to_bev + bev_to_image in one matmul).
+        """
+        H = self.get_radar_image_matrix()
+        u, v, z_cam = H @ np.array([x_radar, y_radar, 1.0])
+        if z_cam <= 0.1:
+            return None
+        return (float(u / z_cam), float(v / z_cam))
+    
+    def make_bev_to_image_fn(self):
+        """
+        Return bev_to_image specialized for the current params.
+        fx/fy/cx/cy/height/pitch are bound as closure locals, so each call is
+        plain float math without attribute lookups. Rebuild after any change.
+        """
+        fx, fy = float(self.camera.fx), float(self.camera.fy)
+        cx, cy = float(self.camera.cx), float(self.camera.cy)
+        h = float(self.camera.height)
+        cos_p = math.cos(self.camera.pitch)
+        sin_p = math.sin(self.camera.pitch)
+        cam_y_pos = 3.5
+        
+        def bev_to_image(x_bev, y_bev):
+            dy = y_bev - cam_y_pos
+            y_cam = h * cos_p - dy * sin_p
+            z_cam = h * sin_p + dy * cos_p
+            if z_cam <= 0.1:
+                return None
+            return (fx * (x_bev / z_cam) + cx, fy * (y_cam / z_cam) + cy)
+        
+        return bev_to_image
+    
+    def make_image_to_bev_fn(self):
+        """
+        Return image_to_bev specialized for the current params (see make_bev_to_image_fn).
+        The ray is not normalized; the ground intersection does not depend on its length.
+        """
+        fx, fy = float(self.camera.fx), float(self.camera.fy)
+        cx, cy = float(self.camera.cx), float(self.camera.cy)
+        h = float(self.camera.height)
+        cos_p = math.cos(self.camera.pitch)
+        sin_p = math.sin(self.camera.pitch)
+        cam_y_pos = 3.5
+        
+        def image_to_bev(u, v):
+            x_norm = (u - cx) / fx
+            y_norm = (v - cy) / fy
+            # Un-pitch, then Cam (X=Right, Y=Down, Z=Fwd) -> Vehicle (X=Right, Y=Fwd, Z=Up)
+            down = y_norm * cos_p + sin_p
+            fwd = -y_norm * sin_p + cos_p
+            if down <= 0:
+                return None  # pointing up
+            t = h / down
+            if t < 0:
+                return None
+            return (t * x_norm, cam_y_pos + t * fwd)
+        
+        return image_to_bev
+    
+    def image_to_bev_batch(self, uv: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized image_to_bev (njit kernel when numba is available).
+        
+        Args:
+            uv: (N, 2) image (u, v)
+            
+        Returns:
+            (bev, valid): (N, 2) BEV points (NaN where invalid), (N,) bool mask
+            (invalid = ray does not hit the ground, same as image_to_bev)
+        """
+        uv = np.ascontiguousarray(uv, dtype=np.float64).reshape(-1, 2)
+        kernel = _image_to_bev if _image_to_bev is not None else _image_to_bev_numpy
+        return kernel(uv, float(self.camera.height), float(self.camera.pitch),
+                      float(self.camera.fx), float(self.camera.fy),
+                      float(self.camera.cx), float(self.camera.cy))
+    
+    def radar_to_image_batch(self, xy: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Project N radar points straight to image (vectorized radar_to_image).
+        
+        Args:
+            xy: (N, 2) radar (x, y)
+            
+        Returns:
+            (uv, valid): (N, 2) image points (NaN where invalid), (N,) bool mask
+            (valid = z_cam > 0.1, same as bev_to_image)
+        """
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        H = self.get_radar_image_matrix()
+        
+        pts = xy @ H[:, :2].T + H[:, 2]
+        z_cam = pts[:, 2]
+        valid = z_cam > 0.1
+        
+        uv = np.full((len(xy), 2), np.nan)
+        uv[valid] = pts[valid, :2] / z_cam[valid, None]
+        return uv, valid
+    
+    def radar_to_bev_image_batch(self, xy: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        radar_to_bev_batch and radar_to_image_batch in one matmul: the two
+        affine maps are stacked into one (5, 3) matrix.
+        
+        Returns:
+            (bev, uv, valid): (N, 2) BEV points, then as radar_to_image_batch
+        """
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        H = np.vstack((self.get_radar_bev_matrix()[:2], self.get_radar_image_matrix()))
+        
+        pts = xy @ H[:, :2].T + H[:, 2]
+        z_cam = pts[:, 4]
+        valid = z_cam > 0.1
+        
+        uv = np.full((len(xy), 2), np.nan)
+        uv[valid] = pts[valid, 2:4] / z_cam[valid, None]
+        return pts[:, :2], uv, valid
+    
     def optimize_pitch(self, pairs: List[dict], search_range: int = 50) -> float:
         """
         Optimize pitch by searching Vanishing Point Y within range.
@@ -390,47 +521,39 @@ class CoordinateTransformer:
         # 101 steps = 1 pixel per step roughly (if range is 50, strictly 1 pixel)
         search_vals = np.linspace(current_vp_y - search_range, current_vp_y + search_range, 101)
         
-        original_pitch = self.camera.pitch
+        # pitch = atan((cy - vp_y)/fy)
+        pitches = np.arctan((cy - search_vals) / fy)
         
-        for vp_y in search_vals:
-            # pitch = atan((cy - vp_y)/fy)
-            pitch = np.arctan((cy - vp_y) / fy)
-            self.camera.pitch = pitch
-            
-            error = 0.0
-            valid_count = 0
-            for p in pairs:
-                rx, ry = p['radar_x'], p['radar_y']
-                u_meas, v_meas = p['pixel_u'], p['pixel_v']
-                
-                # Radar -> BEV
-                x_bev, y_bev = self.radar_to_bev(rx, ry)
-                
-                # BEV -> Image
-                res = self.bev_to_image(x_bev, y_bev)
-                if res:
-                    u_proj, v_proj = res
-                    # Squared Euclidean distance
-                    dist = (u_proj - u_meas)**2 + (v_proj - v_meas)**2
-                    error += dist
-                    valid_count += 1
-                else:
-                    error += 100000.0 # Penalty
-            
-            # Average error (RMSE-like metric)
-            if valid_count > 0:
-                if error < min_error:
-                    min_error = error
-                    best_vp_y = vp_y
+        # One pass over pairs into contiguous [radar_x, radar_y, pixel_u, pixel_v]
+        cols = np.array([(p['radar_x'], p['radar_y'], p['pixel_u'], p['pixel_v']) for p in pairs],
+                        dtype=np.float64)
+        # Radar -> BEV once; only the BEV -> Image step depends on pitch
+        bev_xy = self.radar_to_bev_batch(cols[:, :2])
+        meas_uv = np.ascontiguousarray(cols[:, 2:])
+        
+        sweep = _pitch_sweep if _pitch_sweep is not None else _pitch_sweep_numpy
+        errors, valid_counts = sweep(bev_xy, meas_uv, pitches, self.camera.height,
+                                     self.camera.fx, self.camera.fy,
+                                     self.camera.cx, self.camera.cy)
+        
+        # Candidates with no valid projection are skipped; first minimum wins
+        errors = np.where(valid_counts > 0, errors, np.inf)
+        i = int(np.argmin(errors))
+        if errors[i] < min_error:
+            min_error = errors[i]
+            best_vp_y = search_vals[i]
         
         # Set best pitch
         final_pitch = np.arctan((cy - best_vp_y) / fy)
         self.camera.pitch = final_pitch
         print(f"[Optimize] Best VP_y: {best_vp_y:.2f} (Delta: {best_vp_y - current_vp_y:.2f}), Pitch: {final_pitch:.4f}, Min Error: {min_error:.2f}")
         return final_pitch
-        return final_pitch
 
     def get_radar_bev_homography(self) -> List[List[float]]:
+        """Radar -> BEV homography as nested lists (see get_radar_bev_matrix)."""
+        return self.get_radar_bev_matrix().tolist()
+    
+    def get_radar_bev_matrix(self) -> np.ndarray:
         """
         Get Radar -> BEV Homography (Transformation Matrix).
         H_rb such that [x_b, y_b, 1] = H * [x_r, y_r, 1]
@@ -450,24 +573,30 @@ class CoordinateTransformer:
           [ c, -s, off_y],
           [ 0,  0,     1]
         ]
+        
+        Cached until yaw or the offsets change; treat the result as read-only.
         """
         yaw = self.radar.yaw
-        cos_y = np.cos(yaw)
-        sin_y = np.sin(yaw)
-        
         off_x = self.radar.x_offset
         off_y = self.radar.y_offset
+        key = (yaw, off_x, off_y)
+        if self._H_rb is not None and key == self._H_rb_key:
+            return self._H_rb
+        
+        cos_y = np.cos(yaw)
+        sin_y = np.sin(yaw)
         
         # Check sign conventions carefully:
         # x_bev = -sin*x - cos*y + off_x
         # y_bev = cos*x - sin*y + off_y
         
-        H = [
+        self._H_rb = np.array([
             [-sin_y, -cos_y, off_x],
             [cos_y, -sin_y, off_y],
             [0.0, 0.0, 1.0]
-        ]
-        return H
+        ])
+        self._H_rb_key = key
+        return self._H_rb
 
     def get_camera_bev_homography(self) -> Optional[List[List[float]]]:
         """
@@ -512,6 +641,190 @@ class CoordinateTransformer:
         return None
 
 
+def _vanishing_point_numpy(lines):
+    """
+    Least-squares intersection of (N, 4) line segments [x1, y1, x2, y2].
+    
+    Lines are normalized to ax + by + c = 0 with a^2 + b^2 = 1 (degenerate
+    segments dropped). Two lines: homogeneous cross product. More: solve the
+    2x2 normal equations of min sum (a*x + b*y + c)^2.
+    
+    Returns:
+        (ok, vp_x, vp_y)
+    """
+    x1, y1, x2, y2 = lines.T
+    a = y1 - y2
+    b = x2 - x1
+    c = x1 * y2 - x2 * y1
+    norm = np.sqrt(a*a + b*b)
+    keep = norm > 1e-6
+    a, b, c = a[keep] / norm[keep], b[keep] / norm[keep], c[keep] / norm[keep]
+    
+    if len(a) < 2:
+        return False, 0.0, 0.0
+    if len(a) == 2:
+        w = a[0] * b[1] - b[0] * a[1]
+        if abs(w) < 1e-9:
+            return False, 0.0, 0.0  # Parallel lines
+        return True, (b[0] * c[1] - c[0] * b[1]) / w, (c[0] * a[1] - a[0] * c[1]) / w
+    
+    saa, sab, sbb = np.dot(a, a), np.dot(a, b), np.dot(b, b)
+    sac, sbc = np.dot(a, c), np.dot(b, c)
+    det = saa * sbb - sab * sab
+    if abs(det) < 1e-12:
+        return False, 0.0, 0.0
+    return True, (sab * sbc - sbb * sac) / det, (sab * sac - saa * sbc) / det
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _vanishing_point(lines):
+        """Numba version of _vanishing_point_numpy (same math, explicit loops)."""
+        n_lines = 0
+        l1a = l1b = l1c = l2a = l2b = l2c = 0.0
+        saa = sab = sbb = sac = sbc = 0.0
+        for i in range(lines.shape[0]):
+            x1, y1, x2, y2 = lines[i, 0], lines[i, 1], lines[i, 2], lines[i, 3]
+            a = y1 - y2
+            b = x2 - x1
+            c = x1 * y2 - x2 * y1
+            norm = np.sqrt(a*a + b*b)
+            if norm <= 1e-6:
+                continue
+            a /= norm
+            b /= norm
+            c /= norm
+            if n_lines == 0:
+                l1a, l1b, l1c = a, b, c
+            elif n_lines == 1:
+                l2a, l2b, l2c = a, b, c
+            saa += a * a
+            sab += a * b
+            sbb += b * b
+            sac += a * c
+            sbc += b * c
+            n_lines += 1
+        
+        if n_lines < 2:
+            return False, 0.0, 0.0
+        if n_lines == 2:
+            w = l1a * l2b - l1b * l2a
+            if abs(w) < 1e-9:
+                return False, 0.0, 0.0  # Parallel lines
+            return True, (l1b * l2c - l1c * l2b) / w, (l1c * l2a - l1a * l2c) / w
+        
+        det = saa * sbb - sab * sab
+        if abs(det) < 1e-12:
+            return False, 0.0, 0.0
+        return True, (sab * sbc - sbb * sac) / det, (sab * sac - saa * sbc) / det
+else:
+    _vanishing_point = None
+
+
+def _pitch_sweep_numpy(bev_xy, meas_uv, pitches, height, fx, fy, cx, cy):
+    """
+    Summed squared reprojection error of BEV points for each candidate pitch.
+    Projections behind the camera (z_cam <= 0.1, see bev_to_image) add a
+    100000 penalty instead.
+    
+    Returns:
+        (errors (M,), valid_counts (M,))
+    """
+    # Camera at (0, 3.5, height) in vehicle frame
+    cx0 = bev_xy[:, 0][None, :]
+    cy0 = height
+    cz0 = (bev_xy[:, 1] - 3.5)[None, :]
+    cos_p = np.cos(pitches)[:, None]
+    sin_p = np.sin(pitches)[:, None]
+    
+    y_cam = cy0 * cos_p - cz0 * sin_p
+    z_cam = cy0 * sin_p + cz0 * cos_p
+    valid = z_cam > 0.1
+    z_safe = np.where(valid, z_cam, 1.0)
+    
+    du = fx * (cx0 / z_safe) + cx - meas_uv[:, 0][None, :]
+    dv = fy * (y_cam / z_safe) + cy - meas_uv[:, 1][None, :]
+    dist = np.where(valid, du**2 + dv**2, 100000.0)
+    return dist.sum(axis=1), valid.sum(axis=1)
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _pitch_sweep(bev_xy, meas_uv, pitches, height, fx, fy, cx, cy):
+        """Numba version of _pitch_sweep_numpy (same math, explicit loops)."""
+        m = pitches.shape[0]
+        n = bev_xy.shape[0]
+        errors = np.zeros(m)
+        valid_counts = np.zeros(m, dtype=np.int64)
+        for i in range(m):
+            cos_p = np.cos(pitches[i])
+            sin_p = np.sin(pitches[i])
+            error = 0.0
+            count = 0
+            for j in range(n):
+                cz0 = bev_xy[j, 1] - 3.5
+                y_cam = height * cos_p - cz0 * sin_p
+                z_cam = height * sin_p + cz0 * cos_p
+                if z_cam <= 0.1:
+                    error += 100000.0  # Penalty
+                    continue
+                du = fx * (bev_xy[j, 0] / z_cam) + cx - meas_uv[j, 0]
+                dv = fy * (y_cam / z_cam) + cy - meas_uv[j, 1]
+                error += du * du + dv * dv
+                count += 1
+            errors[i] = error
+            valid_counts[i] = count
+        return errors, valid_counts
+else:
+    _pitch_sweep = None
+
+
+def _image_to_bev_numpy(uv, height, pitch, fx, fy, cx, cy):
+    """
+    Ground-plane intersection of N pixel rays (same math as make_image_to_bev_fn).
+    
+    Returns:
+        (bev (N, 2), valid (N,)); rays at or above the horizon are NaN
+    """
+    cos_p = np.cos(pitch)
+    sin_p = np.sin(pitch)
+    x_norm = (uv[:, 0] - cx) / fx
+    y_norm = (uv[:, 1] - cy) / fy
+    down = y_norm * cos_p + sin_p
+    valid = down > 0
+    t = np.where(valid, height / np.where(valid, down, 1.0), np.nan)
+    bev = np.empty((uv.shape[0], 2))
+    bev[:, 0] = t * x_norm
+    bev[:, 1] = 3.5 + t * (cos_p - y_norm * sin_p)
+    return bev, valid
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _image_to_bev(uv, height, pitch, fx, fy, cx, cy):
+        """Numba version of _image_to_bev_numpy (same math, explicit loop)."""
+        n = uv.shape[0]
+        cos_p = np.cos(pitch)
+        sin_p = np.sin(pitch)
+        bev = np.empty((n, 2))
+        valid = np.zeros(n, dtype=np.bool_)
+        for i in range(n):
+            x_norm = (uv[i, 0] - cx) / fx
+            y_norm = (uv[i, 1] - cy) / fy
+            down = y_norm * cos_p + sin_p
+            if down <= 0:
+                bev[i, 0] = np.nan  # pointing up
+                bev[i, 1] = np.nan
+                continue
+            t = height / down
+            bev[i, 0] = t * x_norm
+            bev[i, 1] = 3.5 + t * (cos_p - y_norm * sin_p)
+            valid[i] = True
+        return bev, valid
+else:
+    _image_to_bev = None
+
+
 # Utility functions
 def fit_homography(src_pts: np.ndarray, dst_pts: np.ndarray) -> Optional[np.ndarray]:
     """
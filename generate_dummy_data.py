@@ -19,10 +19,19 @@ Date: 2026-01-13
 
 import os
 import json
+import math
+import functools
 import numpy as np
 import cv2
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple
 
+try:
+    from numba import njit
+except ImportError:
+    # Numba is optional; the NumPy path below is used without it
+    njit = None
+
 # =============================================================================
 # Configuration
 # =============================================================================
@@ -64,6 +73,12 @@ LANE_WIDTH = 2
 # Number of frames
 NUM_FRAMES = 5
 
+# Precomputed rotation terms (parameters are constant for the whole run)
+_COS_PITCH = math.cos(CAMERA_PITCH)
+_SIN_PITCH = math.sin(CAMERA_PITCH)
+_COS_YAW = math.cos(RADAR_YAW)
+_SIN_YAW = math.sin(RADAR_YAW)
+
 # =============================================================================
 # Coordinate Transforms (Y=Forward, X=Right)
 # =============================================================================
@@ -71,6 +86,7 @@ NUM_FRAMES = 5
 def bev_to_radar(x_bev: float, y_bev: float) -> Tuple[float, float]:
     """
     Transform BEV (Y=Forward, X=Right) to Radar (X=Forward, Y=Left).
+    Accepts scalars or NumPy arrays (element-wise).
     """
     # Inverse mapping logic from calibration.py
     # x_rot_fwd = y_bev - offset_x
@@ -79,22 +95,16 @@ def bev_to_radar(x_bev: float, y_bev: float) -> Tuple[float, float]:
     x_rot_fwd = y_bev - RADAR_X_OFFSET
     y_rot_left = RADAR_Y_OFFSET - x_bev
     
-    cos_yaw = np.cos(RADAR_YAW)
-    sin_yaw = np.sin(RADAR_YAW)
-    
-    x_radar = x_rot_fwd * cos_yaw + y_rot_left * sin_yaw
-    y_radar = -x_rot_fwd * sin_yaw + y_rot_left * cos_yaw
+    x_radar = x_rot_fwd * _COS_YAW + y_rot_left * _SIN_YAW
+    y_radar = -x_rot_fwd * _SIN_YAW + y_rot_left * _COS_YAW
     
     return (x_radar, y_radar)
 
 
 def radar_to_bev(x_radar: float, y_radar: float) -> Tuple[float, float]:
     """Transform Radar (X=Fwd, Y=Left) to BEV (Y=Fwd, X=Right)."""
-    cos_yaw = np.cos(RADAR_YAW)
-    sin_yaw = np.sin(RADAR_YAW)
-    
-    x_rot_fwd = x_radar * cos_yaw - y_radar * sin_yaw
-    y_rot_left = x_radar * sin_yaw + y_radar * cos_yaw
+    x_rot_fwd = x_radar * _COS_YAW - y_radar * _SIN_YAW
+    y_rot_left = x_radar * _SIN_YAW + y_radar * _COS_YAW
     
     y_bev = x_rot_fwd + RADAR_X_OFFSET
     x_bev = -y_rot_left + RADAR_Y_OFFSET
@@ -124,12 +134,9 @@ def bev_to_image(x_bev: float, y_bev: float) -> Tuple[float, float]:
     cz0 = dy_v      # Cam Z = Veh Y
     
     # 3. Apply Pitch Rotation
-    cos_p = np.cos(CAMERA_PITCH)
-    sin_p = np.sin(CAMERA_PITCH)
-    
     x_cam = cx0
-    y_cam = cy0 * cos_p - cz0 * sin_p
-    z_cam = cy0 * sin_p + cz0 * cos_p
+    y_cam = cy0 * _COS_PITCH - cz0 * _SIN_PITCH
+    z_cam = cy0 * _SIN_PITCH + cz0 * _COS_PITCH
     
     if z_cam <= 0.1:
         return None
@@ -141,26 +148,74 @@ def bev_to_image(x_bev: float, y_bev: float) -> Tuple[float, float]:
     return (u, v)
 
 
+def bev_to_image_batch(bev: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized bev_to_image for an (N,2) array of [x_bev, y_bev].
+    Returns (uv (N,2), valid (N,)); rows behind the camera are NaN and invalid.
+    """
+    bev = np.asarray(bev, dtype=np.float64).reshape(-1, 2)
+    
+    # Relative vector mapped straight to the unrotated camera frame
+    x_cam = bev[:, 0]                      # Cam X = Veh X
+    cy0 = CAMERA_HEIGHT                    # Cam Y = -Veh Z
+    cz0 = bev[:, 1] - CAMERA_X_OFFSET      # Cam Z = Veh Y
+    
+    y_cam = cy0 * _COS_PITCH - cz0 * _SIN_PITCH
+    z_cam = cy0 * _SIN_PITCH + cz0 * _COS_PITCH
+    valid = z_cam > 0.1
+    
+    uv = np.full(bev.shape, np.nan)
+    uv[valid, 0] = CAMERA_FX * (x_cam[valid] / z_cam[valid]) + CAMERA_CX
+    uv[valid, 1] = CAMERA_FY * (y_cam[valid] / z_cam[valid]) + CAMERA_CY
+    return uv, valid
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _bev_to_radar_polar(bev, cos_yaw, sin_yaw, off_x, off_y):
+        """Fused BEV -> radar (x, y, range, azimuth) in a single pass over bev (N,2)."""
+        n = bev.shape[0]
+        out = np.empty((n, 4))
+        for i in range(n):
+            a = bev[i, 1] - off_x
+            b = off_y - bev[i, 0]
+            xr = a * cos_yaw + b * sin_yaw
+            yr = -a * sin_yaw + b * cos_yaw
+            out[i, 0] = xr
+            out[i, 1] = yr
+            out[i, 2] = math.hypot(xr, yr)
+            out[i, 3] = math.atan2(yr, xr)
+        return out
+else:
+    _bev_to_radar_polar = None
+
+
 # =============================================================================
 # Data Generation
 # =============================================================================
 
-def generate_objects_in_bev(frame_id: int) -> List[dict]:
+def frame_rng(frame_id: int) -> np.random.Generator:
+    """Local random generator for one frame (no global np.random state)."""
+    return np.random.default_rng(42 + frame_id)
+
+
+def generate_objects_in_bev(frame_id: int, rng: np.random.Generator = None) -> List[dict]:
     """
     Generate random objects in BEV coordinates (Y=Forward).
     """
-    np.random.seed(42 + frame_id)
+    if rng is None:
+        rng = frame_rng(frame_id)
     
     objects = []
-    n_objects = np.random.randint(5, 12) # More objects for larger range
+    n_objects = rng.integers(5, 12) # More objects for larger range
     
     for i in range(n_objects):
         # Random position in BEV (Y=Forward 10-150m, X=Lateral -10 to +10m)
-        y_bev = np.random.uniform(10, 150)
-        x_bev = np.random.uniform(-10, 10)
+        y_bev = rng.uniform(10, 150)
+        x_bev = rng.uniform(-10, 10)
         
-        velocity = np.random.uniform(-5, 25)
-        rcs = np.random.uniform(5, 30)
+        velocity = rng.uniform(-5, 25)
+        rcs = rng.uniform(5, 30)
         
         objects.append({
             'id': i,
@@ -173,24 +228,50 @@ def generate_objects_in_bev(frame_id: int) -> List[dict]:
     return objects
 
 
-def generate_lane_lines() -> List[Tuple[Tuple[float, float], Tuple[float, float]]]:
+@functools.lru_cache(maxsize=None)
+def generate_lane_lines() -> Tuple[Tuple[Tuple[float, float], Tuple[float, float]], ...]:
     """
     Generate lane line endpoints in BEV coordinates (Y=Forward).
+    Returns an immutable tuple so the cached result can be shared safely.
     """
-    lanes = []
-    
-    # Left lane line (X = -3.5m)
-    lanes.append(((-3.5, 5), (-3.5, 150)))
-    # Right lane line (X = 3.5m)
-    lanes.append(((3.5, 5), (3.5, 150)))
-    # Center dashed line
-    lanes.append(((0, 5), (0, 150)))
-    
-    return lanes
+    return (
+        ((-3.5, 5), (-3.5, 150)),   # Left lane line (X = -3.5m)
+        ((3.5, 5), (3.5, 150)),     # Right lane line (X = 3.5m)
+        ((0, 5), (0, 150)),         # Center dashed line
+    )
 
 
-def create_image(objects: List[dict], lanes: List, filepath: str):
-    """Create camera image with projected objects and lanes."""
+def objects_to_arrays(objects: List[dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pack object dicts into parallel arrays (structure of arrays).
+    Returns (bev (N,2) [x_bev, y_bev], velocity (N,), rcs (N,), ids (N,)).
+    """
+    bev = np.array([[o['x_bev'], o['y_bev']] for o in objects], dtype=np.float64).reshape(-1, 2)
+    velocity = np.array([o['velocity'] for o in objects], dtype=np.float64)
+    rcs = np.array([o['rcs'] for o in objects], dtype=np.float64)
+    ids = np.array([o['id'] for o in objects], dtype=np.int64)
+    return bev, velocity, rcs, ids
+
+
+def _write_jpeg(filepath: str, img: np.ndarray):
+    """Encode img in memory and write it with a single raw fd write."""
+    # Quality 95 matches cv2.imwrite's default, so output bytes are unchanged
+    ok, buf = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, 95])
+    if not ok:
+        raise IOError(f"Failed to encode image: {filepath}")
+    
+    data = memoryview(buf).cast('B')
+    fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while data:
+            written = os.write(fd, data)
+            data = data[written:]
+    finally:
+        os.close(fd)
+
+
+def create_image(bev: np.ndarray, lanes: List, filepath: str):
+    """Create camera image with projected objects (bev: (N,2) array) and lanes."""
     img = np.zeros((IMAGE_HEIGHT, IMAGE_WIDTH, 3), dtype=np.uint8)
     
     # Draw gradient sky
@@ -214,8 +295,8 @@ def create_image(objects: List[dict], lanes: List, filepath: str):
 
     
     # Draw objects (cars)
-    for obj in objects:
-        result = bev_to_image(obj['x_bev'], obj['y_bev'])
+    for x_bev, y_bev in bev.tolist():
+        result = bev_to_image(x_bev, y_bev)
         if result is None:
             continue
         u, v = result
@@ -227,7 +308,7 @@ def create_image(objects: List[dict], lanes: List, filepath: str):
         u, v = int(u), int(v)
         
         # Scale car size based on distance (perspective)
-        distance = obj['x_bev']
+        distance = x_bev
         scale = max(0.3, min(1.0, 30.0 / distance))
         w = int(CAR_WIDTH_PX * scale)
         h = int(CAR_HEIGHT_PX * scale)
@@ -241,29 +322,38 @@ def create_image(objects: List[dict], lanes: List, filepath: str):
         # Draw center marker
         cv2.circle(img, (u, v), int(CENTER_MARKER_RADIUS * scale + 2), CENTER_MARKER_COLOR, -1)
     
-    cv2.imwrite(filepath, img)
+    _write_jpeg(filepath, img)
 
 
-def create_radar_json(objects: List[dict], filepath: str):
-    """Create radar JSON with targets in radar coordinates."""
+def create_radar_json(bev: np.ndarray, velocity: np.ndarray, rcs: np.ndarray,
+                      ids: np.ndarray, filepath: str):
+    """Create radar JSON with targets in radar coordinates (inputs from objects_to_arrays)."""
     targets = []
     
-    for obj in objects:
-        # Convert BEV to radar coordinates
-        x_radar, y_radar = bev_to_radar(obj['x_bev'], obj['y_bev'])
-        
-        # Calculate range and azimuth
-        range_m = np.sqrt(x_radar**2 + y_radar**2)
+    # Convert BEV to radar coordinates and range/azimuth for the whole frame at once
+    if _bev_to_radar_polar is not None and len(bev):
+        polar = _bev_to_radar_polar(bev, _COS_YAW, _SIN_YAW, RADAR_X_OFFSET, RADAR_Y_OFFSET)
+        x_radar, y_radar, range_m, azimuth = polar.T
+    else:
+        x_radar, y_radar = bev_to_radar(bev[:, 0], bev[:, 1])
+        range_m = np.hypot(x_radar, y_radar)
         azimuth = np.arctan2(y_radar, x_radar)  # radians
-        
+    
+    for tid, x, y, r, az, vel, rc in zip(ids.tolist(),
+                                         np.round(x_radar, 3).tolist(),
+                                         np.round(y_radar, 3).tolist(),
+                                         np.round(range_m, 3).tolist(),
+                                         np.round(azimuth, 4).tolist(),
+                                         velocity.tolist(),
+                                         rcs.tolist()):
         targets.append({
-            'id': obj['id'],
-            'x': round(x_radar, 3),
-            'y': round(y_radar, 3),
-            'range': round(range_m, 3),
-            'azimuth': round(azimuth, 4),
-            'velocity': obj['velocity'],
-            'rcs': obj['rcs']
+            'id': tid,
+            'x': x,
+            'y': y,
+            'range': r,
+            'azimuth': az,
+            'velocity': vel,
+            'rcs': rc
         })
     
     data = {
@@ -280,7 +370,7 @@ def create_radar_json(objects: List[dict], filepath: str):
         json.dump(data, f, indent=2)
 
 
-def create_camera_json(objects: List[dict], filepath: str):
+def create_camera_json(objects: List[dict], filepath: str, rng: np.random.Generator):
     """Create camera detection JSON with targets in pixel coordinates."""
     detections = []
     
@@ -293,8 +383,8 @@ def create_camera_json(objects: List[dict], filepath: str):
         u, v = result
         
         # Add some detection noise
-        u += np.random.uniform(-3, 3)
-        v += np.random.uniform(-3, 3)
+        u += rng.uniform(-3, 3)
+        v += rng.uniform(-3, 3)
         
         detections.append({
             'id': obj['id'],
@@ -302,7 +392,7 @@ def create_camera_json(objects: List[dict], filepath: str):
             'v': round(v, 1),
             'x_bev': round(obj['x_bev'], 3),
             'y_bev': round(obj['y_bev'], 3),
-            'confidence': round(np.random.uniform(0.7, 0.99), 2)
+            'confidence': round(rng.uniform(0.7, 0.99), 2)
         })
     
     data = {
@@ -355,19 +445,21 @@ def create_ground_truth(filepath: str):
         json.dump(params, f, indent=2)
 
 
-def create_vanishing_lines(filepath: str):
+def create_vanishing_lines(lanes, filepath: str):
     """
     Create a file with pre-defined parallel lines for vanishing point calibration.
     These correspond to the lane lines in the image.
     """
-    # Get lane line endpoints in image coordinates
-    lanes = generate_lane_lines()
+    # Get lane line endpoints in image coordinates (all endpoints in one pass)
     lines = []
     
-    for bev_start, bev_end in lanes:
-        pt1 = bev_to_image(*bev_start)
-        pt2 = bev_to_image(*bev_end)
-        if pt1 and pt2:
+    pts = np.array([[*start, *end] for start, end in lanes], dtype=np.float64).reshape(-1, 2)
+    uv, valid = bev_to_image_batch(pts)
+    uv = uv.reshape(-1, 2, 2)
+    valid = valid.reshape(-1, 2).all(axis=1)
+    
+    for (pt1, pt2), ok in zip(uv.tolist(), valid.tolist()):
+        if ok:
             lines.append({
                 'x1': round(pt1[0], 1),
                 'y1': round(pt1[1], 1),
@@ -403,23 +495,33 @@ def main():
     print(f"\nGenerating {NUM_FRAMES} frames...")
     lanes = generate_lane_lines()
     
-    for i in range(NUM_FRAMES):
-        objects = generate_objects_in_bev(i)
-        
-        img_path = os.path.join(IMAGES_DIR, f"{i:03d}.jpg")
-        radar_path = os.path.join(RADAR_DIR, f"{i:03d}.json")
-        camera_path = os.path.join(camera_dir, f"{i:03d}.json")
-        
-        create_image(objects, lanes, img_path)
-        create_radar_json(objects, radar_path)
-        create_camera_json(objects, camera_path)
-        
-        print(f"  Frame {i}: {len(objects)} objects")
+    # cv2.imencode and the raw os.write in _write_jpeg release the GIL, so the
+    # radar JSON write overlaps with the image encode instead of running after it.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        for i in range(NUM_FRAMES):
+            rng = frame_rng(i)
+            objects = generate_objects_in_bev(i, rng)
+            bev, velocity, rcs, ids = objects_to_arrays(objects)
+            
+            img_path = os.path.join(IMAGES_DIR, f"{i:03d}.jpg")
+            radar_path = os.path.join(RADAR_DIR, f"{i:03d}.json")
+            camera_path = os.path.join(camera_dir, f"{i:03d}.json")
+            
+            futures = [
+                pool.submit(create_image, bev, lanes, img_path),
+                pool.submit(create_radar_json, bev, velocity, rcs, ids, radar_path),
+            ]
+            # Camera detections are the only remaining consumer of the frame's rng
+            create_camera_json(objects, camera_path, rng)
+            for fut in futures:
+                fut.result()  # Propagate worker exceptions
+            
+            print(f"  Frame {i}: {len(objects)} objects")
     
     # Create auxiliary files
     create_sync_json(NUM_FRAMES, os.path.join(OUTPUT_DIR, "data_sync.json"))
     create_ground_truth(os.path.join(OUTPUT_DIR, "ground_truth.json"))
-    create_vanishing_lines(os.path.join(OUTPUT_DIR, "vanishing_lines.json"))
+    create_vanishing_lines(lanes, os.path.join(OUTPUT_DIR, "vanishing_lines.json"))
     
     print("\n" + "-" * 60)
     print("Ground Truth Parameters:")
@@ -10,6 +10,9 @@ def inspect_db(db_path):
 
     print(f"Inspecting: {db_path}")
     conn = sqlite3.connect(db_path)
+    # Read-side tuning: memory-map the file and allow a larger page cache
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
     cursor = conn.cursor()
 
     # Check tables
@@ -19,30 +22,27 @@ def inspect_db(db_path):
 
     # Check params
     try:
-        cursor.execute("SELECT * FROM calibration_params")
-        rows = cursor.fetchall()
-        print(f"\n--- Calibration Params ({len(rows)}) ---")
-        for r in rows:
+        count = cursor.execute("SELECT COUNT(*) FROM calibration_params").fetchone()[0]
+        print(f"\n--- Calibration Params ({count}) ---")
+        for r in cursor.execute("SELECT * FROM calibration_params"):
             print(r)
     except Exception as e:
         print(f"Error reading params: {e}")
 
     # Check pairs
     try:
-        cursor.execute("SELECT * FROM matched_pairs")
-        rows = cursor.fetchall()
-        print(f"\n--- Matched Pairs ({len(rows)}) ---")
-        for r in rows:
+        count = cursor.execute("SELECT COUNT(*) FROM matched_pairs").fetchone()[0]
+        print(f"\n--- Matched Pairs ({count}) ---")
+        for r in cursor.execute("SELECT * FROM matched_pairs"):
             print(r)
     except Exception as e:
         print(f"Error reading pairs: {e}")
 
     # Check points
     try:
-        cursor.execute("SELECT id, type, data FROM calibration_points")
-        rows = cursor.fetchall()
-        print(f"\n--- Calibration Points ({len(rows)}) ---")
-        for r in rows:
+        count = cursor.execute("SELECT COUNT(*) FROM calibration_points").fetchone()[0]
+        print(f"\n--- Calibration Points ({count}) ---")
+        for r in cursor.execute("SELECT id, type, data FROM calibration_points"):
             print(f"ID: {r[0]}, Type: {r[1]}")
             print(f"Data: {r[2]}")
     except Exception as e:
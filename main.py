@@ -19,8 +19,11 @@ Date: 2026-01-13
 import sys
 import os
 import json
+import math
+import numpy as np
 
 from datetime import datetime
+from typing import List, Optional, Tuple
 
 os.environ["QT_ENABLE_HIGHDPI_SCALING"] = "1"
 
@@ -28,20 +31,15 @@ from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QFrame, QPushButton, QSlider, QLabel, QSplitter, QFileDialog,
     QStatusBar, QDoubleSpinBox, QGroupBox, QMessageBox, QRadioButton,
-    QSizePolicy, QListWidget, QSpinBox
+    QSizePolicy, QListWidget, QListWidgetItem, QSpinBox, QProgressBar, QMenu
 )
-from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QColor, QFont
+from PyQt6.QtCore import Qt, QTimer, QObject, QRunnable, QThreadPool, QSignalBlocker, pyqtSignal
+from PyQt6.QtGui import QColor, QFont, QImage
 
 from config import COLORS, QSS, MAX_POINT_PAIRS
 from backend import DataManager, Calibration, DataExporter
 from viewports import ImageViewport, BEVViewport
-from operations import OperationsController, AppMode
-
-try:
-    from calib_manager import CalibrationManager
-except ImportError:
-    CalibrationManager = None
+from operations import OperationsController, AppMode, PointPair, Lane
 
 try:
     from calib_manager import CalibrationManager
@@ -58,10 +56,146 @@ try:
 except ImportError:
     TrajectoryMatchDialog = None
 
+# Shared defaults for trajectory lookups of unknown ids, so a miss allocates
+# nothing: no points, and no (frame_id, x_bev, y_bev) rows
+_NO_POINTS = ()
+_NO_BEV = np.empty((0, 3))
+_NO_BEV.flags.writeable = False
+
+
+class _PitchWorkerSignals(QObject):
+    """Signals for _PitchWorker (QRunnable is not a QObject)."""
+    
+    finished = pyqtSignal(float)   # New pitch
+    failed = pyqtSignal(str)       # Error message
+
+
+class _PitchWorker(QRunnable):
+    """
+    Runs optimize_pitch on the global thread pool.
+    Works on a detached transformer (param snapshot) and only computes;
+    the result is applied to calib_mgr on the UI thread.
+    """
+    
+    def __init__(self, calib_mgr, pairs, search_range=50):
+        super().__init__()
+        self.setAutoDelete(False)  # Lifetime owned by MainWindow
+        self.signals = _PitchWorkerSignals()
+        self.transformer = calib_mgr.detached_transformer()
+        self.pairs = pairs
+        self.search_range = search_range
+    
+    def run(self):
+        try:
+            new_pitch = self.transformer.optimize_pitch(self.pairs, search_range=self.search_range)
+            self.signals.finished.emit(float(new_pitch))
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+
+
+class _SaveWorkerSignals(QObject):
+    """Signals for _SaveWorker."""
+    
+    finished = pyqtSignal(str)     # Summary, e.g. "3 pairs"
+    failed = pyqtSignal(str)       # Error message
+
+
+class _SaveWorker(QRunnable):
+    """
+    Runs one DataExporter.save_* call on the global thread pool.
+    items are converted with to_row (to_dict / to_list) in the worker too.
+    """
+    
+    def __init__(self, save_fn, items, to_row, directory, summary):
+        super().__init__()
+        self.setAutoDelete(False)  # Lifetime owned by MainWindow
+        self.signals = _SaveWorkerSignals()
+        self.save_fn = save_fn
+        self.items = list(items)   # Snapshot; the UI may keep editing
+        self.to_row = to_row
+        self.directory = directory
+        self.summary = summary
+    
+    def run(self):
+        try:
+            self.save_fn(map(self.to_row, self.items), self.directory)
+            self.signals.finished.emit(self.summary)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+
+
+class _RadarLoadWorkerSignals(QObject):
+    """Signals for _RadarLoadWorker."""
+    
+    progress = pyqtSignal(int, int)  # Files done, total
+    finished = pyqtSignal(int)       # Points loaded
+    failed = pyqtSignal(str)         # Error message
+
+
+class _RadarLoadWorker(QRunnable):
+    """
+    Parses the dataset radar/camera JSON files into the trajectory DB on the
+    global thread pool. SQLite connections are per-thread, so the worker
+    writes through its own TrajectoryDB on the same file.
+    """
+    
+    PROGRESS_EVERY = 20  # Files between progress signals
+    
+    def __init__(self, db_path, data_root):
+        super().__init__()
+        self.setAutoDelete(False)  # Lifetime owned by MainWindow
+        self.signals = _RadarLoadWorkerSignals()
+        self.db_path = db_path
+        self.data_root = data_root
+    
+    def _progress(self, done, total):
+        if done % self.PROGRESS_EVERY == 0:
+            self.signals.progress.emit(done, total)
+    
+    def run(self):
+        try:
+            db = TrajectoryDB(self.db_path)
+            try:
+                count = db.load_all_radar_files(self.data_root, progress=self._progress)
+            finally:
+                db.close()
+            self.signals.finished.emit(count)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+
+
+class _ImageDecodeWorkerSignals(QObject):
+    """Signals for _ImageDecodeWorker."""
+    
+    decoded = pyqtSignal(str, QImage)  # Path, image (null on failure)
+
+
+class _ImageDecodeWorker(QRunnable):
+    """
+    Decodes the next playback frame on the global thread pool. QImage is safe
+    off the GUI thread; the QPixmap is made by ImageViewport.cacheImage.
+    """
+    
+    def __init__(self, path):
+        super().__init__()
+        self.setAutoDelete(False)  # Lifetime owned by MainWindow
+        self.signals = _ImageDecodeWorkerSignals()
+        self.path = path
+    
+    def run(self):
+        self.signals.decoded.emit(self.path, QImage(self.path))
+
 
 class MainWindow(QMainWindow):
     """Main application window."""
     
+    # lbl_pitch looks: none yet / from lanes / from pitch optimization
+    PITCH_STYLES = {
+        'idle': "color: #888; font-family: monospace;",
+        'lanes': "color: #0f0; font-family: monospace; font-weight: bold;",
+        'optimized': "color: #0ff; font-family: monospace; font-weight: bold;",
+    }
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Radar-Camera Fusion Calibration System")
@@ -88,6 +222,65 @@ class MainWindow(QMainWindow):
         self.trajectory_db = TrajectoryDB() if TrajectoryDB else None
         self._trajectory_mode_active = False
         self._match_dialog = None
+        self._matched_pairs = {}        # Persisted (radar_id, camera_id) -> None, DB order
+        self._matched_pairs_cache = {}  # {radar_id: camera_id} for playback
+        self._pair_items = {}           # (radar_id, camera_id) -> trajectory list item
+        self._pair_item_pool = []       # Pair items taken out of the list, for reuse
+        # What the BEV playback trail currently shows: target, the transformer
+        # its points were projected with, the last frame appended, and the
+        # target's trajectory as frame ids + projected (N, 2) BEV points
+        self._trail_cache = {'rid': None, 'transformer': None, 'last_frame': -1,
+                             'frames': np.empty(0), 'bev': np.empty((0, 2))}
+        
+        # Coalesce bursts of parameter edits (spinner arrows, wheel) into one refresh
+        self._param_timer = QTimer(self)
+        self._param_timer.setSingleShot(True)
+        self._param_timer.setInterval(50)
+        self._param_timer.timeout.connect(self._applyParamChange)
+        
+        # While the user is still editing, refresh BEV without the comparison
+        # pairs (image_to_bev per pair); redo a full refresh once edits settle.
+        self._interactive = False
+        self._settle_timer = QTimer(self)
+        self._settle_timer.setSingleShot(True)
+        self._settle_timer.setInterval(250)
+        self._settle_timer.timeout.connect(self._onParamSettled)
+        
+        # Parameter edits are persisted once they have been idle for 500 ms,
+        # so a wheel spin costs one SQLite commit instead of one per step
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(500)
+        self._save_timer.timeout.connect(self._autoSaveState)
+        
+        # Slider value changes within one event loop turn load one batch
+        self._pending_batch = 0
+        self._batch_timer = QTimer(self)
+        self._batch_timer.setSingleShot(True)
+        self._batch_timer.setInterval(0)
+        self._batch_timer.timeout.connect(self._applyPendingBatch)
+        
+        # Frame jumps from trajectory clicks / match dialog previews: rapid
+        # clicks within 30 ms load only the last frame, then draw its overlay
+        self._pending_frame_load = None  # (frame_id, draw callback or None)
+        self._load_timer = QTimer(self)
+        self._load_timer.setSingleShot(True)
+        self._load_timer.setInterval(30)
+        self._load_timer.timeout.connect(self._flushFrameLoad)
+        
+        # Trajectory playback; stopped (not recreated) when a dataset is reloaded
+        self._play_timer = QTimer(self)
+        self._play_timer.timeout.connect(self._play_step)
+        
+        self._prefetch_worker = None  # Running _ImageDecodeWorker
+        self._prefetch_queue = []  # Batch indices still to decode ahead
+        self._pitch_worker = None  # Running _PitchWorker (keeps it alive)
+        self._radar_load_worker = None  # Running _RadarLoadWorker
+        self._save_workers = []    # Running _SaveWorkers
+        self._saved = []           # Summaries of finished save jobs
+        self._last_params = None   # Spin-box values last applied to calib_mgr
+        self._scrubbing = False    # Batch slider is being dragged
+        self._mode_ui_pending = False  # _doUpdateModeUI already scheduled
         
         self._setupUI()
         self._connectSignals()
@@ -95,6 +288,9 @@ class MainWindow(QMainWindow):
         
         # Auto-load saved calibration state
         self._autoLoadState()
+        
+        # Build the (hidden) match dialog once the window is up, not on first click
+        QTimer.singleShot(0, self._precreateMatchDialog)
     
     def _setupUI(self):
         central = QWidget()
@@ -109,6 +305,27 @@ class MainWindow(QMainWindow):
         self.statusbar = QStatusBar()
         self.setStatusBar(self.statusbar)
         self.statusbar.showMessage("Load Sync JSON to start")
+        
+        # Radar DB load progress (driven by _RadarLoadWorker signals)
+        self.load_progress = QProgressBar()
+        self.load_progress.setMaximumWidth(200)
+        self.load_progress.setVisible(False)
+        self.statusbar.addPermanentWidget(self.load_progress)
+    
+    @staticmethod
+    def _addSpin(row, label, lo, hi, value, decimals=None, suffix=None, width=70):
+        """Add a 'label: [spin]' pair to row and return the spin box."""
+        row.addWidget(QLabel(label))
+        spin = QDoubleSpinBox()
+        spin.setRange(lo, hi)
+        if decimals is not None:
+            spin.setDecimals(decimals)
+        spin.setValue(value)
+        if suffix:
+            spin.setSuffix(suffix)
+        spin.setFixedWidth(width)
+        row.addWidget(spin)
+        return spin
     
     def _createTopBar(self, parent):
         bar = QFrame()
@@ -172,52 +389,23 @@ class MainWindow(QMainWindow):
         l4.setSpacing(2)
         # Row 1: H, Pitch(readonly)
         r1 = QHBoxLayout()
-        r1.addWidget(QLabel("H:"))
-        self.spin_h = QDoubleSpinBox()
-        self.spin_h.setRange(0.5, 5.0)
-        self.spin_h.setValue(1.5)
-        self.spin_h.setSuffix("m")
-        self.spin_h.setFixedWidth(70)
-        r1.addWidget(self.spin_h)
+        self.spin_h = self._addSpin(r1, "H:", 0.5, 5.0, 1.5, suffix="m")
         r1.addWidget(QLabel("Pitch:"))
         self.lbl_pitch = QLabel("0.0000")
-        self.lbl_pitch.setStyleSheet("color: #888; font-family: monospace;")
+        self.lbl_pitch.setStyleSheet(self.PITCH_STYLES['idle'])
+        self._pitch_style = 'idle'
         self.lbl_pitch.setFixedWidth(60)
         r1.addWidget(self.lbl_pitch)
         l4.addLayout(r1)
         # Row 2: fx, fy
         r2 = QHBoxLayout()
-        r2.addWidget(QLabel("fx:"))
-        self.spin_fx = QDoubleSpinBox()
-        self.spin_fx.setRange(100, 3000)
-        self.spin_fx.setValue(1000)
-        self.spin_fx.setDecimals(0)
-        self.spin_fx.setFixedWidth(70)
-        r2.addWidget(self.spin_fx)
-        r2.addWidget(QLabel("fy:"))
-        self.spin_fy = QDoubleSpinBox()
-        self.spin_fy.setRange(100, 3000)
-        self.spin_fy.setValue(1000)
-        self.spin_fy.setDecimals(0)
-        self.spin_fy.setFixedWidth(70)
-        r2.addWidget(self.spin_fy)
+        self.spin_fx = self._addSpin(r2, "fx:", 100, 3000, 1000, decimals=0)
+        self.spin_fy = self._addSpin(r2, "fy:", 100, 3000, 1000, decimals=0)
         l4.addLayout(r2)
         # Row 3: cx, cy
         r3 = QHBoxLayout()
-        r3.addWidget(QLabel("cx:"))
-        self.spin_cx = QDoubleSpinBox()
-        self.spin_cx.setRange(0, 2000)
-        self.spin_cx.setValue(640)
-        self.spin_cx.setDecimals(0)
-        self.spin_cx.setFixedWidth(70)
-        r3.addWidget(self.spin_cx)
-        r3.addWidget(QLabel("cy:"))
-        self.spin_cy = QDoubleSpinBox()
-        self.spin_cy.setRange(0, 2000)
-        self.spin_cy.setValue(480)
-        self.spin_cy.setDecimals(0)
-        self.spin_cy.setFixedWidth(70)
-        r3.addWidget(self.spin_cy)
+        self.spin_cx = self._addSpin(r3, "cx:", 0, 2000, 640, decimals=0)
+        self.spin_cy = self._addSpin(r3, "cy:", 0, 2000, 480, decimals=0)
         l4.addLayout(r3)
         lay.addWidget(g4)
         
@@ -226,34 +414,13 @@ class MainWindow(QMainWindow):
         l_radar = QVBoxLayout(g_radar)
         l_radar.setSpacing(2)
         r4 = QHBoxLayout()
-        r4.addWidget(QLabel("Yaw:"))
-        self.spin_yaw = QDoubleSpinBox()
-        self.spin_yaw.setRange(-1, 1)
-        self.spin_yaw.setValue(0)
-        self.spin_yaw.setSuffix(" rad")
-        self.spin_yaw.setDecimals(4)
-        self.spin_yaw.setFixedWidth(90)
-        r4.addWidget(self.spin_yaw)
+        self.spin_yaw = self._addSpin(r4, "Yaw:", -1, 1, 0, decimals=4, suffix=" rad", width=90)
         l_radar.addLayout(r4)
         r5 = QHBoxLayout()
-        r5.addWidget(QLabel("X:"))
-        self.spin_rx = QDoubleSpinBox()
-        self.spin_rx.setRange(-5, 5)
-        self.spin_rx.setValue(0.0)
-        self.spin_rx.setSuffix(" m")
-        self.spin_rx.setDecimals(2)
-        self.spin_rx.setFixedWidth(90)
-        r5.addWidget(self.spin_rx)
+        self.spin_rx = self._addSpin(r5, "X:", -5, 5, 0.0, decimals=2, suffix=" m", width=90)
         l_radar.addLayout(r5)
         r6 = QHBoxLayout()
-        r6.addWidget(QLabel("Y:"))
-        self.spin_ry = QDoubleSpinBox()
-        self.spin_ry.setRange(0, 10)
-        self.spin_ry.setValue(3.5)
-        self.spin_ry.setSuffix(" m")
-        self.spin_ry.setDecimals(2)
-        self.spin_ry.setFixedWidth(90)
-        r6.addWidget(self.spin_ry)
+        self.spin_ry = self._addSpin(r6, "Y:", 0, 10, 3.5, decimals=2, suffix=" m", width=90)
         l_radar.addLayout(r6)
         lay.addWidget(g_radar)
         
@@ -358,8 +525,9 @@ class MainWindow(QMainWindow):
         # Navigation
         self.btn_prev.clicked.connect(lambda: self._goBatch(-1))
         self.btn_next.clicked.connect(lambda: self._goBatch(1))
-        self.slider.valueChanged.connect(self._onSlider)
-        self.slider.sliderMoved.connect(self._onSlider)
+        self.slider.valueChanged.connect(self._onSlider)  # Also fires while dragging (tracking on)
+        self.slider.sliderPressed.connect(self._onSliderPressed)
+        self.slider.sliderReleased.connect(self._onSliderReleased)
         
         # Mode
         self.radio_pair.toggled.connect(self._onModeSwitch)
@@ -372,21 +540,21 @@ class MainWindow(QMainWindow):
         self.btn_opt.clicked.connect(self._onOptimizePitch)
         self.btn_json.clicked.connect(self._onSaveParams)
         
-        # Parameter changes trigger BEV refresh
-        self.spin_h.valueChanged.connect(self._onParamChanged)
-        self.spin_fx.valueChanged.connect(self._onParamChanged)
-        self.spin_fy.valueChanged.connect(self._onParamChanged)
-        self.spin_cx.valueChanged.connect(self._onParamChanged)
-        self.spin_cy.valueChanged.connect(self._onParamChanged)
-        
-        self.spin_yaw.valueChanged.connect(self._onParamChanged)
-        self.spin_rx.valueChanged.connect(self._onParamChanged)
-        self.spin_ry.valueChanged.connect(self._onParamChanged)
+        # Parameter changes trigger BEV refresh (camera, then radar)
+        self._param_spins = [
+            self.spin_h, self.spin_fx, self.spin_fy, self.spin_cx, self.spin_cy,
+            self.spin_yaw, self.spin_rx, self.spin_ry
+        ]
+        for spin in self._param_spins:
+            spin.valueChanged.connect(self._onParamChanged)
         
         # Viewport interactions
-        self.image_vp.radarClicked.connect(self._onRadarClicked)
-        self.image_vp.imageClicked.connect(self._onImageClicked)
-        self.image_vp.clicked.connect(self._onViewportClicked)
+        # Queued: handlers (highlight, BEV refresh) run after the mouse event
+        # has finished dispatching instead of nested inside mousePressEvent
+        queued = Qt.ConnectionType.QueuedConnection
+        self.image_vp.radarClicked.connect(self._onRadarClicked, queued)
+        self.image_vp.imageClicked.connect(self._onImageClicked, queued)
+        self.image_vp.clicked.connect(self._onViewportClicked, queued)
         
         # Trajectory mode
         self.radio_trajectory.toggled.connect(self._onTrajectoryModeToggle)
@@ -398,10 +566,20 @@ class MainWindow(QMainWindow):
     # Data Loading
     # =========================================================================
     def _onLoadSync(self):
+        if self._radar_load_worker:
+            # Its completion would land on the new dataset's DB
+            QMessageBox.information(self, "Info", "Radar files are still being loaded into the database.")
+            return
         path, _ = QFileDialog.getOpenFileName(self, "Open Sync JSON", "", "JSON (*.json)")
         if not path:
             return
         try:
+            if self._play_timer.isActive():
+                self._play_timer.stop()
+                self.btn_play.setText("▶ Play")
+            self._load_timer.stop()
+            self._pending_frame_load = None
+            
             n = self.data_mgr.load_sync_json(path)
             self.slider.setMaximum(n - 1)
             self.slider.setEnabled(True)
@@ -409,30 +587,23 @@ class MainWindow(QMainWindow):
             self.btn_next.setEnabled(True)
             self._loadBatch(0)
             
-            # Playback
-            self._play_timer = QTimer(self)
-            self._play_timer.timeout.connect(self._play_step)
-            self._matched_pairs_cache = {} # {radar_id: camera_id}
-            
             # Initial UI Update DB with dataset path (radar_data.db in same dir as radar folder usually, or data_root)
             # data_mgr.data_root is set by load_sync_json
             db_path = os.path.join(self.data_mgr.data_root, 'radar_data.db')
             print(f"[DB] Initializing database at {db_path}")
             
             # Re-init DB with file path
-            if hasattr(self, 'trajectory_db'):
+            if self.trajectory_db is not None:
+                self._flushAutoSave()
                 self.trajectory_db.close()
             self.trajectory_db = TrajectoryDB(db_path)
+            self._loadMatchedPairs()
             
-            # Load radar files if new DB
+            # Load radar files if new DB; session state is restored once done
             if not self.trajectory_db.loaded:
                 print("[DB] Loading radar files into database...")
-                self.statusbar.showMessage("⏳ Parsing radar files into database...")
-                QApplication.processEvents()
-                count = self.trajectory_db.load_all_radar_files(self.data_mgr.data_root)
-                if count > 0:
-                     self.trajectory_db.loaded = True
-                     self.statusbar.showMessage(f"✅ Loaded {count} points into DB")
+                self._startRadarLoad(lambda count: self._onRadarLoadDone(count, n))
+                return
             
             # Restore previous session state (calibration, points)
             self._autoLoadState()
@@ -441,6 +612,68 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
     
+    def _loadMatchedPairs(self):
+        """Read the persisted matched pairs once; later edits update them in place."""
+        try:
+            self._matched_pairs = dict.fromkeys(self.trajectory_db.get_matched_pairs())
+        except Exception as e:
+            print(f"[TrajectoryDB] Error getting pairs: {e}")
+            self._matched_pairs = {}
+        self._matched_pairs_cache = dict(self._matched_pairs.keys())
+    
+    def _startRadarLoad(self, on_done, on_failed=None):
+        """
+        Parse the dataset radar files into the DB on the thread pool, with
+        progress in the status bar. on_done(count) runs on the UI thread;
+        on_failed() too, after the error is reported, if the load raised.
+        Nothing here pumps the event loop (no processEvents), so handlers
+        such as _applyParamChange are never re-entered mid-load.
+        """
+        self.statusbar.showMessage("⏳ Parsing radar files into database...")
+        self.load_progress.setRange(0, 0)  # Busy until the first progress signal
+        self.load_progress.setVisible(True)
+        self.radio_trajectory.setEnabled(False)  # Re-entering would start a second load
+        
+        self._radar_load_worker = _RadarLoadWorker(self.trajectory_db.db_path, self.data_mgr.data_root)
+        self._radar_load_worker.signals.progress.connect(self._onRadarLoadProgress)
+        self._radar_load_worker.signals.finished.connect(
+            lambda count: self._onRadarLoadFinished(count, on_done))
+        self._radar_load_worker.signals.failed.connect(
+            lambda msg: self._onRadarLoadFailed(msg, on_failed))
+        QThreadPool.globalInstance().start(self._radar_load_worker)
+    
+    def _onRadarLoadProgress(self, done: int, total: int):
+        self.load_progress.setRange(0, total)
+        self.load_progress.setValue(done)
+        self.statusbar.showMessage(f"⏳ Parsing radar files into database... {done}/{total}")
+    
+    def _onRadarLoadFinished(self, count: int, on_done):
+        """Radar DB load finished (worker thread -> UI thread)."""
+        self._radar_load_worker = None
+        self.load_progress.setVisible(False)
+        self.radio_trajectory.setEnabled(True)
+        # The worker wrote through its own connection
+        self.trajectory_db.invalidate_cache()
+        if count > 0:
+            self.trajectory_db.loaded = True
+        on_done(count)
+    
+    def _onRadarLoadDone(self, count: int, n_batches: int):
+        """Initial radar DB load after opening a sync file."""
+        # Restore previous session state (calibration, points)
+        self._autoLoadState()
+        
+        self.statusbar.showMessage(f"Loaded {n_batches} batches and {count} points into DB")
+    
+    def _onRadarLoadFailed(self, msg: str, on_failed=None):
+        self._radar_load_worker = None
+        self.load_progress.setVisible(False)
+        self.radio_trajectory.setEnabled(True)
+        self.statusbar.showMessage("Radar DB load failed")
+        QMessageBox.critical(self, "Error", msg)
+        if on_failed:
+            on_failed()
+    
     def _onLoadCalib(self):
         if self.calibration.loaded:
             QMessageBox.information(self, "Info", "Calibration already loaded!")
@@ -468,13 +701,10 @@ class MainWindow(QMainWindow):
         if not item:
             return
             
-        import re
-        match = re.match(r'🔗 R(\d+)↔C(\d+)', item.text())
-        if match:
-            rid = int(match.group(1))
-            cid = int(match.group(2))
+        ids = self._pairItemIds(item)
+        if ids:
+            rid, cid = ids
             
-            from PyQt6.QtWidgets import QMenu
             menu = QMenu(self)
             action_unbind = menu.addAction("❌ Unbind Pair")
             action = menu.exec(self.trajectory_list.mapToGlobal(pos))
@@ -482,25 +712,53 @@ class MainWindow(QMainWindow):
             if action == action_unbind:
                 self._unbindPair(rid, cid)
 
+    def _addPairItem(self, rid: int, cid: int, row: Optional[int] = None) -> QListWidgetItem:
+        """Add a trajectory list row for a matched pair; (rid, cid) kept in UserRole."""
+        if self._pair_item_pool:
+            item = self._pair_item_pool.pop()
+            item.setText(f"🔗 R{rid}↔C{cid}")
+        else:
+            item = QListWidgetItem(f"🔗 R{rid}↔C{cid}")
+        item.setData(Qt.ItemDataRole.UserRole, (rid, cid))
+        if row is None:
+            self.trajectory_list.addItem(item)
+        else:
+            self.trajectory_list.insertItem(row, item)
+        self._pair_items[(rid, cid)] = item
+        return item
+    
+    def _clearTrajectoryList(self):
+        """Empty the trajectory list, keeping the pair items for _addPairItem."""
+        lst = self.trajectory_list
+        for row in range(lst.count() - 1, -1, -1):  # From the end: no row shifting
+            item = lst.takeItem(row)
+            if self._pairItemIds(item):
+                self._pair_item_pool.append(item)
+        self._pair_items.clear()
+    
+    @staticmethod
+    def _pairItemIds(item) -> Optional[Tuple[int, int]]:
+        """(rid, cid) of a matched-pair row, or None for other rows."""
+        # Every pair row is made by _addPairItem, so the ids never need parsing
+        return item.data(Qt.ItemDataRole.UserRole)
+
     def _unbindPair(self, rid, cid):
         """Unbind a pair."""
         # Delete from DB
         try:
-            self.trajectory_db.cursor.execute(
-                "DELETE FROM matched_pairs WHERE radar_id=? AND camera_id=?", 
-                (rid, cid)
-            )
-            self.trajectory_db.conn.commit()
+            self.trajectory_db.remove_matched_pair(rid, cid)
             print(f"[TrajectoryDB] Unbound pair R{rid}↔C{cid}")
             
             # Update Cache
-            if rid in self._matched_pairs_cache:
+            self._matched_pairs.pop((rid, cid), None)
+            if self._matched_pairs_cache.get(rid) == cid:
                 del self._matched_pairs_cache[rid]
                 
-            # Update List UI
-            # We just re-enter mode to refresh list easily
-            self.trajectory_list.clear()
-            self._enterTrajectoryMode()
+            # Update List UI - drop just this row (no trajectory reload)
+            item = self._pair_items.pop((rid, cid), None)
+            if item is not None:
+                self.trajectory_list.takeItem(self.trajectory_list.row(item))
+                self._pair_item_pool.append(item)
             
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to unbind: {e}")
@@ -511,10 +769,50 @@ class MainWindow(QMainWindow):
             self.slider.setValue(new_idx)
     
     def _onSlider(self, val: int):
-        if val != self.ops.current_batch:
-            self._loadBatch(val)
+        self._pending_batch = val
+        self._batch_timer.start()
+    
+    def _applyPendingBatch(self):
+        if self._pending_batch != self.ops.current_batch:
+            self._loadBatch(self._pending_batch)
+    
+    def _seekFrame(self, frame_id: int, draw=None):
+        """Debounced jump to frame_id; draw() runs once the batch is loaded."""
+        self._pending_frame_load = (frame_id, draw)
+        self._load_timer.start()
+    
+    def _flushFrameLoad(self):
+        if self._pending_frame_load is None:
+            return
+        frame_id, draw = self._pending_frame_load
+        self._pending_frame_load = None
+        # Move the slider without its valueChanged -> _onSlider reload
+        with QSignalBlocker(self.slider):
+            self.slider.setValue(frame_id)
+        self._loadBatch(frame_id)
+        if draw is not None:
+            draw()
+    
+    def _onSliderPressed(self):
+        """Scrubbing started - show downsampled previews while dragging."""
+        self._scrubbing = True
+    
+    def _onSliderReleased(self):
+        """Scrubbing ended - swap the preview for the full-res image."""
+        self._scrubbing = False
+        img_path = self.data_mgr.image_path(self.ops.current_batch)
+        if img_path:
+            self.image_vp.loadImage(img_path)
+        self._prefetchNeighbours(self.ops.current_batch)
+    
+    def _isPlaying(self) -> bool:
+        return self._play_timer.isActive()
     
     def _loadBatch(self, idx: int):
+        if self._isPlaying():
+            self._loadBatchFast(idx)
+            return
+        
         self.ops.current_batch = idx
         self.ops.cancel()  # Cancel any pending operation
         
@@ -532,18 +830,15 @@ class MainWindow(QMainWindow):
         
         # Load image
         if img_path:
-            self.image_vp.loadImage(img_path)
+            self.image_vp.loadImage(img_path, preview=self._scrubbing)
+        if not self._scrubbing:
+            self._prefetchNeighbours(idx)
         
-        # Load radar (using refresh for correct coordinates)
+        # Load radar into BEV and project it to the image
         if radar_data:
-             # If Playing, hide background to show only selected target
-             if self.btn_play.text() == "⏸ Pause":
-                 self.bev_vp.clearAll()
-             else:
-                 self._refreshBEV()
-        
-        # Project radar to image
-        self._projectRadar()
+            self._recomputeGeometry()
+        else:
+            self._projectRadar()
         
         # Redraw existing pairs/lanes for this batch
         self._redrawPairs()
@@ -564,8 +859,85 @@ class MainWindow(QMainWindow):
         
         self._updateModeUI()
     
-    def _refreshBEV(self):
-        """Refresh BEV display."""
+    def _loadBatchFast(self, idx: int):
+        """
+        _loadBatch during playback: the BEV background stays hidden, pair/lane
+        markers are only rebuilt when the old or new batch has any, and the
+        next frame is decoded ahead on the thread pool.
+        """
+        prev = self.ops.current_batch
+        self.ops.current_batch = idx
+        self.ops.cancel()
+        
+        img_path, radar_data = self.data_mgr.get_batch(idx)
+        
+        self.image_vp.clearRadarMarkers()
+        self.image_vp.clearPreview()
+        self.image_vp.clearPendingRadar()
+        # Hide background to show only the selected target
+        self.bev_vp.clearAll()
+        
+        if img_path:
+            self.image_vp.loadImage(img_path)
+        self._prefetchImages([idx + 1])
+        
+        self._projectRadar()
+        
+        if self.ops.has_marks_for_batch(prev) or self.ops.has_marks_for_batch(idx):
+            self._redrawPairs()
+            self._redrawLanes()
+        
+        if self.radio_trajectory.isChecked() and self._current_trajectory_id is not None:
+            self._visualizeTrajectoryAtFrame(idx, radar_data)
+        
+        self.lbl_batch.setText(f"{idx + 1}/{self.data_mgr.num_batches}")
+        if self.radio_pair.isChecked():
+            self.ops.start_pair_selection()
+        else:
+            self.ops.start_lane_drawing()
+        self._updateModeUI()
+    
+    def _prefetchNeighbours(self, idx: int):
+        """Decode the frames around idx while the user is looking at it."""
+        self._prefetchImages([idx + 1, idx - 1, idx + 2, idx - 2])
+    
+    def _prefetchImages(self, indices: List[int]):
+        """Decode batch images in the background, one at a time; replaces the queue."""
+        self._prefetch_queue = list(indices)
+        self._startPrefetch()
+    
+    def _startPrefetch(self):
+        while self._prefetch_worker is None and self._prefetch_queue:
+            path = self.data_mgr.image_path(self._prefetch_queue.pop(0))
+            if not path or self.image_vp.hasCachedImage(path):
+                continue
+            self._prefetch_worker = _ImageDecodeWorker(path)
+            self._prefetch_worker.signals.decoded.connect(self._onImageDecoded)
+            QThreadPool.globalInstance().start(self._prefetch_worker)
+    
+    def _onImageDecoded(self, path: str, image: QImage):
+        self._prefetch_worker = None
+        self.image_vp.cacheImage(path, image)
+        self._startPrefetch()
+    
+    def _recomputeGeometry(self):
+        """
+        _refreshBEV + _projectRadar, with the radar points transformed to BEV
+        and image in one batched pass shared by both views.
+        """
+        radar_bev = uv = None
+        xy = self.data_mgr.current_radar_xy
+        if self.calib_mgr and self.calibration.loaded and len(xy):
+            radar_bev, uv, _ = self.calib_mgr.radar_to_bev_image_batch(xy)
+        self._refreshBEV(radar_bev=radar_bev)
+        self._projectRadar(uv=uv)
+    
+    def _refreshBEV(self, full: bool = True, radar_bev: Optional[np.ndarray] = None):
+        """
+        Refresh BEV display.
+        full=False skips the comparison pairs (fast preview while editing params).
+        radar_bev: current radar points already in BEV (see _recomputeGeometry).
+        """
         # print("[DEBUG] _refreshBEV called")
         if not self.calib_mgr:
             return
@@ -574,34 +946,37 @@ class MainWindow(QMainWindow):
         self.bev_vp.clearAll()
         
         # 1. Re-add radar points
-        if self.data_mgr.current_batch >= 0:
-            _, radar_data = self.data_mgr.get_batch(self.data_mgr.current_batch)
-            if radar_data:
-                for target in radar_data.get('targets', []):
-                    x_bev, y_bev = self.calib_mgr.radar_to_bev(target['x'], target['y'])
-                    self.bev_vp.addRadarBEVPoint(x_bev, y_bev, f"R{target.get('id')}")
+        # (data_mgr.current_* were filled by get_batch in _loadBatch)
+        if self.data_mgr.current_batch >= 0 and self.data_mgr.current_radar_ids:
+            bev = radar_bev
+            if bev is None:
+                bev = self.calib_mgr.radar_to_bev_batch(self.data_mgr.current_radar_xy)
+            self.bev_vp.addRadarBEVPoints(
+                bev, self.data_mgr.current_radar_labels, ids=self.data_mgr.current_radar_ids)
         
         # 2. Re-add pair markers (Rings) - CRITICAL for user feedback
-        for i, pair in self.ops.get_pairs_for_batch(self.ops.current_batch):
-            # Recalculate BEV position based on potentially new parameters
-            radar_bev = self.calib_mgr.radar_to_bev(pair.radar_x, pair.radar_y)
-            self.bev_vp.addPairMarker(radar_bev[0], radar_bev[1], i)
+        # Recalculate BEV positions based on potentially new parameters
+        indices, pair_xy = self.ops.get_pair_xy_for_batch(self.ops.current_batch)
+        pair_bev = self.calib_mgr.radar_to_bev_batch(pair_xy[:, :2])
+        self.bev_vp.addPairMarkers(pair_bev, indices)
+        pair_bev = pair_bev.tolist()
         
         # 3. Re-add point pairs (comparison)
-        if self.calib_mgr.camera.pitch != 0:
-            for i, pair in self.ops.get_pairs_for_batch(self.ops.current_batch):
+        if full and self.calib_mgr.camera.pitch != 0:
+            img_bev, img_valid = self.calib_mgr.image_to_bev_batch(pair_xy[:, 2:])
+            for i, r_bev, i_bev, ok in zip(indices, pair_bev, img_bev.tolist(), img_valid.tolist()):
+                if not ok:
+                    continue
                 try:
-                    r_bev = self.calib_mgr.radar_to_bev(pair.radar_x, pair.radar_y)
-                    i_bev = self.calib_mgr.image_to_bev(pair.pixel_u, pair.pixel_v)
-                    if r_bev and i_bev:
-                        self.bev_vp.addComparisonPair(r_bev, i_bev, i)
+                    self.bev_vp.addComparisonPair(tuple(r_bev), tuple(i_bev), i)
                 except Exception as e:
                     print(f"Error refreshing pair {i}: {e}")
     
-    def _projectRadar(self):
+    def _projectRadar(self, uv: Optional[np.ndarray] = None):
         """
         Project radar points onto image.
         Requires calibration to be loaded first.
+        uv: projections already computed by _recomputeGeometry.
         """
         if not self.calibration.loaded:
             return
@@ -614,41 +989,41 @@ class MainWindow(QMainWindow):
         if self.data_mgr.current_batch < 0:
             return
             
-        _, radar_data = self.data_mgr.get_batch(self.data_mgr.current_batch)
+        radar_data = self.data_mgr.current_radar_data
         if not radar_data:
             return
         
-        for t in radar_data.get('targets', []):
-            rx, ry = t['x'], t['y']
-            
-            # Use Geometric Projection since we have corrected it
-            # This allows slider tuning.
-            # Ideally, self.calibration.loaded implies we have a base to work from.
-            x_bev, y_bev = self.calib_mgr.radar_to_bev(rx, ry)
-            result = self.calib_mgr.bev_to_image(x_bev, y_bev)
-            
-            if result:
-                u, v = result
-                if -2000 < u < 4000 and -2000 < v < 4000:
-                    self.image_vp.addRadarProjection(u, v, t)
+        targets = radar_data.get('targets', [])
+        if not targets:
+            return
+        
+        # Use Geometric Projection since we have corrected it
+        # This allows slider tuning.
+        # Ideally, self.calibration.loaded implies we have a base to work from.
+        if uv is None:
+            uv, _ = self.calib_mgr.radar_to_image_batch(self.data_mgr.current_radar_xy)
+        
+        # -2000 < u, v < 4000 as one |x - 1000| < 3000 test; invalid rows are NaN -> False
+        mask = (np.abs(uv - 1000.0) < 3000.0).all(axis=1)
+        idxs = np.flatnonzero(mask)
+        self.image_vp.addRadarProjections(uv[idxs], [targets[i] for i in idxs.tolist()])
     
     def _redrawPairs(self):
         """Redraw pair markers for current batch."""
         self.image_vp.clearPairMarkers()
         self.bev_vp.clearPairs()
         
-        for i, pair in self.ops.get_pairs_for_batch(self.ops.current_batch):
-            # Radar position marker
-            self.image_vp.addPairMarker(pair.radar_u, pair.radar_v, i, is_radar=True)
-            # Image position marker
-            self.image_vp.addPairMarker(pair.pixel_u, pair.pixel_v, i, is_radar=False)
-            # BEV marker
-            if self.calib_mgr:
-                radar_bev = self.calib_mgr.radar_to_bev(pair.radar_x, pair.radar_y)
-                self.bev_vp.addPairMarker(radar_bev[0], radar_bev[1], i)
-            else:
-                # Fallback if no calib manager (shouldn't happen)
-                self.bev_vp.addPairMarker(pair.radar_x, pair.radar_y, i)
+        # [radar_u, radar_v, pixel_u, pixel_v, radar_x, radar_y] per pair
+        indices, cols = self.ops.get_pair_array_for_batch(self.ops.current_batch)
+        if self.calib_mgr:
+            pair_bev = self.calib_mgr.radar_to_bev_batch(cols[:, 4:6])
+        else:
+            # Fallback if no calib manager (shouldn't happen)
+            pair_bev = cols[:, 4:6]
+        
+        # Radar + image position markers, then BEV markers
+        self.image_vp.addPairMarkers(cols, indices)
+        self.bev_vp.addPairMarkers(pair_bev, indices)
     
     def _redrawLanes(self):
         """Redraw lane markers for current batch."""
@@ -661,6 +1036,13 @@ class MainWindow(QMainWindow):
     # =========================================================================
     # Mode Management
     # =========================================================================
+    def _setPitchLabel(self, pitch: float, style: str):
+        """Show pitch; the stylesheet is only re-applied when the state changes."""
+        self.lbl_pitch.setText(f"{pitch:.4f}")
+        if style != self._pitch_style:
+            self._pitch_style = style
+            self.lbl_pitch.setStyleSheet(self.PITCH_STYLES[style])
+    
     def _onComputePitch(self):
         """Compute pitch from lane lines."""
         print("[DEBUG] _onComputePitch called")
@@ -675,10 +1057,8 @@ class MainWindow(QMainWindow):
         try:
             pitch = self.calib_mgr.compute_pitch_from_lanes(self.ops.lanes)
             if pitch:
-                import numpy as np
-                self.lbl_pitch.setText(f"{pitch:.4f}")
-                self.lbl_pitch.setStyleSheet("color: #0f0; font-family: monospace; font-weight: bold;")
-                self.statusbar.showMessage(f"✅ Pitch: {pitch:.4f} rad ({np.degrees(pitch):.2f}°)")
+                self._setPitchLabel(pitch, 'lanes')
+                self.statusbar.showMessage(f"✅ Pitch: {pitch:.4f} rad ({math.degrees(pitch):.2f}°)")
                 print(f"[DEBUG] Pitch computed: {pitch}")
                 self._refreshBEV()
                 self._autoSaveState()  # Auto-save after pitch calculation
@@ -702,21 +1082,37 @@ class MainWindow(QMainWindow):
                 
             n = len(pairs)
             self.statusbar.showMessage(f"Optimizing pitch using {n} pairs...")
-            QApplication.processEvents() # Update UI
-            
-            new_pitch = self.calib_mgr.optimize_pitch(pairs, search_range=50)
-            
-            self.lbl_pitch.setText(f"{new_pitch:.4f}")
-            self.lbl_pitch.setStyleSheet("color: #0ff; font-family: monospace; font-weight: bold;")
-            self.statusbar.showMessage(f"✨ Optimized Pitch: {new_pitch:.4f} rad (from {n} pairs)")
             
-            self._refreshBEV()
-            self._projectRadar()  # Refresh green dots on image
-            self._autoSaveState()  # Auto-save after optimization
-            QMessageBox.information(self, "Success", f"Pitch optimized using {n} pairs.\nNew Pitch: {new_pitch:.5f}")
+            # Run the sweep off the UI thread; button stays disabled until done
+            self.btn_opt.setEnabled(False)
+            self._pitch_worker = _PitchWorker(self.calib_mgr, pairs, search_range=50)
+            self._pitch_worker.signals.finished.connect(
+                lambda new_pitch: self._onPitchOptimized(new_pitch, n))
+            self._pitch_worker.signals.failed.connect(self._onPitchOptimizeFailed)
+            QThreadPool.globalInstance().start(self._pitch_worker)
             
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
+    
+    def _onPitchOptimized(self, new_pitch: float, n: int):
+        """Pitch optimization finished (worker thread -> UI thread)."""
+        self._pitch_worker = None
+        self.btn_opt.setEnabled(True)
+        
+        self.calib_mgr.update_camera_params(pitch=new_pitch)
+        self._setPitchLabel(new_pitch, 'optimized')
+        self.statusbar.showMessage(f"✨ Optimized Pitch: {new_pitch:.4f} rad (from {n} pairs)")
+        
+        self._recomputeGeometry()  # BEV + green dots on image
+        self._autoSaveState()  # Auto-save after optimization
+        QMessageBox.information(self, "Success", f"Pitch optimized using {n} pairs.\nNew Pitch: {new_pitch:.5f}")
+    
+    def _onPitchOptimizeFailed(self, msg: str):
+        """Pitch optimization raised in the worker."""
+        self._pitch_worker = None
+        self.btn_opt.setEnabled(True)
+        self.statusbar.showMessage("Pitch optimization failed")
+        QMessageBox.critical(self, "Error", msg)
 
     def _onSaveParams(self):
         """Save camera parameters to JSON."""
@@ -754,6 +1150,16 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to save params: {e}")
     
+    def _flushAutoSave(self):
+        """Run a pending debounced auto-save now (before the DB goes away)."""
+        if self._save_timer.isActive():
+            self._save_timer.stop()
+            self._autoSaveState()
+    
+    def closeEvent(self, event):
+        self._flushAutoSave()
+        super().closeEvent(event)
+    
     def _autoSaveState(self):
         """Auto-save calibration state and points to DB (persistent)."""
         if not self.calib_mgr: 
@@ -774,68 +1180,85 @@ class MainWindow(QMainWindow):
             'y_offset': self.spin_ry.value()
         }
         
-        # Save to DB
+        # Save to DB (params + points in one transaction)
         if self.trajectory_db:
-             self.trajectory_db.save_calibration_state(cam_params, radar_params)
-             
-             # Save points (convert PointPair objects to dicts)
-             if hasattr(self, 'ops'):
-                 pair_dicts = [p.to_dict() for p in self.ops.pairs]
-                 self.trajectory_db.save_calibration_points(pair_dicts)
+             # Convert PointPair objects to dicts
+             pair_dicts = [p.to_dict() for p in self.ops.pairs]
+             self.trajectory_db.save_session_state(cam_params, radar_params, pair_dicts)
                  
              print(f"[AUTO-SAVE] Saved state to DB")
     
     def _autoLoadState(self):
         """Auto-load calibration state and points from DB (persistent)."""
-        if not hasattr(self, 'trajectory_db') or not self.trajectory_db:
+        if self.trajectory_db is None:
              return
              
         try:
             cam, radar = self.trajectory_db.load_calibration_state()
             
             if self.calib_mgr:
-                if cam:
-                    self.calib_mgr.update_camera_params(**cam)
-                    # Update UI
-                    self.spin_h.setValue(cam.get('height', 1.5))
-                    self.spin_fx.setValue(int(cam.get('fx', 1000)))
-                    self.spin_fy.setValue(int(cam.get('fy', 1000)))
-                    self.spin_cx.setValue(int(cam.get('cx', 640)))
-                    self.spin_cy.setValue(int(cam.get('cy', 480)))
-                    # Pitch is special
-                    if 'pitch' in cam:
-                        self.calib_mgr.camera_pitch = cam['pitch']
-                        self.lbl_pitch.setText(f"{cam['pitch']:.4f}")
+                # Params are applied to calib_mgr directly; keep the spin-box
+                # updates below from re-triggering _onParamChanged
+                blockers = [QSignalBlocker(spin) for spin in self._param_spins]
+                try:
+                    if cam:
+                        self.calib_mgr.update_camera_params(**cam)
+                        # Update UI
+                        self.spin_h.setValue(cam.get('height', 1.5))
+                        self.spin_fx.setValue(int(cam.get('fx', 1000)))
+                        self.spin_fy.setValue(int(cam.get('fy', 1000)))
+                        self.spin_cx.setValue(int(cam.get('cx', 640)))
+                        self.spin_cy.setValue(int(cam.get('cy', 480)))
+                        # Pitch is special
+                        if 'pitch' in cam:
+                            self.calib_mgr.camera_pitch = cam['pitch']
+                            self.lbl_pitch.setText(f"{cam['pitch']:.4f}")
                         
-                if radar:
-                    self.calib_mgr.update_radar_params(**radar)
-                    # Update UI
-                    self.spin_yaw.setValue(radar.get('yaw', 0))
-                    self.spin_rx.setValue(radar.get('x_offset', 0))
-                    self.spin_ry.setValue(radar.get('y_offset', 3.5))
+                    if radar:
+                        self.calib_mgr.update_radar_params(**radar)
+                        # Update UI
+                        self.spin_yaw.setValue(radar.get('yaw', 0))
+                        self.spin_rx.setValue(radar.get('x_offset', 0))
+                        self.spin_ry.setValue(radar.get('y_offset', 3.5))
+                finally:
+                    for blocker in blockers:
+                        blocker.unblock()
+                # The spins clamp/round the saved values (yaw to +-1, fx..cy to
+                # int); apply what they show so calib_mgr matches the UI
+                self._pushSpinParams()
+                self._last_params = tuple(spin.value() for spin in self._param_spins)
+                # The blocked spins queued no apply: this is the one explicit
+                # refresh for the whole batch (restores a pending selection's
+                # highlight like _applyParamChange; the radar load can finish
+                # mid-selection)
+                self._recomputeGeometry()
+                if self.ops.pending_radar:
+                    self.image_vp.highlightPendingRadar(self.ops.pending_radar.target)
+                    self.bev_vp.highlightRadarMarker(self.ops.pending_radar.target)
             
             # Load points
             points_data = self.trajectory_db.load_calibration_points()
-            if points_data and hasattr(self, 'ops'):
+            if points_data:
                 self.ops.restore_points(points_data)
                 self._redrawPairs() # To show them on screen
                 
             self.statusbar.showMessage("📂 Loaded calibration state from DB")
             print(f"[AUTO-LOAD] State loaded from DB. {len(points_data)} points restored.")
             
-            # Show popup after a short delay
-            from PyQt6.QtCore import QTimer
-            QTimer.singleShot(1000, lambda: self.statusbar.showMessage("✅ Calibration state & points auto-loaded", 5000))
-            
         except Exception as e:
             print(f"[AUTO-LOAD] Error: {e}")
     
     def _onParamChanged(self):
-        """Handle parameter changes - update and refresh BEV."""
-        # print("[PARAM] _onParamChanged called")
-        if not self.calib_mgr:
-            return
-        
+        """Handle parameter changes - (re)start the debounce timer."""
+        if (not self._param_timer.isActive() and
+                tuple(spin.value() for spin in self._param_spins) == self._last_params):
+            return  # Back at the applied values, nothing to refresh or save
+        self._interactive = True
+        self._param_timer.start()
+        self._settle_timer.start()
+    
+    def _pushSpinParams(self):
+        """Copy the spin-box values into calib_mgr (pitch is preserved)."""
         # Update camera params (preserve pitch!)
         self.calib_mgr.update_camera_params(
             height=self.spin_h.value(),
@@ -851,6 +1274,22 @@ class MainWindow(QMainWindow):
             x_offset=self.spin_rx.value(),
             y_offset=self.spin_ry.value()
         )
+    
+    def _applyParamChange(self):
+        """
+        Apply debounced parameter changes - update and refresh BEV.
+        Not re-entrant: nothing called from here may pump the event loop.
+        """
+        # print("[PARAM] _applyParamChange called")
+        if not self.calib_mgr:
+            return
+        
+        # Skip the rebuild if nothing actually changed since the last apply
+        params = tuple(spin.value() for spin in self._param_spins)
+        if params == self._last_params:
+            return
+        self._last_params = params
+        self._pushSpinParams()
         
         # Refresh Image Projection (green dots)
         # User requested to disable image projection update during param change
@@ -862,15 +1301,28 @@ class MainWindow(QMainWindow):
              # _projectRadar clears markers, so we grab the new one
              self.image_vp.highlightPendingRadar(self.ops.pending_radar.target)
 
-        # Refresh BEV
-        self._refreshBEV()
+        # Refresh BEV (fast preview while the user is still editing)
+        self._refreshBEV(full=not self._interactive)
         
         # Restore BEV highlight (since refresh clears it)
         if self.ops.pending_radar:
             self.bev_vp.highlightRadarMarker(self.ops.pending_radar.target)
             
-        # Auto-save immediately on any parameter change
-        self._autoSaveState()
+        # Auto-save once the edits settle (see _save_timer)
+        self._save_timer.start()
+    
+    def _onParamSettled(self):
+        """
+        Parameter edits stopped - redo the full BEV refresh incl. comparison pairs.
+        Both timers restart on every edit and this one is longer, so the latest
+        edit has always been applied by now.
+        """
+        self._interactive = False
+        if not self.calib_mgr:
+            return
+        self._refreshBEV(full=True)
+        if self.ops.pending_radar:
+            self.bev_vp.highlightRadarMarker(self.ops.pending_radar.target)
 
     
     def _togglePlayback(self):
@@ -880,7 +1332,7 @@ class MainWindow(QMainWindow):
             self.btn_play.setText("▶ Play")
             
             # Restore Static View
-            self.bev_vp.clearTrails() # Clear trails
+            self._clearTrail()
             if self._current_trajectory_id is not None:
                 self._onTrajectoryIdSelected(self._current_trajectory_id)
                 
@@ -922,6 +1374,11 @@ class MainWindow(QMainWindow):
             # Stop at end (No Loop)
             self._togglePlayback()
             
+    def _clearTrail(self):
+        """Remove the BEV playback trail; the next frame redraws it from the start."""
+        self.bev_vp.clearTrails()
+        self._trail_cache['rid'] = None
+    
     def _visualizeTrajectoryAtFrame(self, frame_id, radar_data):
         """Visualize specific trajectory targets at current frame."""
         try:
@@ -930,23 +1387,30 @@ class MainWindow(QMainWindow):
                 return
                 
 
-            # 1. Trail Logic (Query history for BEV trail)
+            # 1. Trail Logic: append only the frames revealed since the last
+            # call; start over on a new target, a backwards seek or new params.
+            # The whole trajectory is projected once per start, so ticks
+            # only slice it (no DB query)
             try:
-                # Get points up to current frame for trail
-                # Table: radar_trajectories (id, frame_id, target_id, x, y, ...)
-                self.trajectory_db.cursor.execute(
-                    "SELECT x, y FROM radar_trajectories WHERE target_id=? AND frame_id <= ? ORDER BY frame_id ASC",
-                    (rid, frame_id)
-                )
-                trail_points = self.trajectory_db.cursor.fetchall() # list of (x, y)
-                if trail_points:
-                     # Transform to BEV if calibration available
-                     if self.calib_mgr:
-                         trail_points_bev = [self.calib_mgr.radar_to_bev(p[0], p[1]) for p in trail_points]
-                         self.bev_vp.drawTrajectoryTrail(trail_points_bev, QColor(0, 255, 255))
-                     else:
-                         # Fallback raw (pass as is, viewports might interpret)
-                         self.bev_vp.drawTrajectoryTrail(trail_points, QColor(0, 255, 255))
+                cache = self._trail_cache
+                transformer = self.calib_mgr.transformer if self.calib_mgr else None
+                if (cache['rid'] != rid or cache['transformer'] is not transformer
+                        or frame_id < cache['last_frame']):
+                    self.bev_vp.clearTrails()
+                    traj = np.asarray(self._all_trajectories.get(rid, _NO_POINTS),
+                                      dtype=np.float64).reshape(-1, 3)  # (frame_id, x, y), by frame
+                    bev = traj[:, 1:]
+                    # Transform to BEV if calibration available
+                    if self.calib_mgr:
+                        bev = self.calib_mgr.radar_to_bev_batch(bev)
+                    cache.update(rid=rid, transformer=transformer, last_frame=-1,
+                                 frames=traj[:, 0], bev=bev)
+                frames = cache['frames']
+                lo = np.searchsorted(frames, cache['last_frame'], side='right')
+                hi = np.searchsorted(frames, frame_id, side='right')
+                cache['last_frame'] = max(cache['last_frame'], frame_id)
+                if hi > lo:
+                     self.bev_vp.appendTrajectoryTrail(cache['bev'][lo:hi], QColor(0, 255, 255))
             except Exception as e:
                 print(f"Error drawing trail: {e}")
 
@@ -967,66 +1431,54 @@ class MainWindow(QMainWindow):
         c_pt = None
         if cid is not None:
             # Query DB for camera point at this frame
-            # We need a helper in TrajectoryDB, or just direct query
             try:
-                self.trajectory_db.cursor.execute(
-                    "SELECT u, v, w, h FROM camera_trajectories WHERE target_id=? AND batch_id=?", 
-                    (cid, frame_id)
-                )
-                row = self.trajectory_db.cursor.fetchone()
+                row = self.trajectory_db.get_camera_point_at_frame(cid, frame_id)
                 if row:
-                    c_pt = {'u': row[0], 'v': row[1], 'w': row[2], 'h': row[3]}
+                    c_pt = {'u': row[0], 'v': row[1]}
             except Exception as e:
                 print(f"Error querying camera pt: {e}")
 
-        # 3. Draw
-        # Highlight Radar in BEV
-        if r_pt:
-            # Highlight in BEV (Flash color)
-            # Use custom head drawing because standard markers are hidden
-            rx_val = r_pt.get('x')
-            ry_val = r_pt.get('y')
-            if rx_val is not None and ry_val is not None:
-                if self.calib_mgr:
-                    tx, ty = self.calib_mgr.radar_to_bev(rx_val, ry_val)
-                    self.bev_vp.drawTrajectoryHead(tx, ty, QColor(0, 255, 255)) # Cyan Head
-                else:
-                    self.bev_vp.drawTrajectoryHead(rx_val, ry_val, QColor(0, 255, 255)) # Cyan Head
-            
-            # Highlight in Image (Project it)
-            # _projectRadar already drew green dots. We overwrite/add special marker.
-            # We need world coords.
-            rx = r_pt.get('x', 0)
-            ry = r_pt.get('y', 0)
-            # Use calib_mgr to project
-            if self.calib_mgr and self.calib_mgr.is_calibrated: # Check calib_mgr exists
-                # Chain: Radar -> BEV -> Image
-                tx, ty = self.calib_mgr.transformer.radar_to_bev(rx, ry)
-                u, v = self.calib_mgr.transformer.bev_to_image(tx, ty)
-                
-                if 0 <= u < self.calib_mgr.camera.cx * 2 and 0 <= v < self.calib_mgr.camera.cy * 2:
-                    # Use existing method in ImageViewport
-                    self.image_vp.showTrajectoryProjection(u, v, rid)
+        # 3. Draw; the image overlay changes cost one repaint
+        self.image_vp.beginOverlayBatch()
+        try:
+            self.image_vp.clearTrajectoryProjection()
+        
+            # Highlight Radar in BEV and Image; the point is projected once
+            calib = self.calib_mgr
+            uv_r = None
+            if r_pt:
+                # Highlight in BEV (Flash color)
+                # Use custom head drawing because standard markers are hidden
+                rx = r_pt.get('x')
+                ry = r_pt.get('y')
+                if rx is not None and ry is not None:
+                    if calib:
+                        tx, ty = calib.radar_to_bev(rx, ry)
+                        self.bev_vp.drawTrajectoryHead(tx, ty, QColor(0, 255, 255)) # Cyan Head
+                        # Chain: Radar -> BEV -> Image (None behind the camera)
+                        if calib.is_calibrated:
+                            uv_r = calib.bev_to_image(tx, ty)
+                    else:
+                        self.bev_vp.drawTrajectoryHead(rx, ry, QColor(0, 255, 255)) # Cyan Head
+            
+                # Highlight in Image
+                # _projectRadar already drew green dots. We overwrite/add special marker.
+                if uv_r is not None:
+                    u, v = uv_r
+                    if 0 <= u < calib.camera.cx * 2 and 0 <= v < calib.camera.cy * 2:
+                        # Use existing method in ImageViewport
+                        self.image_vp.showTrajectoryProjection(u, v, rid)
 
-        # Highlight Camera in Image
-        if c_pt:
-            # Draw box or cross
-            u, v = c_pt['u'], c_pt['v']
-            w, h = c_pt['w'], c_pt['h']
-            # Draw rect? Helper addRect? 
-            # ImageViewport doesn't have addRect. Use addPairMarker for center.
-            self.image_vp.addPairMarker(u + w/2, v + h/2, f"C{cid}", QColor(255, 0, 255), size=8) # Magenta
-            
-        # Draw Connection if both present
-        if r_pt and c_pt and self.calib_mgr and self.calib_mgr.is_calibrated:
-            # Radar Img Proj
-            tx, ty = self.calib_mgr.transformer.radar_to_bev(r_pt.get('x'), r_pt.get('y'))
-            u_r, v_r = self.calib_mgr.transformer.bev_to_image(tx, ty)
-            
-            # Camera Img Point
-            u_c = c_pt['u'] + c_pt['w']/2
-            v_c = c_pt['v'] + c_pt['h']/2
-            self.image_vp.drawConnectionLine(u_r, v_r, u_c, v_c, QColor(255, 255, 0)) # Yellow link
+            # Highlight Camera in Image
+            if c_pt:
+                self.image_vp.showCameraDetection(c_pt['u'], c_pt['v'], cid)
+            
+            # Draw Connection if both present
+            if uv_r is not None and c_pt:
+                u_r, v_r = uv_r
+                self.image_vp.drawConnectionLine(u_r, v_r, c_pt['u'], c_pt['v'], QColor(255, 255, 0)) # Yellow link
+        finally:
+            self.image_vp.endOverlayBatch()
 
     def _onModeSwitch(self):
         self.ops.cancel()
@@ -1042,7 +1494,15 @@ class MainWindow(QMainWindow):
         self._updateModeUI()
     
     def _updateModeUI(self):
+        """Schedule a mode UI update; calls within one event loop turn coalesce."""
+        if self._mode_ui_pending:
+            return
+        self._mode_ui_pending = True
+        QTimer.singleShot(0, self._doUpdateModeUI)
+    
+    def _doUpdateModeUI(self):
         """Update UI based on current mode."""
+        self._mode_ui_pending = False
         mode = self.ops.mode
         
         if mode == AppMode.NORMAL:
@@ -1091,8 +1551,7 @@ class MainWindow(QMainWindow):
         
         # Use Geometric Projection if available
         if self.calib_mgr:
-            x_bev, y_bev = self.calib_mgr.radar_to_bev(rx, ry)
-            res = self.calib_mgr.bev_to_image(x_bev, y_bev)
+            res = self.calib_mgr.radar_to_image(rx, ry)
             if res:
                 proj_u, proj_v = res
             else:
@@ -1184,10 +1643,8 @@ class MainWindow(QMainWindow):
                     try:
                         pitch = self.calib_mgr.compute_pitch_from_lanes(self.ops.lanes)
                         if pitch:
-                            import numpy as np
-                            self.lbl_pitch.setText(f"{pitch:.4f}")
-                            self.lbl_pitch.setStyleSheet("color: #0f0; font-family: monospace; font-weight: bold;")
-                            self.statusbar.showMessage(f"✅ Pitch: {pitch:.4f} rad ({np.degrees(pitch):.2f}°)")
+                            self._setPitchLabel(pitch, 'lanes')
+                            self.statusbar.showMessage(f"✅ Pitch: {pitch:.4f} rad ({math.degrees(pitch):.2f}°)")
                     except Exception as e:
                         print(f"Auto-pitch error: {e}")
                 self._updateModeUI()
@@ -1209,7 +1666,10 @@ class MainWindow(QMainWindow):
         if self.radio_pair.isChecked():
             pair = self.ops.undo_last_pair()
             if pair:
-                self._redrawPairs()
+                # The undone pair was the last one drawn; pop just its markers
+                if pair.batch == self.ops.current_batch:
+                    self.image_vp.popLastPairMarker()
+                    self.bev_vp.popLastPair()
                 self.statusbar.showMessage(f"Undid pair with R{pair.radar_id}")
                 self._updateModeUI()
             else:
@@ -1217,7 +1677,8 @@ class MainWindow(QMainWindow):
         else:
             lane = self.ops.undo_last_lane()
             if lane:
-                self._redrawLanes()
+                if lane.batch == self.ops.current_batch:
+                    self.image_vp.popLastLaneMarker()
                 self.statusbar.showMessage("Undid last lane")
                 self._updateModeUI()
             else:
@@ -1236,6 +1697,8 @@ class MainWindow(QMainWindow):
             self.image_vp.clearPendingRadar()
             self.image_vp.clearPreview()
             self.bev_vp.clearPairs()
+            if self.calib_mgr:
+                self.calib_mgr.clear_pitch_cache()
             self._updateModeUI()
             self.statusbar.showMessage("Cleared all")
     
@@ -1248,21 +1711,38 @@ class MainWindow(QMainWindow):
         if not save_dir:
             return
         
-        saved = []
-        
+        # Disk I/O and formatting run on the thread pool, one job per file
+        jobs = []
         if self.ops.pairs:
-            path = DataExporter.save_point_pairs(
-                [p.to_dict() for p in self.ops.pairs], save_dir
-            )
-            saved.append(f"{self.ops.num_pairs} pairs")
-        
+            jobs.append((DataExporter.save_point_pairs, self.ops.pairs,
+                         PointPair.to_dict, f"{self.ops.num_pairs} pairs"))
         if self.ops.lanes:
-            path = DataExporter.save_all_lanes(
-                [l.to_list() for l in self.ops.lanes], save_dir
-            )
-            saved.append(f"{self.ops.num_lanes} lanes")
-        
-        self.statusbar.showMessage(f"Saved: {', '.join(saved)}")
+            jobs.append((DataExporter.save_all_lanes, self.ops.lanes,
+                         Lane.to_list, f"{self.ops.num_lanes} lanes"))
+        
+        self._saved = []
+        self.statusbar.showMessage("Saving...")
+        for save_fn, items, to_row, summary in jobs:
+            worker = _SaveWorker(save_fn, items, to_row, save_dir, summary)
+            worker.signals.finished.connect(
+                lambda summary, w=worker: self._onSaveFinished(w, summary))
+            worker.signals.failed.connect(
+                lambda msg, w=worker: self._onSaveFailed(w, msg))
+            self._save_workers.append(worker)
+            QThreadPool.globalInstance().start(worker)
+    
+    def _onSaveFinished(self, worker, summary: str):
+        """One save job finished (worker thread -> UI thread)."""
+        self._save_workers.remove(worker)
+        self._saved.append(summary)
+        if not self._save_workers:
+            self.statusbar.showMessage(f"Saved: {', '.join(self._saved)}")
+    
+    def _onSaveFailed(self, worker, msg: str):
+        """A save job raised in the worker."""
+        self._save_workers.remove(worker)
+        self.statusbar.showMessage("Save failed")
+        QMessageBox.critical(self, "Error", msg)
     
     # =========================================================================
     # Trajectory Mode (轨迹模式)
@@ -1287,17 +1767,27 @@ class MainWindow(QMainWindow):
             self.radio_pair.setChecked(True)
             return
         
+        if self._radar_load_worker:
+            QMessageBox.information(self, "Info", "Radar files are still being loaded into the database.")
+            self.radio_pair.setChecked(True)
+            return
+        
         self._trajectory_mode_active = True
         self.ops.mode = AppMode.TRAJECTORY_VIEW
         
-        # Load all trajectories
-        self.statusbar.showMessage("Loading trajectories...")
-        QApplication.processEvents()
+        # Reload all trajectories off the UI thread, then finish entering;
+        # on failure switch back to pair mode (runs _exitTrajectoryMode)
+        self._startRadarLoad(self._onTrajectoriesLoaded,
+                             on_failed=lambda: self.radio_pair.setChecked(True))
+    
+    def _onTrajectoriesLoaded(self, count: int):
+        """Second half of _enterTrajectoryMode, once the radar DB is reloaded."""
+        if not self._trajectory_mode_active:
+            return  # Left trajectory mode while loading
         
-        count = self.trajectory_db.load_all_radar_files(self.data_mgr.data_root)
         if count == 0:
             QMessageBox.warning(self, "Warning", "No trajectory data found")
-            self._exitTrajectoryMode()
+            self.radio_pair.setChecked(True)  # Runs _exitTrajectoryMode
             return
         
         # Clear normal display
@@ -1307,11 +1797,15 @@ class MainWindow(QMainWindow):
         
         # Load radar trajectories to BEV (solid lines, circles)
         trajectories = self.trajectory_db.get_all_trajectories()
-        self.bev_vp.loadTrajectories(trajectories)
+        # Converted to BEV once; selections below only filter this dict
+        self._all_trajectories_bev = self.bev_vp.trajectoriesToBEV(trajectories)
+        self.bev_vp.loadTrajectories(self._all_trajectories_bev)
         
         # Load camera trajectories to BEV (dashed lines, squares)
         camera_trajectories = self.trajectory_db.get_all_camera_trajectories()
-        self.bev_vp.loadCameraTrajectories(camera_trajectories)
+        self._all_camera_trajectories_bev = self.bev_vp.cameraTrajectoriesToBEV(camera_trajectories)
+        self.bev_vp.loadCameraTrajectories(self._all_camera_trajectories_bev)
+        self.bev_vp.setTrajectoriesKey((-1, -1))  # Everything, as _loadPairTrajectories
         
         self.bev_vp.setTrajectoryMode(True)
         
@@ -1321,22 +1815,21 @@ class MainWindow(QMainWindow):
         self.lbl_mode.setText("🔍 Trajectory")
         self.lbl_mode.setStyleSheet("padding: 6px 12px; background: #664400; border-radius: 4px; font-weight: bold;")
         
-        # Show trajectory ID list and populate it
+        # Show trajectory ID list and populate it; one repaint, no per-item signals
         self.trajectory_group.setVisible(True)
-        self.trajectory_list.clear()
-        self.trajectory_list.addItem("★ All Targets")
-        
-        # Load saved pairs from DB (persistent)
-        # self.trajectory_db.load_pairs_from_disk() # Removed: using DB directly
-        saved_pairs = self.trajectory_db.get_matched_pairs()
-        print(f"[DEBUG] _enterTrajectoryMode: Found {len(saved_pairs)} saved pairs in DB")
-        
-        # Cache for playback
-        self._matched_pairs_cache = {r: c for r, c in saved_pairs}
-        
-        for r, c in saved_pairs:
-            label = f"🔗 R{r}↔C{c}"
-            self.trajectory_list.addItem(label)
+        self.trajectory_list.setUpdatesEnabled(False)
+        blocker = QSignalBlocker(self.trajectory_list)
+        try:
+            self._clearTrajectoryList()
+            self.trajectory_list.addItem("★ All Targets")
+            
+            # Saved pairs were read from the DB once when it was opened
+            print(f"[DEBUG] _enterTrajectoryMode: Found {len(self._matched_pairs)} saved pairs in DB")
+            for r, c in self._matched_pairs:
+                self._addPairItem(r, c)
+        finally:
+            blocker.unblock()
+            self.trajectory_list.setUpdatesEnabled(True)
         
         # Store all trajectories for filtering
         self._all_trajectories = trajectories
@@ -1346,13 +1839,16 @@ class MainWindow(QMainWindow):
     def _exitTrajectoryMode(self):
         """Exit trajectory mode and restore normal display."""
         self._trajectory_mode_active = False
+        self._load_timer.stop()
+        self._pending_frame_load = None
         
         # Hide trajectory ID list
         self.trajectory_group.setVisible(False)
-        self.trajectory_list.clear()
+        self._clearTrajectoryList()
         
         # Clear trajectory display
         self.bev_vp.clearTrajectories()
+        self._clearTrail()
         self.bev_vp.setTrajectoryMode(False)
         self.image_vp.clearTrajectoryProjection()
         
@@ -1360,6 +1856,11 @@ class MainWindow(QMainWindow):
         self._loadBatch(self.data_mgr.current_batch)
         self._updateModeUI()
     
+    def _showStatus(self, msg: str):
+        """Status bar message; skipped when it is already shown (repeat clicks)."""
+        if msg != self.statusbar.currentMessage():
+            self.statusbar.showMessage(msg)
+    
     def _onTrajectoryIdSelected(self, item_or_id):
         """Handle selection of a target ID from the list (Item or int ID)."""
         if not self._trajectory_mode_active:
@@ -1377,37 +1878,40 @@ class MainWindow(QMainWindow):
             if text.startswith("★"):  # All targets
                 rid = None
             else:
-                # Extract IDs from "🔗 R{r}↔C{c}" format
-                import re
-                match = re.match(r'🔗 R(\d+)↔C(\d+)', text)
-                if match:
-                    rid = int(match.group(1))
-                    cid = int(match.group(2))
+                ids = self._pairItemIds(item_or_id)
+                if ids:
+                    rid, cid = ids
         
         # 2. Update Display
         self.bev_vp.clearTrajectories()
+        self._clearTrail()
         
         if rid is None:
             # Show all trajectories
             self._current_trajectory_id = None
-            self.bev_vp.loadTrajectories(self._all_trajectories)
-            self.bev_vp.loadCameraTrajectories(self._all_camera_trajectories)
-            self.statusbar.showMessage(f"🔍 Showing all {len(self._all_trajectories)} targets (Radar + Camera)")
+            self.bev_vp.loadTrajectories(self._all_trajectories_bev)
+            self.bev_vp.loadCameraTrajectories(self._all_camera_trajectories_bev)
+            self._showStatus(f"🔍 Showing all {len(self._all_trajectories)} targets (Radar + Camera)")
         else:
             self._current_trajectory_id = rid
             
             # Filter to show only this pair
-            filtered_radar = {rid: self._all_trajectories.get(rid, [])}
+            filtered_radar = {rid: self._all_trajectories_bev.get(rid, _NO_BEV)}
             filtered_camera = {}
             if cid is not None:
-                filtered_camera = {cid: self._all_camera_trajectories.get(cid, [])}
+                filtered_camera = {cid: self._all_camera_trajectories_bev.get(cid, _NO_BEV)}
             
             self.bev_vp.loadTrajectories(filtered_radar)
             self.bev_vp.loadCameraTrajectories(filtered_camera)
             
-            radar_pts = len(self._all_trajectories.get(rid, []))
-            camera_pts = len(self._all_camera_trajectories.get(cid, [])) if cid is not None else 0
-            self.statusbar.showMessage(f"🔍 Trajectory R{rid}" + (f"↔C{cid}" if cid is not None else "") + f": Radar {radar_pts}pts")
+            radar_pts = len(self._all_trajectories.get(rid, _NO_POINTS))
+            camera_pts = len(self._all_camera_trajectories.get(cid, _NO_POINTS)) if cid is not None else 0
+            pair = f"R{rid}↔C{cid}" if cid is not None else f"R{rid}"
+            self._showStatus(f"🔍 Trajectory {pair}: Radar {radar_pts}pts")
+        
+        # Tagged like _onMatchPairSelected, which skips reloading the same view
+        self.bev_vp.setTrajectoriesKey((-1 if rid is None else rid,
+                                        -1 if cid is None else cid))
 
     # ... (handlers for click/dialog open/preview omitted as they are unchanged) ...
 
@@ -1420,64 +1924,75 @@ class MainWindow(QMainWindow):
             return
             
         # Add custom pair to list and save to DB
+        saved = False
         if radar_id >= 0 and camera_id >= 0:
-            label = f"🔗 R{radar_id}↔C{camera_id}"
-            
-            # Check if already exists
-            found = False
-            for i in range(self.trajectory_list.count()):
-                if self.trajectory_list.item(i).text() == label:
-                    self.trajectory_list.setCurrentRow(i)
-                    found = True
-                    break
+            # Check if already exists; one repaint, no per-call list signals
+            item = self._pair_items.get((radar_id, camera_id))
+            self.trajectory_list.setUpdatesEnabled(False)
+            blocker = QSignalBlocker(self.trajectory_list)
+            try:
+                if item is not None:
+                    self.trajectory_list.setCurrentItem(item)
+                else:
+                    self._addPairItem(radar_id, camera_id, row=1)  # Insert after "All Targets"
+                    self.trajectory_list.setCurrentRow(1)
+            finally:
+                blocker.unblock()
+                self.trajectory_list.setUpdatesEnabled(True)
             
-            if not found:
-                self.trajectory_list.insertItem(1, label)  # Insert after "All Targets"
-                self.trajectory_list.setCurrentRow(1)
-                
+            if item is None:
                 # Save to DB (Persistent table)
                 print(f"[DEBUG] Saving matched pair R{radar_id}-C{camera_id} to DB...")
+                # add_matched_pair commits in its own transaction and re-raises
+                # on failure, so no read-back is needed to verify the write
                 try:
                     self.trajectory_db.add_matched_pair(radar_id, camera_id)
-                    # Verify immediately?
-                    self.trajectory_db.cursor.execute(
-                        "SELECT * FROM matched_pairs WHERE radar_id=? AND camera_id=?", 
-                        (radar_id, camera_id)
-                    )
-                    row = self.trajectory_db.cursor.fetchone()
-                    print(f"[DEBUG] Verification: Saved pair row = {row}")
-                    
-                    # Show confirmation
-                    QMessageBox.information(self, "Saved", f"Matched Pair R{radar_id}↔C{camera_id} Saved!\nCheck Terminal for verification.")
-                    
+                    self._matched_pairs[(radar_id, camera_id)] = None
+                    self._matched_pairs_cache[radar_id] = camera_id
+                    saved = True  # Confirmed in the status bar below
                 except Exception as e:
                     print(f"[ERROR] Failed to save pair: {e}")
                     QMessageBox.critical(self, "DB Error", f"Failed to save matched pair: {e}")
                 
-        # Clear current display
-        self.bev_vp.clearTrajectories()
+        # Clear current display and reload it with a single BEV repaint,
+        # unless this pair (or "all") is what the BEV already shows
+        if self.bev_vp.trajectoriesKey() != (radar_id, camera_id):
+            self._loadPairTrajectories(radar_id, camera_id)
         
         if radar_id == -1 and camera_id == -1:
-            # Show all
-            self.bev_vp.loadTrajectories(self._all_trajectories)
-            self.bev_vp.loadCameraTrajectories(self._all_camera_trajectories)
-            self.statusbar.showMessage(f"🔍 Showing all {len(self._all_trajectories)} trajectories")
+            self._showStatus(f"🔍 Showing all {len(self._all_trajectories)} trajectories")
             
             # Reset selection to "All Targets"
-            self.trajectory_list.setCurrentRow(0)
+            with QSignalBlocker(self.trajectory_list):
+                self.trajectory_list.setCurrentRow(0)
         else:
-            # Show selected pair
-            if radar_id >= 0:
-                filtered_radar = {radar_id: self._all_trajectories.get(radar_id, [])}
-                self.bev_vp.loadTrajectories(filtered_radar)
-            
-            if camera_id >= 0:
-                filtered_camera = {camera_id: self._all_camera_trajectories.get(camera_id, [])}
-                self.bev_vp.loadCameraTrajectories(filtered_camera)
+            radar_pts = len(self._all_trajectories.get(radar_id, _NO_POINTS))
+            camera_pts = len(self._all_camera_trajectories.get(camera_id, _NO_POINTS))
+            prefix = "✅ Saved" if saved else "🔗"
+            self._showStatus(f"{prefix} Matched Pair: R{radar_id}({radar_pts}pts) ↔ C{camera_id}({camera_pts}pts)")
+    
+    def _loadPairTrajectories(self, radar_id: int, camera_id: int):
+        """Show one radar/camera pair in BEV (-1 = none of that kind; (-1, -1) = all)."""
+        self.bev_vp.setUpdatesEnabled(False)
+        try:
+            self.bev_vp.clearTrajectories()
             
-            radar_pts = len(self._all_trajectories.get(radar_id, []))
-            camera_pts = len(self._all_camera_trajectories.get(camera_id, []))
-            self.statusbar.showMessage(f"🔗 Matched Pair: R{radar_id}({radar_pts}pts) ↔ C{camera_id}({camera_pts}pts)")
+            if radar_id == -1 and camera_id == -1:
+                # Show all
+                self.bev_vp.loadTrajectories(self._all_trajectories_bev)
+                self.bev_vp.loadCameraTrajectories(self._all_camera_trajectories_bev)
+            else:
+                # Show selected pair
+                if radar_id >= 0:
+                    filtered_radar = {radar_id: self._all_trajectories_bev.get(radar_id, _NO_BEV)}
+                    self.bev_vp.loadTrajectories(filtered_radar)
+                
+                if camera_id >= 0:
+                    filtered_camera = {camera_id: self._all_camera_trajectories_bev.get(camera_id, _NO_BEV)}
+                    self.bev_vp.loadCameraTrajectories(filtered_camera)
+            self.bev_vp.setTrajectoriesKey((radar_id, camera_id))
+        finally:
+            self.bev_vp.setUpdatesEnabled(True)
     
     def _onTrajectoryPointClicked(self, target_id: int, frame_id: int):
         """Handle click on trajectory point in BEV."""
@@ -1494,41 +2009,45 @@ class MainWindow(QMainWindow):
         # Get camera point data (if available)
         camera_point = self.trajectory_db.get_camera_point_at_frame(target_id, frame_id)
         
-        # Load corresponding batch/frame
-        self.slider.setValue(frame_id)
-        self._loadBatch(frame_id)
-        
-        # Clear previous projections
-        self.image_vp.clearTrajectoryProjection()
-        
-        # Show radar projection (calculated via homography)
-        projection_result = None
-        if self.calib_mgr:
-            x_bev, y_bev = self.calib_mgr.radar_to_bev(x_radar, y_radar)
-            projection_result = self.calib_mgr.bev_to_image(x_bev, y_bev)
-            
-            if projection_result:
-                u, v = projection_result
-                self.image_vp.showTrajectoryProjection(u, v, target_id)
-        
-        # Show camera detection position (ground truth from detection)
-        if camera_point:
-            cam_u, cam_v = camera_point
-            self.image_vp.showCameraDetection(cam_u, cam_v, target_id)
+        def draw():
+            # All overlay changes below cost one image repaint
+            self.image_vp.beginOverlayBatch()
+            try:
+                # Clear previous projections
+                self.image_vp.clearTrajectoryProjection()
+                
+                # Show radar projection (one cached radar -> image homography)
+                projection_result = None
+                if self.calib_mgr:
+                    projection_result = self.calib_mgr.radar_to_image(x_radar, y_radar)
+                    
+                    if projection_result:
+                        u, v = projection_result
+                        self.image_vp.showTrajectoryProjection(u, v, target_id)
+                
+                # Show camera detection position (ground truth from detection)
+                if camera_point:
+                    cam_u, cam_v = camera_point
+                    self.image_vp.showCameraDetection(cam_u, cam_v, target_id)
+                    
+                    # Draw connecting line if both exist
+                    if projection_result:
+                        u, v = projection_result
+                        self.image_vp.drawConnectionLine(u, v, cam_u, cam_v)
+            finally:
+                self.image_vp.endOverlayBatch()
             
-            # Draw connecting line if both exist
-            if projection_result:
-                u, v = projection_result
-                self.image_vp.drawConnectionLine(u, v, cam_u, cam_v)
+            # Highlight the point in BEV
+            self.bev_vp.highlightTrajectoryPoint(target_id, frame_id)
         
-        # Highlight the point in BEV
-        self.bev_vp.highlightTrajectoryPoint(target_id, frame_id)
+        # Load corresponding batch/frame, then draw on top of it
+        self._seekFrame(frame_id, draw)
         
         # Status message with both radar and camera info
         msg = f"Target {target_id} @ Frame {frame_id}: Radar(x={x_radar:.1f}m, y={y_radar:.1f}m, v={velocity:.1f}m/s)"
         if camera_point:
             msg += f" | Camera(u={camera_point[0]:.0f}, v={camera_point[1]:.0f})"
-        self.statusbar.showMessage(msg)
+        self._showStatus(msg)
     
     def _onOpenMatchDialog(self):
         """Open the trajectory matching dialog."""
@@ -1539,19 +2058,24 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Error", "TrajectoryMatchDialog not available")
             return
         
-        # Create dialog if not exists
-        if not hasattr(self, '_match_dialog') or self._match_dialog is None:
-            self._match_dialog = TrajectoryMatchDialog(self.trajectory_db, self)
-            self._match_dialog.pairSelected.connect(self._onMatchPairSelected)
-            self._match_dialog.radarPreview.connect(self._onRadarPreview)
-            self._match_dialog.cameraPreview.connect(self._onCameraPreview)
-            # Direct Callback (Backup)
-            self._match_dialog.set_on_pair_selected(self._onMatchPairSelected)
-        
+        self._precreateMatchDialog()
+        # The DB is replaced when another dataset is opened
+        self._match_dialog.trajectory_db = self.trajectory_db
         self._match_dialog.refresh()
         self._match_dialog.show()
         self._match_dialog.raise_()
     
+    def _precreateMatchDialog(self):
+        """Create the match dialog (not shown, lists empty) if not done yet."""
+        if self._match_dialog is not None or not TrajectoryMatchDialog:
+            return
+        self._match_dialog = TrajectoryMatchDialog(self.trajectory_db, self)
+        self._match_dialog.pairSelected.connect(self._onMatchPairSelected)
+        self._match_dialog.radarPreview.connect(self._onRadarPreview)
+        self._match_dialog.cameraPreview.connect(self._onCameraPreview)
+        # Direct Callback (Backup)
+        self._match_dialog.set_on_pair_selected(self._onMatchPairSelected)
+    
     def _onRadarPreview(self, radar_id: int):
         """Preview radar trajectory when selected in match dialog."""
         if not self._trajectory_mode_active:
@@ -1559,18 +2083,28 @@ class MainWindow(QMainWindow):
         
         # Clear and show only this radar trajectory
         self.bev_vp.clearTrajectories()
-        filtered_radar = {radar_id: self._all_trajectories.get(radar_id, [])}
+        filtered_radar = {radar_id: self._all_trajectories_bev.get(radar_id, _NO_BEV)}
         self.bev_vp.loadTrajectories(filtered_radar)
         
         # Show first frame of this trajectory
-        traj = self._all_trajectories.get(radar_id, [])
-        if traj:
-            frame_id = traj[0][0]  # First frame
-            self.slider.setValue(frame_id)
-            self._loadBatch(frame_id)
+        traj = self._all_trajectories.get(radar_id, _NO_POINTS)
+        if len(traj):
+            frame_id = int(traj[0][0])  # First frame
+            
+            def draw():
+                # Project the whole trajectory onto the image in one matmul
+                if self.calib_mgr and self.calib_mgr.is_calibrated:
+                    uv, valid = self.calib_mgr.radar_to_image_batch(traj[:, 1:])
+                    uv = uv[valid]
+                    self.image_vp.clearTrajectoryProjection()
+                    if len(uv):
+                        self.image_vp.showTrajectoryProjection(uv[0, 0], uv[0, 1], radar_id)
+                        self.image_vp.showTrajectoryPath(uv, radar_id)
+            
+            self._seekFrame(frame_id, draw)
         
         pts = len(traj)
-        self.statusbar.showMessage(f"👁 Preview Radar R{radar_id}: {pts} points")
+        self._showStatus(f"👁 Preview Radar R{radar_id}: {pts} points")
     
     def _onCameraPreview(self, camera_id: int):
         """Preview camera trajectory when selected in match dialog."""
@@ -1579,74 +2113,28 @@ class MainWindow(QMainWindow):
         
         # Clear and show only this camera trajectory
         self.bev_vp.clearTrajectories()
-        filtered_camera = {camera_id: self._all_camera_trajectories.get(camera_id, [])}
+        filtered_camera = {camera_id: self._all_camera_trajectories_bev.get(camera_id, _NO_BEV)}
         self.bev_vp.loadCameraTrajectories(filtered_camera)
         
         # Show first frame of this trajectory
-        traj = self._all_camera_trajectories.get(camera_id, [])
-        if traj:
-            frame_id = traj[0][0]  # First frame
-            self.slider.setValue(frame_id)
-            self._loadBatch(frame_id)
-            
-            # Show camera detection on image
+        traj = self._all_camera_trajectories.get(camera_id, _NO_POINTS)
+        if len(traj):
+            frame_id = int(traj[0][0])  # First frame
             u, v = traj[0][1], traj[0][2]
-            self.image_vp.clearTrajectoryProjection()
-            self.image_vp.showCameraDetection(u, v, camera_id)
-        
-        pts = len(traj)
-        self.statusbar.showMessage(f"👁 Preview Camera C{camera_id}: {pts} points")
-    
-    def _onMatchPairSelected(self, radar_id: int, camera_id: int):
-        """Handle pair selection from match dialog."""
-        if not self._trajectory_mode_active:
-            return
             
-        # Add custom pair to list
-        if radar_id >= 0 and camera_id >= 0:
-            label = f"🔗 R{radar_id}↔C{camera_id}"
-            
-            # Check if already exists
-            found = False
-            for i in range(self.trajectory_list.count()):
-                if self.trajectory_list.item(i).text() == label:
-                    self.trajectory_list.setCurrentRow(i)
-                    found = True
-                    break
+            def draw():
+                # Show camera detection on image
+                self.image_vp.clearTrajectoryProjection()
+                self.image_vp.showCameraDetection(u, v, camera_id)
             
-            if not found:
-                self.trajectory_list.insertItem(1, label)  # Insert after "All Targets"
-                self.trajectory_list.setCurrentRow(1)
-        
-        # Clear current display
-        self.bev_vp.clearTrajectories()
+            self._seekFrame(frame_id, draw)
         
-        if radar_id == -1 and camera_id == -1:
-            # Show all
-            self.bev_vp.loadTrajectories(self._all_trajectories)
-            self.bev_vp.loadCameraTrajectories(self._all_camera_trajectories)
-            self.statusbar.showMessage(f"🔍 Showing all {len(self._all_trajectories)} trajectories")
-            
-            # Reset selection to "All Targets"
-            self.trajectory_list.setCurrentRow(0)
-        else:
-            # Show selected pair
-            if radar_id >= 0:
-                filtered_radar = {radar_id: self._all_trajectories.get(radar_id, [])}
-                self.bev_vp.loadTrajectories(filtered_radar)
-            
-            if camera_id >= 0:
-                filtered_camera = {camera_id: self._all_camera_trajectories.get(camera_id, [])}
-                self.bev_vp.loadCameraTrajectories(filtered_camera)
-            
-            radar_pts = len(self._all_trajectories.get(radar_id, []))
-            camera_pts = len(self._all_camera_trajectories.get(camera_id, []))
-            self.statusbar.showMessage(f"🔗 Matched Pair: R{radar_id}({radar_pts}pts) ↔ C{camera_id}({camera_pts}pts)")
+        pts = len(traj)
+        self._showStatus(f"👁 Preview Camera C{camera_id}: {pts} points")
 
 
 def main():
     try:
-        from PyQt6.QtCore import Qt
         QApplication.setHighDpiScaleFactorRoundingPolicy(
             Qt.HighDpiScaleFactorRoundingPolicy.PassThrough
         )
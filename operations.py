@@ -5,19 +5,22 @@ operations.py - 点对选择、车道线绘制和撤销/重做业务逻辑
 
 from typing import List, Tuple, Optional, Dict
 from dataclasses import dataclass, field
-from enum import Enum, auto
+from enum import IntEnum
 
+import numpy as np
 
-class AppMode(Enum):
-    NORMAL = auto()
-    SELECT_RADAR = auto()      # Waiting for radar point selection
-    SELECT_IMAGE = auto()      # Waiting for image point selection
-    LANE_START = auto()        # Waiting for lane start point
-    LANE_END = auto()          # Waiting for lane end point
-    TRAJECTORY_VIEW = auto()   # Viewing radar trajectories
 
+class AppMode(IntEnum):
+    """UI state; an IntEnum so per-event mode checks are plain int compares."""
+    NORMAL = 0
+    SELECT_RADAR = 1      # Waiting for radar point selection
+    SELECT_IMAGE = 2      # Waiting for image point selection
+    LANE_START = 3        # Waiting for lane start point
+    LANE_END = 4          # Waiting for lane end point
+    TRAJECTORY_VIEW = 5   # Viewing radar trajectories
 
-@dataclass
+
+@dataclass(eq=False)
 class PointPair:
     """A completed radar-image point pair."""
     batch: int
@@ -48,7 +51,7 @@ class PointPair:
         }
 
 
-@dataclass
+@dataclass(eq=False)
 class Lane:
     """A lane line defined by start and end points."""
     start: Tuple[float, float]
@@ -59,7 +62,7 @@ class Lane:
         return [self.start, self.end]
 
 
-@dataclass
+@dataclass(eq=False)
 class PendingRadarSelection:
     """Temporary state when a radar point is selected but image point not yet."""
     target: dict
@@ -76,20 +79,27 @@ class OperationsController:
     """
     
     MAX_PAIRS = 10
+    # Column layout of get_pair_array_for_batch()
+    PAIR_COLUMNS = ('radar_u', 'radar_v', 'pixel_u', 'pixel_v', 'radar_x', 'radar_y')
     
     def __init__(self):
         self.mode = AppMode.NORMAL
         self.pairs: List[PointPair] = []
         self.lanes: List[Lane] = []
+        # batch -> indices into pairs / lanes, and PAIR_COLUMNS of pairs[i]
+        # as an array, rebuilt whenever pairs / lanes change
+        self._pairs_by_batch: Dict[int, List[int]] = {}
+        self._lanes_by_batch: Dict[int, List[int]] = {}
+        self._pair_cols = np.empty((0, len(self.PAIR_COLUMNS)))
         self.current_batch: int = 0
         
         # Pending selections
         self.pending_radar: Optional[PendingRadarSelection] = None
         self.pending_lane_start: Optional[Tuple[float, float]] = None
         
-        # Undo stacks (simple - just track what to remove)
-        self._pair_undo_stack: List[PointPair] = []
-        self._lane_undo_stack: List[Lane] = []
+        # Undo stacks: (insertion index, item) so undo can delete by position
+        self._pair_undo_stack: List[Tuple[int, PointPair]] = []
+        self._lane_undo_stack: List[Tuple[int, Lane]] = []
     
     # -------------------------------------------------------------------------
     # Mode Management
@@ -152,8 +162,9 @@ class OperationsController:
             radar_rcs=t.get('rcs', 0),
         )
         
+        self._pair_undo_stack.append((len(self.pairs), pair))
         self.pairs.append(pair)
-        self._pair_undo_stack.append(pair)
+        self._reindex_pairs()
         self.pending_radar = None
         
         # Return to radar selection mode for next pair
@@ -164,9 +175,56 @@ class OperationsController:
         
         return pair
     
+    def _reindex_pairs(self):
+        """Rebuild the batch -> pair index and coordinate columns after pairs changed."""
+        self._pairs_by_batch = self._bucket_by_batch(self.pairs)
+        rows = [(p.radar_u, p.radar_v, p.pixel_u, p.pixel_v, p.radar_x, p.radar_y)
+                for p in self.pairs]
+        self._pair_cols = np.array(rows, dtype=np.float64).reshape(-1, len(self.PAIR_COLUMNS))
+    
+    def _reindex_lanes(self):
+        """Rebuild the batch -> lane index after lanes changed."""
+        self._lanes_by_batch = self._bucket_by_batch(self.lanes)
+    
+    @staticmethod
+    def _bucket_by_batch(items: list) -> Dict[int, List[int]]:
+        buckets: Dict[int, List[int]] = {}
+        for i, item in enumerate(items):
+            buckets.setdefault(item.batch, []).append(i)
+        return buckets
+    
+    def _pair_indices_for_batch(self, batch: int) -> List[int]:
+        return self._pairs_by_batch.get(batch, [])
+    
+    def has_marks_for_batch(self, batch: int) -> bool:
+        """True if the batch has any pairs or lanes."""
+        return batch in self._pairs_by_batch or batch in self._lanes_by_batch
+    
     def get_pairs_for_batch(self, batch: int) -> List[Tuple[int, PointPair]]:
         """Get all pairs for a specific batch with their indices."""
-        return [(i, p) for i, p in enumerate(self.pairs) if p.batch == batch]
+        return [(i, self.pairs[i]) for i in self._pair_indices_for_batch(batch)]
+    
+    def get_pair_array_for_batch(self, batch: int) -> Tuple[List[int], np.ndarray]:
+        """
+        Get all pair coordinates for a batch in one array.
+        
+        Returns:
+            (indices, cols): pair indices and (N, 6) array laid out as
+            PAIR_COLUMNS [radar_u, radar_v, pixel_u, pixel_v, radar_x, radar_y]
+        """
+        indices = self._pair_indices_for_batch(batch)
+        return indices, self._pair_cols[indices]
+    
+    def get_pair_xy_for_batch(self, batch: int) -> Tuple[List[int], np.ndarray]:
+        """
+        Get pair coordinates for a batch as columns for vectorized projection.
+        
+        Returns:
+            (indices, xy): pair indices and (N, 4) array of
+            [radar_x, radar_y, pixel_u, pixel_v]
+        """
+        indices, cols = self.get_pair_array_for_batch(batch)
+        return indices, cols[:, [4, 5, 2, 3]]
     
     # -------------------------------------------------------------------------
     # Lane Drawing
@@ -187,8 +245,9 @@ class OperationsController:
             batch=self.current_batch
         )
         
+        self._lane_undo_stack.append((len(self.lanes), lane))
+        self._lanes_by_batch.setdefault(lane.batch, []).append(len(self.lanes))
         self.lanes.append(lane)
-        self._lane_undo_stack.append(lane)
         self.pending_lane_start = None
         
         # Ready for next lane
@@ -197,7 +256,7 @@ class OperationsController:
     
     def get_lanes_for_batch(self, batch: int) -> List[Tuple[int, Lane]]:
         """Get all lanes for a specific batch with their indices."""
-        return [(i, l) for i, l in enumerate(self.lanes) if l.batch == batch]
+        return [(i, self.lanes[i]) for i in self._lanes_by_batch.get(batch, ())]
 
     def restore_points(self, points_data: List[dict]):
         """Restore points from list of dicts."""
@@ -220,6 +279,7 @@ class OperationsController:
                 radar_rcs=p.get('radar_rcs', 0.0)
             )
             self.pairs.append(pair)
+        self._reindex_pairs()
             
         print(f"[Operations] Restored {len(self.pairs)} points from DB")
             
@@ -235,26 +295,44 @@ class OperationsController:
                 batch=l.get('batch', self.current_batch)
             )
             self.lanes.append(lane)
+        self._reindex_lanes()
     
     # -------------------------------------------------------------------------
     # Undo
     # -------------------------------------------------------------------------
+    @staticmethod
+    def _delete_at(items: list, idx: int, item) -> bool:
+        """Delete item from items, trying its recorded index first.
+        
+        The index can be stale after clear_batch(), so the slot is checked by
+        identity and the list is only scanned (still by identity) on a miss.
+        """
+        if not (idx < len(items) and items[idx] is item):
+            idx = next((i for i, x in enumerate(items) if x is item), -1)
+            if idx < 0:
+                return False
+        del items[idx]
+        return True
+    
     def undo_last_pair(self) -> Optional[PointPair]:
-        """Undo the last point pair. Returns removed pair or None."""
-        if self._pair_undo_stack:
-            pair = self._pair_undo_stack.pop()
-            if pair in self.pairs:
-                self.pairs.remove(pair)
-            return pair
+        """
+        Undo the last point pair still present (entries dropped by
+        clear_batch are skipped). Returns removed pair or None.
+        """
+        while self._pair_undo_stack:
+            idx, pair = self._pair_undo_stack.pop()
+            if self._delete_at(self.pairs, idx, pair):
+                self._reindex_pairs()
+                return pair
         return None
     
     def undo_last_lane(self) -> Optional[Lane]:
-        """Undo the last lane. Returns removed lane or None."""
-        if self._lane_undo_stack:
-            lane = self._lane_undo_stack.pop()
-            if lane in self.lanes:
-                self.lanes.remove(lane)
-            return lane
+        """Undo the last lane still present (see undo_last_pair). Returns removed lane or None."""
+        while self._lane_undo_stack:
+            idx, lane = self._lane_undo_stack.pop()
+            if self._delete_at(self.lanes, idx, lane):
+                self._reindex_lanes()
+                return lane
         return None
     
     def undo_pending(self) -> bool:
@@ -275,7 +353,9 @@ class OperationsController:
     def clear_all(self):
         """Clear all pairs and lanes."""
         self.pairs.clear()
+        self._reindex_pairs()
         self.lanes.clear()
+        self._reindex_lanes()
         self._pair_undo_stack.clear()
         self._lane_undo_stack.clear()
         self.pending_radar = None
@@ -285,7 +365,9 @@ class OperationsController:
     def clear_batch(self, batch: int):
         """Clear pairs and lanes for a specific batch."""
         self.pairs = [p for p in self.pairs if p.batch != batch]
+        self._reindex_pairs()
         self.lanes = [l for l in self.lanes if l.batch != batch]
+        self._reindex_lanes()
     
     # -------------------------------------------------------------------------
     # Stats
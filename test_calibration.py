@@ -0,0 +1,135 @@
+"""
+Kernel and batch-API consistency tests for calibration.py.
+
+The numba kernels must agree with their NumPy fallbacks, and the batch
+projections must agree with the scalar paths they replace.
+Run with: python -m unittest test_calibration  (or pytest)
+"""
+import math
+import unittest
+
+import numpy as np
+
+import calibration
+from calibration import CameraParams, RadarParams, CoordinateTransformer
+from calib_manager import CalibrationManager
+
+needs_numba = unittest.skipIf(calibration.njit is None, "numba not installed")
+
+
+def _transformer(pitch=0.05, yaw=0.03):
+    camera = CameraParams(height=1.6, pitch=pitch, fx=1100.0, fy=1050.0, cx=640.0, cy=480.0)
+    return CoordinateTransformer(camera, RadarParams(yaw=yaw))
+
+
+class KernelFallbackTest(unittest.TestCase):
+    """numba kernels vs their NumPy fallbacks."""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    @needs_numba
+    def test_vanishing_point(self):
+        lines = np.array([[200, 400, 300, 200], [800, 400, 700, 200],
+                          [100, 700, 350, 250], [900, 650, 720, 260]], dtype=np.float64)
+        for n in (2, 3, 4):
+            ok, x, y = calibration._vanishing_point(lines[:n])
+            ok_np, x_np, y_np = calibration._vanishing_point_numpy(lines[:n])
+            self.assertEqual(ok, ok_np)
+            self.assertAlmostEqual(x, x_np, places=6)
+            self.assertAlmostEqual(y, y_np, places=6)
+
+    @needs_numba
+    def test_vanishing_point_degenerate(self):
+        parallel = np.array([[0, 0, 100, 0], [0, 10, 100, 10]], dtype=np.float64)
+        point = np.array([[5, 5, 5, 5], [0, 0, 100, 100]], dtype=np.float64)
+        for lines in (parallel, point):
+            self.assertFalse(calibration._vanishing_point(lines)[0])
+            self.assertFalse(calibration._vanishing_point_numpy(lines)[0])
+
+    @needs_numba
+    def test_pitch_sweep(self):
+        # Some points behind the camera exercise the penalty branch
+        bev_xy = np.column_stack((self.rng.uniform(-10, 10, 40), self.rng.uniform(-5, 80, 40)))
+        meas_uv = self.rng.uniform(0, 1280, (40, 2))
+        pitches = np.linspace(-0.2, 0.3, 101)
+        args = (bev_xy, meas_uv, pitches, 1.5, 1000.0, 1000.0, 640.0, 480.0)
+        errors, counts = calibration._pitch_sweep(*args)
+        errors_np, counts_np = calibration._pitch_sweep_numpy(*args)
+        np.testing.assert_allclose(errors, errors_np, rtol=1e-9)
+        np.testing.assert_array_equal(counts, counts_np)
+
+    @needs_numba
+    def test_image_to_bev(self):
+        uv = self.rng.uniform(0, 1280, (500, 2))
+        args = (uv, 1.5, 0.05, 1000.0, 1000.0, 640.0, 480.0)
+        bev, valid = calibration._image_to_bev(*args)
+        bev_np, valid_np = calibration._image_to_bev_numpy(*args)
+        np.testing.assert_array_equal(valid, valid_np)
+        self.assertTrue(valid.any() and not valid.all())
+        np.testing.assert_allclose(bev, bev_np, rtol=1e-12)  # NaN rows compare equal
+
+
+class BatchScalarTest(unittest.TestCase):
+    """Batch projections vs the scalar paths they replace."""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(1)
+        self.t = _transformer()
+        self.xy = np.column_stack((self.rng.uniform(-5, 80, 200), self.rng.uniform(-20, 20, 200)))
+
+    def test_radar_to_bev_batch(self):
+        bev = self.t.radar_to_bev_batch(self.xy)
+        for (x, y), b in zip(self.xy, bev):
+            np.testing.assert_allclose(b, self.t.radar_to_bev(x, y), atol=1e-9)
+
+    def test_radar_to_image_batch(self):
+        uv, valid = self.t.radar_to_image_batch(self.xy)
+        self.assertTrue(valid.any() and not valid.all())
+        for (x, y), p, ok in zip(self.xy, uv, valid):
+            scalar = self.t.radar_to_image(x, y)
+            self.assertEqual(ok, scalar is not None)
+            if ok:
+                np.testing.assert_allclose(p, scalar, rtol=1e-9)
+            else:
+                self.assertTrue(np.isnan(p).all())
+
+    def test_radar_to_bev_image_batch(self):
+        bev, uv, valid = self.t.radar_to_bev_image_batch(self.xy)
+        uv_ref, valid_ref = self.t.radar_to_image_batch(self.xy)
+        np.testing.assert_allclose(bev, self.t.radar_to_bev_batch(self.xy), atol=1e-9)
+        np.testing.assert_array_equal(valid, valid_ref)
+        np.testing.assert_allclose(uv, uv_ref, rtol=1e-9)
+
+    def test_image_to_bev_batch(self):
+        mgr = CalibrationManager()
+        mgr.update_camera_params(height=1.6, pitch=0.05, fy=1050.0)
+        uv = self.rng.uniform(0, 1280, (300, 2))
+        bev, valid = mgr.image_to_bev_batch(uv)
+        self.assertTrue(valid.any() and not valid.all())
+        for (u, v), b, ok in zip(uv, bev, valid):
+            scalar = mgr.image_to_bev(u, v)
+            self.assertEqual(ok, scalar is not None)
+            if ok:
+                np.testing.assert_allclose(b, scalar, rtol=1e-9)
+
+    def test_image_to_bev_batch_empty(self):
+        bev, valid = self.t.image_to_bev_batch(np.empty((0, 2)))
+        self.assertEqual(bev.shape, (0, 2))
+        self.assertEqual(valid.shape, (0,))
+
+    def test_optimize_pitch_recovers_truth(self):
+        truth = _transformer(pitch=0.08, yaw=0.0)
+        pairs = []
+        for x, y in self.xy[:30]:
+            uv = truth.radar_to_image(x, y)
+            if uv is not None:
+                pairs.append({'radar_x': x, 'radar_y': y, 'pixel_u': uv[0], 'pixel_v': uv[1]})
+        start = _transformer(pitch=0.06, yaw=0.0)
+        pitch = start.optimize_pitch(pairs, search_range=50)
+        # 1 px vanishing-point steps
+        self.assertLess(abs(pitch - 0.08), math.atan(1.0 / start.camera.fy))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+Undo and per-batch index tests for OperationsController.
+Run with: python -m unittest test_operations  (or pytest)
+"""
+import unittest
+
+from operations import OperationsController
+
+
+def _add_pair(ops, batch, rid, u=100.0):
+    ops.current_batch = batch
+    ops.start_pair_selection()
+    ops.select_radar_point({'id': rid, 'x': 10.0 + rid, 'y': 1.0}, u, u + 1)
+    return ops.select_image_point(u + 2, u + 3)
+
+
+def _add_lane(ops, batch, x=0.0):
+    ops.current_batch = batch
+    ops.start_lane_drawing()
+    ops.set_lane_start(x, 0.0)
+    return ops.set_lane_end(x, 100.0)
+
+
+def _check_batch_index(test, ops):
+    """Batch lookups agree with a plain scan of pairs / lanes."""
+    for batch in {p.batch for p in ops.pairs} | {l.batch for l in ops.lanes} | {99}:
+        test.assertEqual(ops.get_pairs_for_batch(batch),
+                         [(i, p) for i, p in enumerate(ops.pairs) if p.batch == batch])
+        test.assertEqual(ops.get_lanes_for_batch(batch),
+                         [(i, l) for i, l in enumerate(ops.lanes) if l.batch == batch])
+        indices, xy = ops.get_pair_xy_for_batch(batch)
+        test.assertEqual(xy.shape, (len(indices), 4))
+        for i, row in zip(indices, xy.tolist()):
+            p = ops.pairs[i]
+            test.assertEqual(row, [p.radar_x, p.radar_y, p.pixel_u, p.pixel_v])
+        test.assertEqual(ops.has_marks_for_batch(batch),
+                         any(p.batch == batch for p in ops.pairs)
+                         or any(l.batch == batch for l in ops.lanes))
+
+
+class UndoTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ops = OperationsController()
+
+    def assertConsistent(self):
+        _check_batch_index(self, self.ops)
+
+    def test_undo_pairs_in_reverse_order(self):
+        added = [_add_pair(self.ops, b, rid) for rid, b in enumerate((0, 1, 0))]
+        self.assertConsistent()
+        for pair in reversed(added):
+            self.assertIs(self.ops.undo_last_pair(), pair)
+            self.assertConsistent()
+        self.assertIsNone(self.ops.undo_last_pair())
+
+    def test_undo_lanes_in_reverse_order(self):
+        added = [_add_lane(self.ops, b, x) for x, b in enumerate((2, 2, 3))]
+        self.assertConsistent()
+        for lane in reversed(added):
+            self.assertIs(self.ops.undo_last_lane(), lane)
+            self.assertConsistent()
+        self.assertIsNone(self.ops.undo_last_lane())
+
+    def test_undo_after_restore(self):
+        self.ops.restore_points([{'batch': 0, 'radar_id': 7}, {'batch': 1, 'radar_id': 8}])
+        self.ops.restore_lanes([{'start': (0, 0), 'end': (1, 1), 'batch': 1}])
+        # Restored items are not undoable
+        self.assertIsNone(self.ops.undo_last_pair())
+        self.assertIsNone(self.ops.undo_last_lane())
+
+        pair = _add_pair(self.ops, 0, 9)
+        lane = _add_lane(self.ops, 1)
+        self.assertEqual(len(self.ops.pairs), 3)
+        self.assertIs(self.ops.undo_last_pair(), pair)
+        self.assertIs(self.ops.undo_last_lane(), lane)
+        self.assertEqual([p.radar_id for p in self.ops.pairs], [7, 8])
+        self.assertEqual(len(self.ops.lanes), 1)
+        self.assertConsistent()
+
+    def test_undo_after_clear_batch(self):
+        p0 = _add_pair(self.ops, 0, 1)
+        _add_pair(self.ops, 1, 2)
+        p2 = _add_pair(self.ops, 0, 3)
+        _add_lane(self.ops, 1)
+        l1 = _add_lane(self.ops, 0)
+
+        # Shifts p2 / l1 below their recorded undo index
+        self.ops.clear_batch(1)
+        self.assertConsistent()
+        self.assertIs(self.ops.undo_last_pair(), p2)
+        self.assertIs(self.ops.undo_last_lane(), l1)
+        self.assertConsistent()
+
+        # The cleared pair's undo entry is skipped; nothing is returned for it
+        self.assertIs(self.ops.undo_last_pair(), p0)
+        self.assertIsNone(self.ops.undo_last_pair())
+        self.assertIsNone(self.ops.undo_last_lane())
+        self.assertEqual(self.ops.pairs, [])
+        self.assertEqual(self.ops.lanes, [])
+
+    def test_undo_of_cleared_item_removes_nothing(self):
+        self.ops.restore_points([{'batch': 1, 'radar_id': 5}])
+        _add_pair(self.ops, 2, 1)
+        _add_lane(self.ops, 2)
+        self.ops.clear_batch(2)
+        kept = list(self.ops.pairs)
+        self.assertIsNone(self.ops.undo_last_pair())
+        self.assertIsNone(self.ops.undo_last_lane())
+        self.assertEqual(self.ops.pairs, kept)
+        self.assertConsistent()
+
+    def test_clear_all(self):
+        _add_pair(self.ops, 0, 1)
+        _add_lane(self.ops, 0)
+        self.ops.clear_all()
+        self.assertIsNone(self.ops.undo_last_pair())
+        self.assertIsNone(self.ops.undo_last_lane())
+        self.assertFalse(self.ops.has_marks_for_batch(0))
+        self.assertConsistent()
+
+
+class BatchIndexTest(unittest.TestCase):
+    """The batch buckets track every way pairs / lanes change."""
+
+    def test_interleaved_batches(self):
+        ops = OperationsController()
+        ops.restore_points([{'batch': b, 'radar_id': b} for b in (3, 1, 3)])
+        ops.restore_lanes([{'start': (0, 0), 'end': (1, 1), 'batch': b} for b in (1, 2)])
+        _check_batch_index(self, ops)
+        for step, batch in enumerate((1, 4, 3, 4, 2)):
+            _add_pair(ops, batch, 10 + step, u=float(step))
+            _add_lane(ops, batch, x=float(step))
+            _check_batch_index(self, ops)
+        for batch in (3, 9, 4):
+            ops.clear_batch(batch)
+            _check_batch_index(self, ops)
+        while ops.undo_last_pair() or ops.undo_last_lane():
+            _check_batch_index(self, ops)
+        self.assertEqual([p.radar_id for p in ops.pairs], [1])
+        self.assertEqual([l.batch for l in ops.lanes], [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
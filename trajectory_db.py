@@ -9,7 +9,9 @@ Also stores camera detections for matched visualization.
 import sqlite3
 import os
 import json
-from typing import List, Tuple, Dict, Optional
+from typing import List, Tuple, Dict, Optional, Callable
+
+import numpy as np
 
 
 class TrajectoryDB:
@@ -27,6 +29,10 @@ class TrajectoryDB:
             self.conn = sqlite3.connect(':memory:')
             
         self.cursor = self.conn.cursor()
+        # target_id -> (frame ids (N,), [x, y, range, velocity, rcs] (N, 5)),
+        # by frame; filled per target by get_point_at_frame
+        self._radar_soa: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._configure_connection()
         self._create_schema()
         
         # If file-based and has data, mark as loaded
@@ -38,30 +44,26 @@ class TrajectoryDB:
         else:
             self.loaded = False
     
-    def add_matched_pair(self, radar_id: int, camera_id: int):
-        """Add a matched pair to the database."""
-        try:
-            print(f"[TrajectoryDB] Adding pair R{radar_id}-C{camera_id}...")
-            self.cursor.execute('''
-                INSERT OR IGNORE INTO matched_pairs (radar_id, camera_id)
-                VALUES (?, ?)
-            ''', (radar_id, camera_id))
-            self.conn.commit()
-            print(f"[TrajectoryDB] Pair R{radar_id}-C{camera_id} saved.")
-        except Exception as e:
-            print(f"[TrajectoryDB] Error adding pair: {e}")
-            
-    def get_matched_pairs(self) -> List[Tuple[int, int]]:
-        """Get all matched pairs."""
-        try:
-            self.cursor.execute('SELECT radar_id, camera_id FROM matched_pairs')
-            rows = self.cursor.fetchall()
-            print(f"[TrajectoryDB] Retrieved {len(rows)} matched pairs")
-            return rows
-        except Exception as e:
-            print(f"[TrajectoryDB] Error getting pairs: {e}")
-            return []
-        
+    # Connection tuning, applied to every connection (GUI and loader worker).
+    # WAL lets playback reads run while an auto-save or the radar loader
+    # commits, and with WAL synchronous=NORMAL only fsyncs at checkpoints:
+    # a power loss can drop the last commits but never corrupts the file.
+    # journal_mode=WAL is persistent: it is stored in the DB file itself, and
+    # open connections keep -wal / -shm files next to it (git-ignored).
+    PRAGMAS = (
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA temp_store=MEMORY',
+        'PRAGMA mmap_size=268435456',   # 256 MiB
+        'PRAGMA cache_size=-65536',     # 64 MiB
+        'PRAGMA busy_timeout=5000',     # ms
+    )
+    
+    def _configure_connection(self):
+        """Apply PRAGMAS (journal_mode is a no-op for :memory:)."""
+        for pragma in self.PRAGMAS:
+            self.cursor.execute(pragma)
+    
     def _create_schema(self):
         """Create database schema."""
         # Radar trajectories
@@ -77,8 +79,13 @@ class TrajectoryDB:
                 rcs REAL
             )
         ''')
-        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_radar_target ON radar_trajectories(target_id)')
         self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_radar_frame ON radar_trajectories(frame_id)')
+        # Covers get_trajectory: index-only scan in frame order. Its target_id
+        # prefix also serves target-only lookups, so the old single-column
+        # index is dropped instead of being maintained on every insert
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_radar_target_frame '
+                            'ON radar_trajectories(target_id, frame_id, x, y)')
+        self.cursor.execute('DROP INDEX IF EXISTS idx_radar_target')
         
         # Camera trajectories
         self.cursor.execute('''
@@ -93,8 +100,10 @@ class TrajectoryDB:
                 confidence REAL
             )
         ''')
-        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_camera_target ON camera_trajectories(target_id)')
         self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_camera_frame ON camera_trajectories(frame_id)')
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_camera_target_frame '
+                            'ON camera_trajectories(target_id, frame_id, u, v)')
+        self.cursor.execute('DROP INDEX IF EXISTS idx_camera_target')  # As idx_radar_target
         
         # Matched pairs (Persistent)
         self.cursor.execute('''
@@ -139,15 +148,24 @@ class TrajectoryDB:
         # For now, let's keep matched_pairs and calibration even for in-memory 
         # (assuming it's a session DB).
         self.conn.commit()
+        self.invalidate_cache()
         self.loaded = False
         
+    def _write_calibration_state(self, camera_params: dict, radar_params: dict):
+        self.cursor.executemany('INSERT OR REPLACE INTO calibration_params (key, value) VALUES (?, ?)',
+                                [('camera', json.dumps(camera_params)),
+                                 ('radar', json.dumps(radar_params))])
+    
+    def _write_calibration_points(self, point_pairs: list, lanes: list = None):
+        self.cursor.execute('DELETE FROM calibration_points')
+        rows = [('pair', json.dumps(p_dict)) for p_dict in point_pairs]
+        rows += [('lane', json.dumps(l_dict)) for l_dict in (lanes or [])]
+        self.cursor.executemany('INSERT INTO calibration_points (type, data) VALUES (?, ?)', rows)
+    
     def save_calibration_state(self, camera_params: dict, radar_params: dict):
         """Save calibration parameters to DB."""
         try:
-            self.cursor.execute('INSERT OR REPLACE INTO calibration_params (key, value) VALUES (?, ?)', 
-                              ('camera', json.dumps(camera_params)))
-            self.cursor.execute('INSERT OR REPLACE INTO calibration_params (key, value) VALUES (?, ?)', 
-                              ('radar', json.dumps(radar_params)))
+            self._write_calibration_state(camera_params, radar_params)
             self.conn.commit()
         except Exception as e:
             print(f"[TrajectoryDB] Error saving calibration: {e}")
@@ -168,36 +186,37 @@ class TrajectoryDB:
     def save_calibration_points(self, point_pairs: list, lanes: list = None):
         """Save selected point pairs and lanes (expects list of dicts)."""
         try:
-            self.cursor.execute('DELETE FROM calibration_points')
-            
-            # Save pairs
-            for p_dict in point_pairs:
-                self.cursor.execute('INSERT INTO calibration_points (type, data) VALUES (?, ?)', 
-                                  ('pair', json.dumps(p_dict)))
-            
-            # Save lanes
-            if lanes:
-                for l_dict in lanes:
-                    self.cursor.execute('INSERT INTO calibration_points (type, data) VALUES (?, ?)', 
-                                      ('lane', json.dumps(l_dict)))
-            
+            self._write_calibration_points(point_pairs, lanes)
             self.conn.commit()
         except Exception as e:
             print(f"[TrajectoryDB] Error saving points: {e}")
+    
+    def save_session_state(self, camera_params: dict, radar_params: dict,
+                           point_pairs: list, lanes: list = None):
+        """Save calibration parameters and points in a single transaction."""
+        try:
+            with self.conn:  # Commits once, rolls back on error
+                self._write_calibration_state(camera_params, radar_params)
+                self._write_calibration_points(point_pairs, lanes)
+        except Exception as e:
+            print(f"[TrajectoryDB] Error saving session state: {e}")
             
     def load_calibration_points(self) -> List[dict]:
         """Load calibration points. Returns list of dicts."""
         self.cursor.execute('SELECT data FROM calibration_points WHERE type="pair"')
         return [json.loads(row[0]) for row in self.cursor.fetchall()]
-        """Add a matched pair to the database."""
-        try:
-            self.cursor.execute('''
+    
+    def add_matched_pair(self, radar_id: int, camera_id: int):
+        """Add a matched pair to the database (one transaction; raises on failure)."""
+        self.add_matched_pairs([(radar_id, camera_id)])
+    
+    def add_matched_pairs(self, pairs: List[Tuple[int, int]]):
+        """Add (radar_id, camera_id) pairs in a single transaction; raises on failure."""
+        with self.conn:  # Commits once, rolls back on error
+            self.cursor.executemany('''
                 INSERT OR IGNORE INTO matched_pairs (radar_id, camera_id)
                 VALUES (?, ?)
-            ''', (radar_id, camera_id))
-            self.conn.commit()
-        except Exception as e:
-            print(f"[TrajectoryDB] Error adding pair: {e}")
+            ''', pairs)
             
     def get_matched_pairs(self) -> List[Tuple[int, int]]:
         """Get all matched pairs."""
@@ -206,11 +225,11 @@ class TrajectoryDB:
         
     def remove_matched_pair(self, radar_id: int, camera_id: int):
         """Remove a matched pair."""
-        self.cursor.execute('''
-            DELETE FROM matched_pairs 
-            WHERE radar_id = ? AND camera_id = ?
-        ''', (radar_id, camera_id))
-        self.conn.commit()
+        with self.conn:
+            self.cursor.execute('''
+                DELETE FROM matched_pairs 
+                WHERE radar_id = ? AND camera_id = ?
+            ''', (radar_id, camera_id))
     
     def save_pairs_to_disk(self, filepath: str = 'matched_pairs.json'):
         """Save matched pairs to a JSON file."""
@@ -230,31 +249,61 @@ class TrajectoryDB:
         try:
             with open(filepath, 'r') as f:
                 data = json.load(f)
-            count = 0
-            for item in data:
-                self.add_matched_pair(item.get('radar_id'), item.get('camera_id'))
-                count += 1
+            pairs = [(item.get('radar_id'), item.get('camera_id')) for item in data]
+            self.add_matched_pairs(pairs)
+            count = len(pairs)
             print(f"[TrajectoryDB] Loaded {count} pairs from {filepath}")
         except Exception as e:
             print(f"[TrajectoryDB] Error loading pairs: {e}")
 
-    def load_all_radar_files(self, data_root: str) -> int:
+    INSERT_CHUNK = 10000  # Rows per executemany in load_all_radar_files
+    
+    def load_all_radar_files(self, data_root: str,
+                             progress: Optional[Callable[[int, int], None]] = None) -> int:
         """
         Load all radar JSON files from data_root/radar/ directory.
+        progress(done, total) is called as each radar file is started.
         Returns number of trajectory points loaded.
-        """
-        self.clear()
         
+        Rows are inserted INSERT_CHUNK at a time, each chunk in its own short
+        transaction, so the write lock is never held across the whole load
+        (the GUI connection's auto-save and pair edits interleave with it).
+        """
         radar_dir = os.path.join(data_root, 'radar')
         camera_dir = os.path.join(data_root, 'camera')
         
+        radar_sql = '''
+            INSERT INTO radar_trajectories 
+            (target_id, frame_id, x, y, range_val, velocity, rcs)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        '''
+        camera_sql = '''
+            INSERT INTO camera_trajectories 
+            (target_id, frame_id, u, v, x_bev, y_bev, confidence)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        '''
+        
         count = 0
+        rows = []
+        
+        def flush(sql, force=False):
+            if rows and (force or len(rows) >= self.INSERT_CHUNK):
+                with self.conn:  # One commit per chunk
+                    self.cursor.executemany(sql, rows)
+                rows.clear()
+        
+        with self.conn:
+            self.cursor.execute('DELETE FROM radar_trajectories')
+            self.cursor.execute('DELETE FROM camera_trajectories')
+        self.invalidate_cache()
+        self.loaded = False
         
         # Load radar data
         if os.path.exists(radar_dir):
-            for fname in sorted(os.listdir(radar_dir)):
-                if not fname.endswith('.json'):
-                    continue
+            radar_files = [f for f in sorted(os.listdir(radar_dir)) if f.endswith('.json')]
+            for i, fname in enumerate(radar_files):
+                if progress:
+                    progress(i, len(radar_files))
                     
                 try:
                     frame_id = int(os.path.splitext(fname)[0])
@@ -267,23 +316,21 @@ class TrajectoryDB:
                         data = json.load(f)
                         
                     targets = data.get('targets', [])
-                    for t in targets:
-                        self.cursor.execute('''
-                            INSERT INTO radar_trajectories 
-                            (target_id, frame_id, x, y, range_val, velocity, rcs)
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            t.get('id', 0),
-                            frame_id,
-                            t.get('x', 0.0),
-                            t.get('y', 0.0),
-                            t.get('range', 0.0),
-                            t.get('velocity', 0.0),
-                            t.get('rcs', 0.0)
-                        ))
-                        count += 1
+                    file_rows = [(
+                        t.get('id', 0),
+                        frame_id,
+                        t.get('x', 0.0),
+                        t.get('y', 0.0),
+                        t.get('range', 0.0),
+                        t.get('velocity', 0.0),
+                        t.get('rcs', 0.0)
+                    ) for t in targets]
+                    rows.extend(file_rows)
+                    count += len(file_rows)
                 except Exception as e:
                     print(f"[TrajectoryDB] Error loading radar {fname}: {e}")
+                flush(radar_sql)
+            flush(radar_sql, force=True)
         
         # Load camera data
         if os.path.exists(camera_dir):
@@ -302,24 +349,21 @@ class TrajectoryDB:
                         data = json.load(f)
                         
                     detections = data.get('detections', [])
-                    for d in detections:
-                        self.cursor.execute('''
-                            INSERT INTO camera_trajectories 
-                            (target_id, frame_id, u, v, x_bev, y_bev, confidence)
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            d.get('id', 0),
-                            frame_id,
-                            d.get('u', 0.0),
-                            d.get('v', 0.0),
-                            d.get('x_bev', 0.0),
-                            d.get('y_bev', 0.0),
-                            d.get('confidence', 0.0)
-                        ))
+                    file_rows = [(
+                        d.get('id', 0),
+                        frame_id,
+                        d.get('u', 0.0),
+                        d.get('v', 0.0),
+                        d.get('x_bev', 0.0),
+                        d.get('y_bev', 0.0),
+                        d.get('confidence', 0.0)
+                    ) for d in detections]
+                    rows.extend(file_rows)
                 except Exception as e:
                     print(f"[TrajectoryDB] Error loading camera {fname}: {e}")
-                        
-        self.conn.commit()
+                flush(camera_sql)
+            flush(camera_sql, force=True)
+                    
         self.loaded = True
         print(f"[TrajectoryDB] Loaded {count} radar points")
         return count
@@ -351,35 +395,84 @@ class TrajectoryDB:
         ''', (target_id,))
         return self.cursor.fetchall()
         
-    def get_all_trajectories(self) -> Dict[int, List[Tuple[int, float, float]]]:
-        """Get all radar trajectories grouped by target_id."""
-        target_ids = self.get_all_target_ids()
-        result = {}
-        for tid in target_ids:
-            result[tid] = self.get_trajectory(tid)
-        return result
+    @staticmethod
+    def _group_by_target(rows: list, width: int) -> Dict[int, np.ndarray]:
+        """
+        Split (target_id, *values) rows sorted by target_id into
+        {target_id: (N, width) float64 array}; the arrays are views of one block.
+        """
+        a = np.array(rows, dtype=np.float64).reshape(-1, width + 1)
+        if not len(a):
+            return {}
+        starts = np.flatnonzero(np.diff(a[:, 0])) + 1
+        values = np.ascontiguousarray(a[:, 1:])
+        ids = a[np.concatenate(([0], starts)), 0].astype(np.int64).tolist()
+        return dict(zip(ids, np.split(values, starts)))
     
-    def get_all_camera_trajectories(self) -> Dict[int, List[Tuple[int, float, float, float, float]]]:
-        """Get all camera trajectories grouped by target_id."""
-        target_ids = self.get_all_target_ids()
-        result = {}
-        for tid in target_ids:
-            traj = self.get_camera_trajectory(tid)
-            if traj:
-                result[tid] = traj
-        return result
+    def get_all_trajectories(self) -> Dict[int, np.ndarray]:
+        """
+        Get all radar trajectories grouped by target_id (one indexed scan),
+        as (N, 3) float64 arrays of (frame_id, x, y) sorted by frame.
+        """
+        self.cursor.execute('''
+            SELECT target_id, frame_id, x, y FROM radar_trajectories 
+            ORDER BY target_id, frame_id
+        ''')
+        return self._group_by_target(self.cursor.fetchall(), 3)
+    
+    def get_all_camera_trajectories(self) -> Dict[int, np.ndarray]:
+        """
+        Get camera trajectories of the radar target ids, grouped by target_id,
+        as (N, 5) float64 arrays of (frame_id, u, v, x_bev, y_bev) sorted by frame.
+        """
+        self.cursor.execute('''
+            SELECT target_id, frame_id, u, v, x_bev, y_bev FROM camera_trajectories 
+            WHERE target_id IN (SELECT target_id FROM radar_trajectories)
+            ORDER BY target_id, frame_id
+        ''')
+        return self._group_by_target(self.cursor.fetchall(), 5)
+        
+    def get_point_counts(self) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """
+        Points per target as ({radar target_id: count}, {camera target_id: count}),
+        ordered by target_id; camera counts only cover radar target ids.
+        """
+        self.cursor.execute('''
+            SELECT target_id, COUNT(*) FROM radar_trajectories
+            GROUP BY target_id ORDER BY target_id
+        ''')
+        radar = dict(self.cursor.fetchall())
+        self.cursor.execute('''
+            SELECT target_id, COUNT(*) FROM camera_trajectories
+            WHERE target_id IN (SELECT target_id FROM radar_trajectories)
+            GROUP BY target_id ORDER BY target_id
+        ''')
+        return radar, dict(self.cursor.fetchall())
         
     def get_point_at_frame(self, target_id: int, frame_id: int) -> Optional[Tuple[float, float, float, float, float]]:
         """
         Get radar target position at specific frame.
         Returns (x, y, range, velocity, rcs) or None if not found.
+        The target's whole track is read once into packed arrays; later
+        frames of it are a binary search, not a query.
         """
-        self.cursor.execute('''
-            SELECT x, y, range_val, velocity, rcs FROM radar_trajectories 
-            WHERE target_id = ? AND frame_id = ?
-        ''', (target_id, frame_id))
-        row = self.cursor.fetchone()
-        return row if row else None
+        soa = self._radar_soa.get(target_id)
+        if soa is None:
+            self.cursor.execute('''
+                SELECT frame_id, x, y, range_val, velocity, rcs FROM radar_trajectories 
+                WHERE target_id = ? ORDER BY frame_id
+            ''', (target_id,))
+            rows = np.array(self.cursor.fetchall(), dtype=np.float64).reshape(-1, 6)
+            soa = self._radar_soa[target_id] = (rows[:, 0].astype(np.int64), rows[:, 1:])
+        frames, cols = soa
+        i = np.searchsorted(frames, frame_id)
+        if i < len(frames) and frames[i] == frame_id:
+            return tuple(cols[i].tolist())
+        return None
+    
+    def invalidate_cache(self):
+        """Drop per-target arrays; call after the radar rows were replaced."""
+        self._radar_soa.clear()
     
     def get_camera_point_at_frame(self, target_id: int, frame_id: int) -> Optional[Tuple[float, float]]:
         """
@@ -10,7 +10,7 @@ from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem,
     QPushButton, QLabel, QGroupBox, QSplitter, QFrame
 )
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, QSignalBlocker, pyqtSignal
 from PyQt6.QtGui import QColor, QFont
 
 from config import PAIR_COLORS
@@ -38,8 +38,8 @@ class TrajectoryMatchDialog(QDialog):
         self.setModal(False)  # Non-modal so user can interact with main window
         self.setMinimumSize(400, 500)
         
+        # Lists are filled by refresh(), when the dialog is opened
         self._setupUI()
-        self._loadData()
         self._connectSignals()
         self._pair_callback = None
         
@@ -106,25 +106,22 @@ class TrajectoryMatchDialog(QDialog):
         if not self.trajectory_db or not self.trajectory_db.loaded:
             return
         
-        # Get all radar target IDs
-        radar_ids = self.trajectory_db.get_all_target_ids()
-        for rid in radar_ids:
-            traj = self.trajectory_db.get_trajectory(rid)
-            item = QListWidgetItem(f"R{rid} ({len(traj)} frames)")
+        # Frame counts of all targets in two grouped queries
+        radar_counts, camera_counts = self.trajectory_db.get_point_counts()
+        for rid, n in radar_counts.items():
+            item = QListWidgetItem(f"R{rid} ({n} frames)")
             item.setData(Qt.ItemDataRole.UserRole, rid)
             color = QColor(PAIR_COLORS[rid % len(PAIR_COLORS)])
             item.setForeground(color)
             self.radar_list.addItem(item)
         
-        # Get all camera target IDs
-        for cid in radar_ids:
-            traj = self.trajectory_db.get_camera_trajectory(cid)
-            if traj:
-                item = QListWidgetItem(f"C{cid} ({len(traj)} frames)")
-                item.setData(Qt.ItemDataRole.UserRole, cid)
-                color = QColor(PAIR_COLORS[cid % len(PAIR_COLORS)])
-                item.setForeground(color)
-                self.camera_list.addItem(item)
+        # Camera targets sharing a radar target ID
+        for cid, n in camera_counts.items():
+            item = QListWidgetItem(f"C{cid} ({n} frames)")
+            item.setData(Qt.ItemDataRole.UserRole, cid)
+            color = QColor(PAIR_COLORS[cid % len(PAIR_COLORS)])
+            item.setForeground(color)
+            self.camera_list.addItem(item)
     
     def _connectSignals(self):
         # Use currentItemChanged for more robust selection detection
@@ -175,10 +172,19 @@ class TrajectoryMatchDialog(QDialog):
         self.pairSelected.emit(-1, -1)
     
     def refresh(self):
-        """Refresh data from trajectory database."""
-        self.radar_list.clear()
-        self.camera_list.clear()
-        self.selected_radar_id = None
-        self.selected_camera_id = None
-        self._loadData()
+        """Refresh data from trajectory database (one repaint, no preview signals)."""
+        lists = (self.radar_list, self.camera_list)
+        blockers = [QSignalBlocker(lst) for lst in lists]
+        for lst in lists:
+            lst.setUpdatesEnabled(False)
+        try:
+            self.radar_list.clear()
+            self.camera_list.clear()
+            self.selected_radar_id = None
+            self.selected_camera_id = None
+            self._loadData()
+        finally:
+            for lst, blocker in zip(lists, blockers):
+                blocker.unblock()
+                lst.setUpdatesEnabled(True)
         self._updateSelection()
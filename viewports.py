@@ -4,15 +4,19 @@ viewports.py - 用于图像和BEV显示的自定义QGraphicsView组件
 """
 
 from typing import Optional, List, Tuple, Dict
+from collections import OrderedDict
+from PyQt6 import sip
 from PyQt6.QtWidgets import (
-    QGraphicsView, QGraphicsScene, QGraphicsPixmapItem,
-    QGraphicsEllipseItem, QGraphicsLineItem, QGraphicsTextItem
+    QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QGraphicsItem,
+    QGraphicsEllipseItem, QGraphicsLineItem, QGraphicsTextItem, QGraphicsPathItem
 )
-from PyQt6.QtCore import Qt, QPointF, pyqtSignal
+from PyQt6.QtCore import Qt, QPointF, QRectF, QLineF, QSize, pyqtSignal
 from PyQt6.QtGui import (
-    QPixmap, QPen, QBrush, QColor, QFont, QWheelEvent, QMouseEvent, QPainter
+    QPixmap, QPen, QBrush, QColor, QFont, QWheelEvent, QMouseEvent, QPainter,
+    QPainterPath, QPolygonF, QImage, QImageReader, QFontMetricsF
 )
 import os
+import numpy as np
 
 from config import COLORS, PAIR_COLORS, MARKER_SIZE_RADAR, MARKER_SIZE_IMAGE, MARKER_SIZE_PREVIEW, LANE_POINT_SIZE
 
@@ -40,6 +44,20 @@ class ZoomPanView(QGraphicsView):
         self._click_mode = False
         self._panning = False
         self._pan_start = None
+        self._overlay_batch = 0  # Nesting depth of beginOverlayBatch()
+    
+    def beginOverlayBatch(self):
+        """Suspend repaints while several overlay items change; pair with endOverlayBatch()."""
+        if self._overlay_batch == 0:
+            self.setUpdatesEnabled(False)
+        self._overlay_batch += 1
+    
+    def endOverlayBatch(self):
+        """Resume repaints and repaint once when the outermost batch ends."""
+        self._overlay_batch -= 1
+        if self._overlay_batch == 0:
+            self.setUpdatesEnabled(True)
+            self.viewport().update()
     
     def setClickMode(self, enabled: bool):
         """Enable/disable left-click point selection mode."""
@@ -129,6 +147,10 @@ class ImageViewport(ZoomPanView):
     imageClicked = pyqtSignal(float, float)  # Clicked to select image point
     mouseMoved = pyqtSignal(float, float)    # Mouse moved (for preview)
     
+    PIXMAP_CACHE_SIZE = 32    # Decoded full-res frames kept (LRU)
+    PREVIEW_CACHE_SIZE = 64   # Downscaled scrubbing frames kept (LRU)
+    PREVIEW_WIDTH = 640       # Decode width while scrubbing the batch slider
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self._scene = QGraphicsScene(self)
@@ -136,23 +158,32 @@ class ImageViewport(ZoomPanView):
         self.setMouseTracking(True)
         
         self._pixmap_item: Optional[QGraphicsPixmapItem] = None
+        # (path, mtime_ns) -> QPixmap
+        self._pix_cache: "OrderedDict[Tuple[str, int], QPixmap]" = OrderedDict()
+        # (path, mtime_ns) -> (preview QPixmap, scale to full-res pixels)
+        self._preview_cache: "OrderedDict[Tuple[str, int], Tuple[QPixmap, float]]" = OrderedDict()
         
-        # Radar projection markers: [(ellipse_item, target_dict), ...]
-        self._radar_markers: List[Tuple[QGraphicsEllipseItem, dict]] = []
-        self._radar_labels: List = []
+        # Projected radar markers (one item for all rings + labels)
+        self._radar_rings = RadarRingsItem(COLORS['radar'], MARKER_SIZE_RADAR)
+        self._radar_rings.setZValue(10)
+        self._scene.addItem(self._radar_rings)
         
-        # Completed pair markers
+        # Completed pair markers, plus (pair_index, start) of each
+        # addPairMarker call so the last pair can be popped on undo
         self._pair_markers: List = []
+        self._pair_marker_groups: List[Tuple[int, int]] = []
         
         # Pending selection markers
-        self._pending_radar_marker: Optional[QGraphicsEllipseItem] = None
         self._preview_marker: Optional[QGraphicsEllipseItem] = None
         
-        # Lane markers
+        # Lane markers, plus the start offset of each lane's items
         self._lane_markers: List = []
+        self._lane_marker_starts: List[int] = []
         self._pending_lane_start: Optional[QPointF] = None
         self._pending_lane_line: Optional[QGraphicsLineItem] = None
         
+        self._initTrajectoryOverlays()
+        
         self._mode = 'normal'  # 'normal', 'select_radar', 'select_image', 'lane_start', 'lane_end'
     
     def setMode(self, mode: str):
@@ -164,19 +195,81 @@ class ImageViewport(ZoomPanView):
             self._scene.removeItem(self._preview_marker)
             self._preview_marker = None
     
-    def loadImage(self, path: str) -> bool:
-        if not os.path.exists(path):
+    def loadImage(self, path: str, preview: bool = False) -> bool:
+        """
+        Show image at path. Full-res pixmaps come from an LRU cache.
+        preview=True (slider scrubbing) decodes a PREVIEW_WIDTH-wide version
+        on a cache miss and scales the item up, so scene coords stay in pixels.
+        """
+        try:
+            key = (path, os.stat(path).st_mtime_ns)
+        except OSError:
             return False
+        
+        pix = self._pix_cache.get(key)
+        if pix is not None:
+            self._pix_cache.move_to_end(key)
+            return self._setPixmap(pix)
+        
+        if preview:
+            cached = self._preview_cache.get(key)
+            if cached is not None:
+                self._preview_cache.move_to_end(key)
+                return self._setPixmap(*cached)
+            reader = QImageReader(path)
+            full = reader.size()
+            if full.isValid() and full.width() > self.PREVIEW_WIDTH:
+                # Let the decoder downscale (JPEG decodes at reduced size)
+                h = round(full.height() * self.PREVIEW_WIDTH / full.width())
+                reader.setScaledSize(QSize(self.PREVIEW_WIDTH, h))
+                # Straight into a QPixmap; no QImage is kept around for display
+                pix = QPixmap.fromImageReader(reader)
+                if not pix.isNull():
+                    scale = full.width() / pix.width()
+                    self._preview_cache[key] = (pix, scale)
+                    if len(self._preview_cache) > self.PREVIEW_CACHE_SIZE:
+                        self._preview_cache.popitem(last=False)
+                    return self._setPixmap(pix, scale)
+        
         pix = QPixmap(path)
         if pix.isNull():
             return False
-        
+        self._cachePixmap(key, pix)
+        return self._setPixmap(pix)
+    
+    def _cachePixmap(self, key: Tuple[str, int], pix: QPixmap):
+        self._pix_cache[key] = pix
+        if len(self._pix_cache) > self.PIXMAP_CACHE_SIZE:
+            self._pix_cache.popitem(last=False)
+    
+    def hasCachedImage(self, path: str) -> bool:
+        try:
+            return (path, os.stat(path).st_mtime_ns) in self._pix_cache
+        except OSError:
+            return False
+    
+    def cacheImage(self, path: str, image: QImage):
+        """
+        Add a full-res image decoded off the GUI thread (playback prefetch) to
+        the pixmap cache; only the QImage -> QPixmap upload happens here.
+        """
+        try:
+            key = (path, os.stat(path).st_mtime_ns)
+        except OSError:
+            return
+        if key not in self._pix_cache and not image.isNull():
+            self._cachePixmap(key, QPixmap.fromImage(image))
+    
+    def _setPixmap(self, pix: QPixmap, scale: float = 1.0) -> bool:
         if self._pixmap_item:
             self._scene.removeItem(self._pixmap_item)
         
         self._pixmap_item = QGraphicsPixmapItem(pix)
+        if scale != 1.0:
+            self._pixmap_item.setTransformationMode(Qt.TransformationMode.FastTransformation)
+            self._pixmap_item.setScale(scale)
         self._scene.addItem(self._pixmap_item)
-        self._scene.setSceneRect(self._pixmap_item.boundingRect())
+        self._scene.setSceneRect(self._pixmap_item.sceneBoundingRect())
         self.fitContent()
         return True
     
@@ -184,49 +277,24 @@ class ImageViewport(ZoomPanView):
     # Radar Projections
     # -------------------------------------------------------------------------
     def clearRadarMarkers(self):
-        for item, _ in self._radar_markers:
-            if item.scene():
-                self._scene.removeItem(item)
-        for item in self._radar_labels:
-            if item.scene():
-                self._scene.removeItem(item)
-        self._radar_markers.clear()
-        self._radar_labels.clear()
-    
-    def addRadarProjection(self, u: float, v: float, target: dict):
-        """Add a projected radar point marker."""
-        size = MARKER_SIZE_RADAR
-        marker = QGraphicsEllipseItem(u - size/2, v - size/2, size, size)
-        marker.setPen(QPen(QColor(COLORS['radar']), 3))
-        marker.setBrush(QBrush(Qt.BrushStyle.NoBrush))
-        marker.setZValue(10)
-        self._scene.addItem(marker)
-        self._radar_markers.append((marker, target))
-        
-        # Label
-        tid = target.get('id', '?')
-        label = QGraphicsTextItem(f"R{tid}")
-        label.setDefaultTextColor(QColor(COLORS['radar']))
-        label.setFont(QFont("Arial", 10, QFont.Weight.Bold))
-        label.setPos(u + size/2 + 4, v - size/2)
-        label.setZValue(10)
-        self._scene.addItem(label)
-        self._radar_labels.append(label)
+        self._radar_rings.clear()
+    
+    def addRadarProjections(self, uv: np.ndarray, targets: List[dict]):
+        """Set the projected radar markers: (N, 2) image points and their targets."""
+        self._radar_rings.setPoints(uv, targets)
+    
+    @property
+    def radarTargets(self) -> List[dict]:
+        """Targets of the currently shown radar markers."""
+        return self._radar_rings.targets
     
     def highlightPendingRadar(self, target: dict):
         """Highlight a radar point as pending selection (yellow)."""
-        # Find the marker for this target
-        for marker, t in self._radar_markers:
-            if t.get('id') == target.get('id'):
-                marker.setPen(QPen(QColor(COLORS['radar_pending']), 4))
-                self._pending_radar_marker = marker
-                break
+        self._radar_rings.setHighlight(target.get('id'))
     
     def clearPendingRadar(self):
         """Reset pending radar highlight."""
-        if self._pending_radar_marker:
-            self._pending_radar_marker.setPen(QPen(QColor(COLORS['radar']), 3))
-            self._pending_radar_marker = None
+        self._radar_rings.setHighlight(None)
     
     # -------------------------------------------------------------------------
     # Preview Marker (follows mouse)
@@ -280,10 +348,28 @@ class ImageViewport(ZoomPanView):
             if item.scene():
                 self._scene.removeItem(item)
         self._pair_markers.clear()
+        self._pair_marker_groups.clear()
+    
+    def _removeMarkersFrom(self, items: List, start: int):
+        for item in items[start:]:
+            if item.scene():
+                self._scene.removeItem(item)
+        del items[start:]
+    
+    def popLastPairMarker(self):
+        """Remove the markers of the most recently added pair only."""
+        if not self._pair_marker_groups:
+            return
+        last_index = self._pair_marker_groups[-1][0]
+        start = len(self._pair_markers)
+        while self._pair_marker_groups and self._pair_marker_groups[-1][0] == last_index:
+            start = self._pair_marker_groups.pop()[1]
+        self._removeMarkersFrom(self._pair_markers, start)
     
     def addPairMarker(self, u: float, v: float, pair_index: int, is_radar: bool):
         """Add a completed pair marker with color matching pair index."""
         color = QColor(PAIR_COLORS[pair_index % len(PAIR_COLORS)])
+        self._pair_marker_groups.append((pair_index, len(self._pair_markers)))
         
         if is_radar:
             # Radar point: larger circle, no fill
@@ -329,7 +415,12 @@ class ImageViewport(ZoomPanView):
         label.setZValue(20)
         self._scene.addItem(label)
         self._pair_markers.append(label)
-
+    
+    def addPairMarkers(self, cols: np.ndarray, indices: List[int]):
+        """Add radar + image markers for several pairs; cols is (N, 4) [radar_u, radar_v, pixel_u, pixel_v]."""
+        for (ru, rv, pu, pv), i in zip(np.asarray(cols)[:, :4].tolist(), indices):
+            self.addPairMarker(ru, rv, i, is_radar=True)
+            self.addPairMarker(pu, pv, i, is_radar=False)
     
     # -------------------------------------------------------------------------
     # Lane Markers
@@ -339,12 +430,19 @@ class ImageViewport(ZoomPanView):
             if item.scene():
                 self._scene.removeItem(item)
         self._lane_markers.clear()
+        self._lane_marker_starts.clear()
         self._pending_lane_start = None
         self.clearPreview()
     
+    def popLastLaneMarker(self):
+        """Remove the items of the most recently drawn lane only."""
+        if self._lane_marker_starts:
+            self._removeMarkersFrom(self._lane_markers, self._lane_marker_starts.pop())
+    
     def setLaneStart(self, x: float, y: float):
         """Set the start point of a new lane."""
         self._pending_lane_start = QPointF(x, y)
+        self._lane_marker_starts.append(len(self._lane_markers))
         
         # Draw start point
         size = LANE_POINT_SIZE
@@ -388,10 +486,8 @@ class ImageViewport(ZoomPanView):
         """Undo the last lane start point if pending."""
         if self._pending_lane_start:
             # Remove the start dot
-            if self._lane_markers:
-                item = self._lane_markers.pop()
-                if item.scene():
-                    self._scene.removeItem(item)
+            if self._lane_marker_starts:
+                self._removeMarkersFrom(self._lane_markers, self._lane_marker_starts.pop())
             self._pending_lane_start = None
             self.clearPreview()
             return True
@@ -410,16 +506,7 @@ class ImageViewport(ZoomPanView):
         
         if self._mode == 'select_radar':
             # Find clicked radar point
-            min_dist = float('inf')
-            nearest = None
-            for marker, target in self._radar_markers:
-                rect = marker.rect()
-                cx = rect.x() + rect.width() / 2
-                cy = rect.y() + rect.height() / 2
-                dist = ((cx - x)**2 + (cy - y)**2)**0.5
-                if dist < min_dist and dist < 50:
-                    min_dist = dist
-                    nearest = target
+            nearest = self._radar_rings.nearest(x, y, max_dist=50)
             if nearest:
                 self.radarClicked.emit(nearest)
         
@@ -436,79 +523,385 @@ class ImageViewport(ZoomPanView):
     # Trajectory Projection (轨迹投影)
     # -------------------------------------------------------------------------
     
+    def _initTrajectoryOverlays(self):
+        """
+        Persistent trajectory projection overlays. Markers are pre-rendered
+        once and the items are moved/shown per click instead of re-created.
+        """
+        self._trajectory_projection: List = []  # Extra items (paths), removed on clear
+        self._traj_radar_marker = QGraphicsPixmapItem(
+            _markerPixmap(20, QPen(QColor('#FFFF00'), 4), QBrush(QColor(255, 255, 0, 100))))
+        self._traj_radar_label = QGraphicsTextItem()
+        self._traj_radar_label.setDefaultTextColor(QColor('#FFFFFF'))
+        self._traj_radar_label.setFont(QFont("Arial", 12, QFont.Weight.Bold))
+        self._traj_camera_marker = QGraphicsPixmapItem(
+            _markerPixmap(16, QPen(QColor('#00FFFF'), 3), QBrush(QColor(0, 255, 255, 80)), square=True))
+        self._traj_camera_label = QGraphicsTextItem()
+        self._traj_camera_label.setDefaultTextColor(QColor('#00FFFF'))
+        self._traj_camera_label.setFont(QFont("Arial", 10, QFont.Weight.Bold))
+        self._traj_link = QGraphicsLineItem()
+        self._traj_link_pen = QPen(QColor('#FFFFFF'), 2, Qt.PenStyle.DashLine)
+        self._traj_link.setPen(self._traj_link_pen)
+        
+        self._traj_overlays = (self._traj_radar_marker, self._traj_radar_label,
+                               self._traj_camera_marker, self._traj_camera_label,
+                               self._traj_link)
+        for item in (self._traj_radar_marker, self._traj_camera_marker):
+            # Marker pixmaps are centred on the item position
+            r = item.pixmap().width() / 2
+            item.setOffset(-r, -r)
+        for item in self._traj_overlays:
+            item.setZValue(5)  # Above the image, below radar rings
+            item.setVisible(False)
+            self._scene.addItem(item)
+    
     def showTrajectoryProjection(self, u: float, v: float, target_id: int):
         """Show a highlighted trajectory projection point on image."""
         self.clearTrajectoryProjection()
         
-        size = 20
-        marker = QGraphicsEllipseItem(u - size/2, v - size/2, size, size)
-        marker.setPen(QPen(QColor('#FFFF00'), 4))
-        marker.setBrush(QBrush(QColor(255, 255, 0, 100)))
-        self._scene.addItem(marker)
-        
-        # Store for later removal
-        if not hasattr(self, '_trajectory_projection'):
-            self._trajectory_projection = []
-        self._trajectory_projection.append(marker)
-        
-        # Add label
-        label = QGraphicsTextItem(f"T{target_id}")
-        label.setDefaultTextColor(QColor('#FFFFFF'))
-        label.setFont(QFont("Arial", 12, QFont.Weight.Bold))
-        label.setPos(u + 12, v - 12)
-        self._scene.addItem(label)
-        self._trajectory_projection.append(label)
+        self._traj_radar_marker.setPos(u, v)
+        self._traj_radar_marker.setVisible(True)
+        self._traj_radar_label.setPlainText(f"T{target_id}")
+        self._traj_radar_label.setPos(u + 12, v - 12)
+        self._traj_radar_label.setVisible(True)
+    
+    def showTrajectoryPath(self, uv: np.ndarray, target_id: int):
+        """Show a whole projected trajectory, (N, 2) image points, as one path."""
+        if len(uv) < 2:
+            return
+        item = QGraphicsPathItem(polylinePath(uv))
+        item.setPen(QPen(QColor(255, 255, 0, 160), 2))
+        item.setToolTip(f"T{target_id}")
+        item.setZValue(5)
+        self._scene.addItem(item)
+        self._trajectory_projection.append(item)
     
     def clearTrajectoryProjection(self):
         """Clear trajectory projection markers."""
-        if hasattr(self, '_trajectory_projection'):
-            for item in self._trajectory_projection:
-                if item.scene():
-                    self._scene.removeItem(item)
-            self._trajectory_projection.clear()
+        for item in self._traj_overlays:
+            item.setVisible(False)
+        for item in self._trajectory_projection:
+            if item.scene():
+                self._scene.removeItem(item)
+        self._trajectory_projection.clear()
     
     def showCameraDetection(self, u: float, v: float, target_id: int):
         """Show camera detection position (ground truth) as a square marker."""
-        size = 16
-        
-        # Square marker for camera detection (cyan/blue color)
-        from PyQt6.QtWidgets import QGraphicsRectItem
-        marker = QGraphicsRectItem(u - size/2, v - size/2, size, size)
-        marker.setPen(QPen(QColor('#00FFFF'), 3))
-        marker.setBrush(QBrush(QColor(0, 255, 255, 80)))
-        self._scene.addItem(marker)
-        
-        # Store for later removal
-        if not hasattr(self, '_trajectory_projection'):
-            self._trajectory_projection = []
-        self._trajectory_projection.append(marker)
+        self._traj_camera_marker.setPos(u, v)
+        self._traj_camera_marker.setVisible(True)
         
-        # Add label (offset from radar projection label)
-        label = QGraphicsTextItem(f"C{target_id}")
-        label.setDefaultTextColor(QColor('#00FFFF'))
-        label.setFont(QFont("Arial", 10, QFont.Weight.Bold))
-        label.setPos(u + 12, v + 8)
-        self._scene.addItem(label)
-        self._trajectory_projection.append(label)
+        # Label offset from radar projection label
+        self._traj_camera_label.setPlainText(f"C{target_id}")
+        self._traj_camera_label.setPos(u + 12, v + 8)
+        self._traj_camera_label.setVisible(True)
 
     def drawConnectionLine(self, u_radar, v_radar, u_cam, v_cam, color=None):
         """Draw a connecting line between radar and camera points."""
-        from PyQt6.QtWidgets import QGraphicsLineItem
+        pen = self._traj_link_pen
+        if color:
+            pen = QPen(pen)
+            pen.setColor(color)
+        if pen != self._traj_link.pen():
+            self._traj_link.setPen(pen)
+        self._traj_link.setLine(u_radar, v_radar, u_cam, v_cam)
+        self._traj_link.setVisible(True)
+
+
+def _markerPixmap(size: int, pen: QPen, brush: QBrush, square: bool = False) -> QPixmap:
+    """Pre-render a size x size ellipse (or square) marker, pen stroke included."""
+    w = pen.widthF()
+    side = int(np.ceil(size + w))
+    img = QImage(side, side, QImage.Format.Format_ARGB32_Premultiplied)
+    img.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(img)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setPen(pen)
+    painter.setBrush(brush)
+    rect = QRectF((side - size) / 2, (side - size) / 2, size, size)
+    if square:
+        painter.drawRect(rect)
+    else:
+        painter.drawEllipse(rect)
+    painter.end()
+    return QPixmap.fromImage(img)
+
+
+def polylinePath(xy: np.ndarray, path: Optional[QPainterPath] = None) -> QPainterPath:
+    """
+    Path through (N, 2) scene points, same as moveTo + lineTo per point;
+    added to path if given. The points are copied straight into a QPolygonF's
+    buffer through a NumPy view of it, so no QPointF is made per point.
+    """
+    if path is None:
+        path = QPainterPath()
+    n = len(xy)
+    if n:
+        poly = QPolygonF()
+        poly.fill(QPointF(), n)
+        buf = poly.data()
+        buf.setsize(n * 2 * 8)  # n x (double x, double y)
+        np.frombuffer(buf, dtype=np.float64).reshape(n, 2)[:] = xy
+        path.addPolygon(poly)
+    return path
+
+
+def _stackTrajectories(trajectories: Dict[int, np.ndarray], width: int) -> np.ndarray:
+    """All points of Dict[target_id, (N, width) array] as one (N, width) array, in dict order."""
+    if not trajectories:
+        return np.empty((0, width))
+    return np.concatenate([np.asarray(points, dtype=np.float64).reshape(-1, width)
+                           for points in trajectories.values()])
+
+
+def _splitTrajectories(trajectories: Dict[int, list], rows: np.ndarray) -> Dict[int, np.ndarray]:
+    """Split rows made by _stackTrajectories back into Dict[target_id, array] (views)."""
+    ends = np.cumsum([len(points) for points in trajectories.values()], dtype=np.intp)
+    return dict(zip(trajectories.keys(), np.split(rows, ends[:-1])))
+
+
+class TextPathCache:
+    """
+    Glyph outlines of label strings for one font, laid out once at the origin.
+    Radar ids repeat from frame to frame, so each "R<id>" is shaped once and
+    later setPoints() calls only translate the cached path.
+    """
+    
+    MAX_SIZE = 1024  # Distinct strings kept before starting over
+    
+    def __init__(self, font: QFont):
+        self._font = font
+        self._paths: Dict[str, QPainterPath] = {}
+    
+    def addText(self, path: QPainterPath, x: float, y: float, text: str):
+        """Same as path.addText(x, y, font, text), from the cache."""
+        glyphs = self._paths.get(text)
+        if glyphs is None:
+            if len(self._paths) >= self.MAX_SIZE:
+                self._paths.clear()
+            glyphs = QPainterPath()
+            glyphs.addText(0, 0, self._font, text)
+            self._paths[text] = glyphs
+        # addText positions glyphs in 26.6 fixed point (truncated); match it
+        path.addPath(glyphs.translated(int(x * 64) / 64, int(y * 64) / 64))
+
+
+class RadarScatterItem(QGraphicsItem):
+    """
+    Single graphics item drawing all BEV radar points with one drawPoints call.
+    
+    Points live in a sip.array of QPointF whose memory is aliased by a NumPy
+    (N, 2) float64 view, so setPoints() is one array assignment instead of N
+    QGraphicsEllipseItems. Labels are baked into one QPainterPath.
+    """
+    
+    def __init__(self, color: str = '#ff00ff', size: float = 10):
+        super().__init__()
+        self._color = QColor(color)
+        # Round-capped pen of width size + 2 matches a size x size dot with 2px border
+        self._pen = QPen(self._color, size + 2)
+        self._pen.setCapStyle(Qt.PenCapStyle.RoundCap)
+        self._hl_pen = QPen(QColor(COLORS['radar_pending']), size + 3)
+        self._hl_pen.setCapStyle(Qt.PenCapStyle.RoundCap)
+        self._font = QFont("Arial", 8)
+        self._text = TextPathCache(self._font)
         
-        line = QGraphicsLineItem(u_radar, v_radar, u_cam, v_cam)
-        c = color if color else QColor('#FFFFFF')
-        pen = QPen(c, 2, Qt.PenStyle.DashLine)
-        line.setPen(pen)
-        self._scene.addItem(line)
+        self._n = 0
+        self._ids: List = []
+        self._highlight: Optional[int] = None  # Index of highlighted point
+        self._labels = QPainterPath()
+        self._rect = QRectF()
+        self._alloc(64)
+    
+    def _alloc(self, capacity: int):
+        self._pts = sip.array(QPointF, capacity)
+        buf = sip.voidptr(self._pts, capacity * 2 * 8)
+        self._arr = np.frombuffer(buf, dtype=np.float64).reshape(-1, 2)
+    
+    def setPoints(self, scene_xy: np.ndarray, labels: List[str], ids: Optional[List] = None):
+        """Replace all points. scene_xy: (N, 2) scene coordinates."""
+        self.prepareGeometryChange()
+        n = len(scene_xy)
+        if n > len(self._arr):
+            self._alloc(max(n, 2 * len(self._arr)))
+        self._arr[:n] = scene_xy
+        self._n = n
+        self._ids = list(ids) if ids is not None else []
+        self._highlight = None
+        
+        self._labels = QPainterPath()
+        for (sx, sy), label in zip(scene_xy.tolist(), labels):
+            if label:
+                self._text.addText(self._labels, sx + 10, sy + 8, label)
+        
+        if n:
+            lo = scene_xy.min(axis=0)
+            hi = scene_xy.max(axis=0)
+            m = self._hl_pen.widthF()
+            self._rect = QRectF(lo[0] - m, lo[1] - m, hi[0] - lo[0] + 2 * m, hi[1] - lo[1] + 2 * m)
+            self._rect = self._rect.united(self._labels.boundingRect())
+        else:
+            self._rect = QRectF()
+        self.update()
+    
+    def clear(self):
+        self.setPoints(np.empty((0, 2)), [])
+    
+    def setHighlight(self, target_id):
+        """Highlight the point with this id (None clears)."""
+        idx = self._ids.index(target_id) if target_id in self._ids else None
+        if idx != self._highlight:
+            self._highlight = idx
+            self.update()
+    
+    def boundingRect(self) -> QRectF:
+        return self._rect
+    
+    def paint(self, painter, option, widget=None):
+        if not self._n:
+            return
+        painter.setPen(self._pen)
+        painter.drawPoints(self._pts[:self._n])
+        if self._highlight is not None:
+            painter.setPen(self._hl_pen)
+            painter.drawPoint(self._pts[self._highlight])
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self._color)
+        painter.drawPath(self._labels)
+
+
+class RadarRingsItem(QGraphicsItem):
+    """
+    Single graphics item drawing all projected radar markers on the image.
+    
+    Rings and "R<id>" labels are baked into two QPainterPaths in setPoints(),
+    so a projection refresh is one item update instead of 2N QGraphicsItems.
+    Click hit-testing is a NumPy nearest-point query on the kept (N, 2) array.
+    """
+    
+    def __init__(self, color: str, size: float):
+        super().__init__()
+        self._color = QColor(color)
+        self._size = size
+        self._pen = QPen(self._color, 3)
+        self._hl_pen = QPen(QColor(COLORS['radar_pending']), 4)
+        self._font = QFont("Arial", 10, QFont.Weight.Bold)
+        self._text = TextPathCache(self._font)
+        # Same offset as a QGraphicsTextItem at (u + size/2 + 4, v - size/2)
+        fm = QFontMetricsF(self._font)
+        self._label_dx = size / 2 + 4 + 4          # + document margin
+        self._label_dy = -size / 2 + 4 + fm.ascent()  # baseline
+        
+        self._uv = np.empty((0, 2))
+        self._targets: List[dict] = []
+        self._highlight: Optional[int] = None  # Index of pending point
+        self._rings = QPainterPath()
+        self._labels = QPainterPath()
+        self._rect = QRectF()
+    
+    @property
+    def targets(self) -> List[dict]:
+        return self._targets
+    
+    def setPoints(self, uv: np.ndarray, targets: List[dict]):
+        """Replace all markers. uv: (N, 2) image coordinates."""
+        self.prepareGeometryChange()
+        self._uv = np.asarray(uv, dtype=np.float64).reshape(-1, 2)
+        self._targets = list(targets)
+        self._highlight = None
+        
+        r = self._size / 2
+        self._rings = QPainterPath()
+        self._labels = QPainterPath()
+        for (u, v), t in zip(self._uv.tolist(), self._targets):
+            self._rings.addEllipse(QPointF(u, v), r, r)
+            self._text.addText(self._labels, u + self._label_dx, v + self._label_dy, f"R{t.get('id', '?')}")
         
-        if not hasattr(self, '_trajectory_projection'):
-            self._trajectory_projection = []
-        self._trajectory_projection.append(line)
+        m = self._hl_pen.widthF()
+        self._rect = self._rings.boundingRect().adjusted(-m, -m, m, m).united(self._labels.boundingRect())
+        self.update()
+    
+    def clear(self):
+        self.setPoints(np.empty((0, 2)), [])
+    
+    def setHighlight(self, target_id):
+        """Draw the marker with this target id as pending (None clears)."""
+        idx = next((i for i, t in enumerate(self._targets) if t.get('id') == target_id), None) \
+            if target_id is not None else None
+        if idx != self._highlight:
+            self._highlight = idx
+            self.update()
+    
+    def nearest(self, x: float, y: float, max_dist: float) -> Optional[dict]:
+        """Target whose marker center is nearest to (x, y), if within max_dist."""
+        if not len(self._uv):
+            return None
+        d2 = ((self._uv - (x, y)) ** 2).sum(axis=1)
+        i = int(np.argmin(d2))
+        return self._targets[i] if d2[i] < max_dist * max_dist else None
+    
+    def boundingRect(self) -> QRectF:
+        return self._rect
+    
+    def paint(self, painter, option, widget=None):
+        if not self._targets:
+            return
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.setPen(self._pen)
+        painter.drawPath(self._rings)
+        if self._highlight is not None:
+            u, v = self._uv[self._highlight]
+            painter.setPen(self._hl_pen)
+            painter.drawEllipse(QPointF(u, v), self._size / 2, self._size / 2)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self._color)
+        painter.drawPath(self._labels)
+
+
+class BEVGridItem(QGraphicsItem):
+    """
+    Static BEV background (grid lines, distance labels, ego vehicle) as one item.
+    
+    It never changes between refreshes, so it uses DeviceCoordinateCache: Qt
+    renders it once into a pixmap and blits that on every repaint, redrawing
+    only when the view is zoomed.
+    """
+    
+    def __init__(self, lines: Dict[Tuple[str, int], List[QLineF]],
+                 labels: List[Tuple[QPointF, str]], ego: QRectF, rect: QRectF):
+        super().__init__()
+        self._lines = [(QPen(QColor(color), width), ls) for (color, width), ls in lines.items()]
+        self._font = QFont("Arial", 8)
+        # Label positions were QGraphicsTextItem top-lefts: add the document
+        # margin and ascent to get the drawText baseline
+        off = 4 + QFontMetricsF(self._font).ascent()
+        self._labels = [(QPointF(p.x() + 4, p.y() + off), text) for p, text in labels]
+        self._ego = ego
+        self._rect = rect
+        self.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
+    
+    def boundingRect(self) -> QRectF:
+        return self._rect
+    
+    def paint(self, painter, option, widget=None):
+        for pen, lines in self._lines:
+            painter.setPen(pen)
+            painter.drawLines(lines)
+        
+        painter.setPen(QColor('#555'))
+        painter.setFont(self._font)
+        for pos, text in self._labels:
+            painter.drawText(pos, text)
+        
+        painter.setPen(QPen(QColor(COLORS['accent']), 2))
+        painter.setBrush(QBrush(QColor(COLORS['accent'])))
+        painter.drawRect(self._ego)
 
 
 class BEVViewport(ZoomPanView):
     """Viewport for Bird's Eye View radar visualization. (雷达鸟瞰图可视化视口)"""
     
+    TRAIL_RESERVE = 4096  # Path elements preallocated for the playback trail
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self._scene = QGraphicsScene(self)
@@ -521,21 +914,37 @@ class BEVViewport(ZoomPanView):
         self.y_range = (0, 300)   # Forward (m) - Extended to 300m
         self._scale_factor = 4    # px/m (Reduced for larger range)
         
-        self._grid_items: List = []
+        self._grid_item: Optional["BEVGridItem"] = None
         self._radar_items: List = []
         self._pair_items: List = []
+        # (pair_index, start) of each comparison pair's items in _pair_items
+        self._comparison_groups: List[Tuple[int, int]] = []
+        # Pair ring + number items, kept in the scene and reused across refreshes
+        self._pair_pool: List[Tuple[QGraphicsEllipseItem, QGraphicsTextItem]] = []
+        self._pair_pool_used = 0
+        # Line of the trail grown by appendTrajectoryTrail (None until started)
+        # and its path, cleared between trails so its storage is reused
+        self._trail_line: Optional[QGraphicsPathItem] = None
+        self._trail_path = QPainterPath()
+        self._trail_path.reserve(self.TRAIL_RESERVE)
         
         self._drawGrid()
+        
+        # Radar points from addRadarBEVPoints (one item, above the grid)
+        self._radar_scatter = RadarScatterItem(COLORS['radar'])
+        self._scene.addItem(self._radar_scatter)
     
     def _drawGrid(self):
-        for item in self._grid_items:
-            if item.scene():
-                self._scene.removeItem(item)
-        self._grid_items.clear()
+        if self._grid_item and self._grid_item.scene():
+            self._scene.removeItem(self._grid_item)
         
         x0, x1 = self.x_range
         y0, y1 = self.y_range
         
+        # (color, width) -> lines; labels as (top-left, text)
+        lines: Dict[Tuple[str, int], List[QLineF]] = {}
+        labels: List[Tuple[QPointF, str]] = []
+        
         # Grid lines
         # X lines (Forward lines, constant X)
         for x in range(x0, x1 + 1, 10):
@@ -544,19 +953,10 @@ class BEVViewport(ZoomPanView):
             
             color = '#444' if x == 0 else '#2a2a2a'
             width = 2 if x == 0 else 1
-            
-            line = QGraphicsLineItem(sx, sy0, sx_end, sy1)
-            line.setPen(QPen(QColor(color), width))
-            self._scene.addItem(line)
-            self._grid_items.append(line)
+            lines.setdefault((color, width), []).append(QLineF(sx, sy0, sx_end, sy1))
             
             if x != 0:
-                label = QGraphicsTextItem(f"{x}m")
-                label.setDefaultTextColor(QColor('#555'))
-                label.setFont(QFont("Arial", 8))
-                label.setPos(sx + 2, sy0 - 20) # Pos at bottom
-                self._scene.addItem(label)
-                self._grid_items.append(label)
+                labels.append((QPointF(sx + 2, sy0 - 20), f"{x}m"))  # Pos at bottom
 
         # Y lines (Lateral lines, constant Y)
         for y in range(y0, y1 + 1, 20):
@@ -564,29 +964,15 @@ class BEVViewport(ZoomPanView):
             sx1, sy_end = self._toScene(x1, y)
             
             color = '#444' if y % 40 == 0 else '#2a2a2a'
-            line = QGraphicsLineItem(sx0, sy, sx1, sy)
-            line.setPen(QPen(QColor(color), 1))
-            self._scene.addItem(line)
-            self._grid_items.append(line)
-            
-            label = QGraphicsTextItem(f"{y}m")
-            label.setDefaultTextColor(QColor('#555'))
-            label.setFont(QFont("Arial", 8))
-            label.setPos(sx0 - 25, sy - 10)
-            self._scene.addItem(label)
-            self._grid_items.append(label)
+            lines.setdefault((color, 1), []).append(QLineF(sx0, sy, sx1, sy))
+            labels.append((QPointF(sx0 - 25, sy - 10), f"{y}m"))
         
         # Ego vehicle (Center bottom)
-        from PyQt6.QtWidgets import QGraphicsRectItem
         # Vehicle is at (0, 0). Width=2m, Length=4m?
         # Scene coords: (0,0) is center-bottom.
         ego_w_px = 2.0 * self._scale_factor
         ego_l_px = 4.0 * self._scale_factor
-        ego = QGraphicsRectItem(-ego_w_px/2, -ego_l_px, ego_w_px, ego_l_px) 
-        ego.setPen(QPen(QColor(COLORS['accent']), 2))
-        ego.setBrush(QBrush(QColor(COLORS['accent'])))
-        self._scene.addItem(ego)
-        self._grid_items.append(ego)
+        ego = QRectF(-ego_w_px/2, -ego_l_px, ego_w_px, ego_l_px)
         
         # Scene rect updates
         # Scene X: x0*s to x1*s. (-120 to 120)
@@ -597,7 +983,11 @@ class BEVViewport(ZoomPanView):
         # Top-Left of Rect
         rect_x = x0 * self._scale_factor - margin
         rect_y = -y1 * self._scale_factor - margin
-        self._scene.setSceneRect(rect_x, rect_y, w, h)
+        rect = QRectF(rect_x, rect_y, w, h)
+        self._scene.setSceneRect(rect)
+        
+        self._grid_item = BEVGridItem(lines, labels, ego, rect)
+        self._scene.addItem(self._grid_item)
     
     def _toScene(self, x_bev: float, y_bev: float) -> Tuple[float, float]:
         """
@@ -611,12 +1001,35 @@ class BEVViewport(ZoomPanView):
             if item.scene():
                 self._scene.removeItem(item)
         self._radar_items.clear()
+        self._radar_scatter.clear()
     
     def clearPairs(self):
         for item in self._pair_items:
             if item.scene():
                 self._scene.removeItem(item)
         self._pair_items.clear()
+        self._comparison_groups.clear()
+        # Pooled pair markers are only hidden
+        for ring, label in self._pair_pool[:self._pair_pool_used]:
+            ring.setVisible(False)
+            label.setVisible(False)
+        self._pair_pool_used = 0
+    
+    def popLastPair(self):
+        """Hide the most recent pair marker and drop its comparison items."""
+        if not self._pair_pool_used:
+            return
+        self._pair_pool_used -= 1
+        ring, label = self._pair_pool[self._pair_pool_used]
+        ring.setVisible(False)
+        label.setVisible(False)
+        pair_index = ring.data(0)
+        if self._comparison_groups and self._comparison_groups[-1][0] == pair_index:
+            start = self._comparison_groups.pop()[1]
+            for item in self._pair_items[start:]:
+                if item.scene():
+                    self._scene.removeItem(item)
+            del self._pair_items[start:]
     
     def loadRadarData(self, data: dict):
         """
@@ -659,6 +1072,7 @@ class BEVViewport(ZoomPanView):
                 if item.data(0) == tid:
                     item.setPen(QPen(QColor(COLORS['radar_pending']), 3))
                     item.setBrush(QBrush(QColor(COLORS['radar_pending'])))
+        self._radar_scatter.setHighlight(tid)
 
     def clearPendingRadar(self):
         """Reset radar highlights."""
@@ -667,6 +1081,7 @@ class BEVViewport(ZoomPanView):
                 # Reset to normal
                 item.setPen(QPen(QColor(COLORS['radar']), 1))
                 item.setBrush(QBrush(QColor(COLORS['radar'])))
+        self._radar_scatter.setHighlight(None)
 
     
     def addPairMarker(self, radar_x_bev: float, radar_y_bev: float, pair_index: int):
@@ -675,20 +1090,38 @@ class BEVViewport(ZoomPanView):
         Args assumed to be already in BEV frame (X=Right, Y=Forward).
         """
         sx, sy = self._toScene(radar_x_bev, radar_y_bev)
+        self._placePairMarker(sx, sy, pair_index)
+    
+    def addPairMarkers(self, xy_bev: np.ndarray, indices: List[int]):
+        """Add markers for several pairs; xy_bev is (N, 2) in BEV frame."""
+        scene_xy = np.asarray(xy_bev, dtype=np.float64).reshape(-1, 2) * (self._scale_factor, -self._scale_factor)
+        for (sx, sy), i in zip(scene_xy.tolist(), indices):
+            self._placePairMarker(sx, sy, i)
+    
+    def _placePairMarker(self, sx: float, sy: float, pair_index: int):
         color = QColor(PAIR_COLORS[pair_index % len(PAIR_COLORS)])
         
-        size = 18
-        ring = QGraphicsEllipseItem(sx - size/2, sy - size/2, size, size)
+        # Reuse a pooled ring/label (setPos) instead of add/removeItem per refresh
+        if self._pair_pool_used == len(self._pair_pool):
+            size = 18
+            ring = QGraphicsEllipseItem(-size/2, -size/2, size, size)
+            label = QGraphicsTextItem()
+            label.setFont(QFont("Arial", 10, QFont.Weight.Bold))
+            self._scene.addItem(ring)
+            self._scene.addItem(label)
+            self._pair_pool.append((ring, label))
+        ring, label = self._pair_pool[self._pair_pool_used]
+        self._pair_pool_used += 1
+        
         ring.setPen(QPen(color, 3))
-        self._scene.addItem(ring)
-        self._pair_items.append(ring)
+        ring.setPos(sx, sy)
+        ring.setData(0, pair_index)
+        ring.setVisible(True)
         
-        label = QGraphicsTextItem(str(pair_index + 1))
+        label.setPlainText(str(pair_index + 1))
         label.setDefaultTextColor(color)
-        label.setFont(QFont("Arial", 10, QFont.Weight.Bold))
         label.setPos(sx + 10, sy - 12)
-        self._scene.addItem(label)
-        self._pair_items.append(label)
+        label.setVisible(True)
     
     def addRadarBEVPoint(self, x_bev: float, y_bev: float, label: str, color: str = '#ff00ff'):
         """Add a radar point in BEV coordinates (X=Right, Y=Forward)."""
@@ -711,6 +1144,15 @@ class BEVViewport(ZoomPanView):
         except Exception as e:
             print(f"addRadarBEVPoint error: {e}")
     
+    def addRadarBEVPoints(self, xy: np.ndarray, labels: List[str], ids: Optional[List] = None):
+        """
+        Set the radar points in BEV coordinates (X=Right, Y=Forward).
+        All points go into the single RadarScatterItem (see its docstring);
+        ids are kept so highlightRadarMarker can find a point again.
+        """
+        scene_xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2) * (self._scale_factor, -self._scale_factor)
+        self._radar_scatter.setPoints(scene_xy, labels, ids)
+    
     def addImageBEVPoint(self, x_bev: float, y_bev: float, label: str, color: str = '#ffff00'):
         """Add an image point in BEV (yellow cross)."""
         try:
@@ -737,6 +1179,7 @@ class BEVViewport(ZoomPanView):
     
     def addComparisonPair(self, radar_bev: tuple, image_bev: tuple, pair_index: int):
         """Add comparison pair in BEV."""
+        self._comparison_groups.append((pair_index, len(self._pair_items)))
         try:
             self.addRadarBEVPoint(radar_bev[0], radar_bev[1], "", PAIR_COLORS[pair_index % len(PAIR_COLORS)])
             self.addImageBEVPoint(image_bev[0], image_bev[1], "", "#FFFFFF")
@@ -765,7 +1208,20 @@ class BEVViewport(ZoomPanView):
         """Initialize trajectory-related attributes (called from __init__)."""
         if not hasattr(self, '_trajectory_items'):
             self._trajectory_items: List = []
+            # Clickable radar trajectory points per target:
+            # (target_id, frame ids, (N, 2) scene positions)
+            self._trajectory_hits: List[Tuple[int, np.ndarray, np.ndarray]] = []
             self._trajectory_mode = False
+            self._trajectories_key = None
+    
+    def trajectoriesKey(self):
+        """Tag set by the caller for the loaded trajectories; None after a clear."""
+        self.__init_trajectory_attrs()
+        return self._trajectories_key
+    
+    def setTrajectoriesKey(self, key):
+        self.__init_trajectory_attrs()
+        self._trajectories_key = key
     
     def setTrajectoryMode(self, enabled: bool):
         """Enable/disable trajectory viewing mode."""
@@ -780,12 +1236,29 @@ class BEVViewport(ZoomPanView):
             if item.scene():
                 self._scene.removeItem(item)
         self._trajectory_items.clear()
+        self._trajectory_hits.clear()
+        self._trajectories_key = None
     
-    def loadTrajectories(self, trajectories: Dict[int, List[Tuple[int, float, float]]]):
+    @staticmethod
+    def trajectoriesToBEV(trajectories: Dict[int, np.ndarray]) -> Dict[int, np.ndarray]:
+        """
+        Convert radar trajectories once for loadTrajectories.
+        Args:
+            trajectories: Dict[target_id, (N, 3) array of (frame_id, x_radar, y_radar)]
+        Returns:
+            Dict[target_id, (N, 3) array of (frame_id, x_bev, y_bev)]
+        """
+        a = _stackTrajectories(trajectories, 3)
+        # Convert raw radar (Forward, Left) to BEV (Right, Forward)
+        bev = np.column_stack((a[:, 0], -a[:, 2], a[:, 1]))
+        return _splitTrajectories(trajectories, bev)
+    
+    def loadTrajectories(self, trajectories: Dict[int, np.ndarray]):
         """
         Load and render trajectories.
         Args:
-            trajectories: Dict[target_id, List[(frame_id, x_radar, y_radar)]]
+            trajectories: Dict[target_id, (N, 3) array of (frame_id, x_bev, y_bev)]
+                          as made by trajectoriesToBEV
         """
         self.__init_trajectory_attrs()
         self.clearTrajectories()
@@ -798,33 +1271,22 @@ class BEVViewport(ZoomPanView):
                 continue
                 
             color = QColor(PAIR_COLORS[i % len(PAIR_COLORS)])
+            frame_ids = points[:, 0].astype(int)
+            frames = frame_ids.tolist()
+            scene = points[:, 1:] * (self._scale_factor, -self._scale_factor)
+            scene_xy = scene.tolist()
+            self._trajectory_hits.append((target_id, frame_ids, scene))
             
-            # Draw trajectory polyline
-            path = QPainterPath()
-            first = True
-            for frame_id, x_radar, y_radar in points:
-                # Convert raw radar (Forward, Left) to BEV (Right, Forward)
-                x_bev = -y_radar
-                y_bev = x_radar
-                sx, sy = self._toScene(x_bev, y_bev)
-                
-                if first:
-                    path.moveTo(sx, sy)
-                    first = False
-                else:
-                    path.lineTo(sx, sy)
-            
-            path_item = QGraphicsPathItem(path)
+            # Draw trajectory polyline; static until the next selection, so
+            # repaints (pan, overlays) blit a cached pixmap
+            path_item = QGraphicsPathItem(polylinePath(scene))
             path_item.setPen(QPen(color, 2))
+            path_item.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
             self._scene.addItem(path_item)
             self._trajectory_items.append(path_item)
             
             # Draw points at each frame
-            for frame_id, x_radar, y_radar in points:
-                x_bev = -y_radar
-                y_bev = x_radar
-                sx, sy = self._toScene(x_bev, y_bev)
-                
+            for frame_id, (sx, sy) in zip(frames, scene_xy):
                 size = 6
                 dot = QGraphicsEllipseItem(sx - size/2, sy - size/2, size, size)
                 dot.setPen(QPen(color, 1))
@@ -836,17 +1298,13 @@ class BEVViewport(ZoomPanView):
                 self._trajectory_items.append(dot)
             
             # Label at last point
-            if points:
-                last_frame, last_x, last_y = points[-1]
-                x_bev = -last_y
-                y_bev = last_x
-                sx, sy = self._toScene(x_bev, y_bev)
-                label = QGraphicsTextItem(f"T{target_id}")
-                label.setDefaultTextColor(color)
-                label.setFont(QFont("Arial", 9, QFont.Weight.Bold))
-                label.setPos(sx + 8, sy - 8)
-                self._scene.addItem(label)
-                self._trajectory_items.append(label)
+            sx, sy = scene_xy[-1]
+            label = QGraphicsTextItem(f"T{target_id}")
+            label.setDefaultTextColor(color)
+            label.setFont(QFont("Arial", 9, QFont.Weight.Bold))
+            label.setPos(sx + 8, sy - 8)
+            self._scene.addItem(label)
+            self._trajectory_items.append(label)
     
     def highlightTrajectoryPoint(self, target_id: int, frame_id: int):
         """Highlight a specific point on the trajectory."""
@@ -859,63 +1317,58 @@ class BEVViewport(ZoomPanView):
                 if item.scene():
                     self._scene.removeItem(item)
             self._trail_items.clear()
+        self._trail_line = None
+        self._trail_path.clear()  # Keeps its capacity
 
-    def drawTrajectoryTrail(self, points: List[Tuple[float, float]], color: QColor):
-        """Draw a trajectory trail (growing dots). Points are (x_radar, y_radar)."""
-        if not points:
+    def appendTrajectoryTrail(self, points, color: QColor):
+        """
+        Extend the trail by new (N, 2) BEV (x, y) points, skipping rows with
+        None/NaN. The line is a single path item grown with lineTo and only the
+        new points get dots, so each call costs O(N) in the points it adds.
+        clearTrails() starts a new trail.
+        """
+        pts = np.array(points, dtype=np.float64).reshape(-1, 2)  # None -> NaN
+        pts = pts[np.isfinite(pts).all(axis=1)]
+        if not len(pts):
             return
-            
-        from PyQt6.QtWidgets import QGraphicsEllipseItem
         
         if not hasattr(self, '_trail_items'):
              self._trail_items = []
         
-        # Draw dots with gradient size and alpha
-        # Draw connected lines and dots
-        total = len(points)
-        prev_x, prev_y = None, None
+        line = self._trail_line
+        if line is None:
+            c_line = QColor(color)
+            c_line.setAlpha(150)
+            line = QGraphicsPathItem()
+            line.setPen(QPen(c_line, 2))
+            line.setZValue(39) # Below dots (40)
+            self._scene.addItem(line)
+            self._trail_items.append(line)
+            self._trail_line = line
         
-        for i, (x_bev, y_bev) in enumerate(points):
-             if x_bev is None or y_bev is None:
-                 continue
-                 
-             # Assumes points are already in BEV coordinates
-             sx, sy = self._toScene(x_bev, y_bev)
-             
-             # Calculate ratio for gradient effects
-             ratio = (i / total) if total > 1 else 1.0
-             
-             # 1. Draw Line from previous point
-             if prev_x is not None and prev_y is not None:
-                 sx_prev, sy_prev = self._toScene(prev_x, prev_y)
-                 line = QGraphicsLineItem(sx_prev, sy_prev, sx, sy)
-                 # Fade line tail
-                 line_alpha = 50 + 150 * ratio
-                 c_line = QColor(color)
-                 c_line.setAlpha(int(line_alpha))
-                 line.setPen(QPen(c_line, 2))
-                 line.setZValue(39) # Below dots (40)
-                 self._scene.addItem(line)
-                 self._trail_items.append(line)
-             
-             prev_x, prev_y = x_bev, y_bev
-             
-             # 2. Draw Dot
-             # Size: 2.0 -> 6.0
-             size = 2.0 + 4.0 * (ratio ** 2) 
-             
-             # Alpha: 100 -> 255
-             alpha = 100 + 155 * ratio
-             c = QColor(color)
-             c.setAlpha(int(alpha))
-             
-             dot = QGraphicsEllipseItem(sx - size/2, sy - size/2, size, size)
-             dot.setPen(QPen(Qt.PenStyle.NoPen))
-             dot.setBrush(QBrush(c))
-             dot.setZValue(40) # Ensure trail is above map but below head
-             self._scene.addItem(dot)
-             self._trail_items.append(dot)
-    
+        scene_xy = pts * (self._scale_factor, -self._scale_factor)
+        xy_list = scene_xy.tolist()
+        path = self._trail_path
+        if path.isEmpty():
+            polylinePath(scene_xy, path)  # New trail: the whole backlog at once
+        else:
+            for sx, sy in xy_list:
+                path.lineTo(sx, sy)
+        line.setPath(path)
+        
+        c_dot = QColor(color)
+        c_dot.setAlpha(200)
+        brush = QBrush(c_dot)
+        no_pen = QPen(Qt.PenStyle.NoPen)
+        size = 4.0
+        for sx, sy in xy_list:
+            dot = QGraphicsEllipseItem(sx - size/2, sy - size/2, size, size)
+            dot.setPen(no_pen)
+            dot.setBrush(brush)
+            dot.setZValue(40) # Ensure trail is above map but below head
+            self._scene.addItem(dot)
+            self._trail_items.append(dot)
+
     def drawTrajectoryHead(self, x_radar: float, y_radar: float, color: QColor):
         """Draw a highlighted head for the trajectory."""
         try:
@@ -953,11 +1406,24 @@ class BEVViewport(ZoomPanView):
         except Exception as e:
             print(f"[ERROR] drawTrajectoryHead failed: {e}")
 
-    def loadCameraTrajectories(self, trajectories: Dict[int, List[Tuple[int, float, float, float, float]]]):
+    @staticmethod
+    def cameraTrajectoriesToBEV(trajectories: Dict[int, np.ndarray]) -> Dict[int, np.ndarray]:
+        """
+        Convert camera trajectories once for loadCameraTrajectories.
+        Args:
+            trajectories: Dict[target_id, (N, 5) array of (frame_id, u, v, x_bev, y_bev)]
+        Returns:
+            Dict[target_id, (N, 3) array of (frame_id, x_bev, y_bev)]
+        """
+        a = _stackTrajectories(trajectories, 5)
+        return _splitTrajectories(trajectories, a[:, [0, 3, 4]])
+    
+    def loadCameraTrajectories(self, trajectories: Dict[int, np.ndarray]):
         """
         Load and render camera trajectories (in BEV space).
         Args:
-            trajectories: Dict[target_id, List[(frame_id, u, v, x_bev, y_bev)]]
+            trajectories: Dict[target_id, (N, 3) array of (frame_id, x_bev, y_bev)]
+                          as made by cameraTrajectoriesToBEV
         Camera trajectories are shown as dashed lines with square markers.
         """
         self.__init_trajectory_attrs()
@@ -973,28 +1439,19 @@ class BEVViewport(ZoomPanView):
             lighter_color = QColor(color)
             lighter_color.setAlpha(180)
             
-            # Draw trajectory polyline (dashed for camera)
-            path = QPainterPath()
-            first = True
-            for frame_id, u, v, x_bev, y_bev in points:
-                sx, sy = self._toScene(x_bev, y_bev)
-                
-                if first:
-                    path.moveTo(sx, sy)
-                    first = False
-                else:
-                    path.lineTo(sx, sy)
+            frames = points[:, 0].astype(int).tolist()
+            scene = points[:, 1:] * (self._scale_factor, -self._scale_factor)
             
-            path_item = QGraphicsPathItem(path)
+            # Draw trajectory polyline (dashed for camera)
+            path_item = QGraphicsPathItem(polylinePath(scene))
             pen = QPen(lighter_color, 2, Qt.PenStyle.DashLine)
             path_item.setPen(pen)
+            path_item.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
             self._scene.addItem(path_item)
             self._trajectory_items.append(path_item)
             
             # Draw square markers for camera points
-            for frame_id, u, v, x_bev, y_bev in points:
-                sx, sy = self._toScene(x_bev, y_bev)
-                
+            for frame_id, (sx, sy) in zip(frames, scene.tolist()):
                 size = 5
                 rect = QGraphicsRectItem(sx - size/2, sy - size/2, size, size)
                 rect.setPen(QPen(lighter_color, 1))
@@ -1010,21 +1467,18 @@ class BEVViewport(ZoomPanView):
         if hasattr(self, '_trajectory_mode') and self._trajectory_mode:
             if event.button() == Qt.MouseButton.LeftButton:
                 pos = self.mapToScene(event.position().toPoint())
-                # Find nearest trajectory point
-                min_dist = float('inf')
+                # Find nearest radar trajectory point (within 30 px)
+                min_dist = 30.0
                 nearest_target = None
                 nearest_frame = None
                 
-                for item in self._trajectory_items:
-                    if isinstance(item, QGraphicsEllipseItem):
-                        rect = item.rect()
-                        cx = rect.x() + rect.width() / 2
-                        cy = rect.y() + rect.height() / 2
-                        dist = ((cx - pos.x())**2 + (cy - pos.y())**2)**0.5
-                        if dist < min_dist and dist < 30:
-                            min_dist = dist
-                            nearest_target = item.data(0)
-                            nearest_frame = item.data(1)
+                for target_id, frame_ids, scene in self._trajectory_hits:
+                    dist = np.hypot(scene[:, 0] - pos.x(), scene[:, 1] - pos.y())
+                    i = int(dist.argmin())
+                    if dist[i] < min_dist:
+                        min_dist = dist[i]
+                        nearest_target = target_id
+                        nearest_frame = int(frame_ids[i])
                 
                 if nearest_target is not None and nearest_frame is not None:
                     self.trajectoryPointClicked.emit(nearest_target, nearest_frame)